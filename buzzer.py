@@ -1,58 +1,152 @@
 """
 buzzer module for audio feedback
 provides beeps for mode changes and connection status
+
+sounds are played by a background sequencer thread, so every public method
+returns immediately instead of blocking the control loop
 """
-import RPi.GPIO as GPIO
+import threading
 import time
+from collections import deque
+from gpio_backend import get_backend
+
+# higher priority preempts a lower one that is playing and replaces
+# anything queued at the same or lower priority
+PRIORITY_MODE = 1
+PRIORITY_CONNECTION = 2
+PRIORITY_ERROR = 3
+
+# patterns are lists of (frequency, on_seconds, off_seconds_after)
+CONNECT_PATTERN = [(3500, 0.1, 0.05), (4000, 0.1, 0.05), (4500, 0.15, 0)]
+DISCONNECT_PATTERN = [(4500, 0.1, 0.05), (4000, 0.1, 0.05), (3500, 0.15, 0)]
+DRIVE_MODE_PATTERN = [(4500, 0.08, 0.08), (4500, 0.08, 0)]
+HITCH_MODE_PATTERN = [(3500, 0.08, 0.08), (3500, 0.08, 0)]
+ERROR_PATTERN = [(4000, 0.1, 0.05)] * 3
+
 
 class Buzzer:
-    def __init__(self, pin=27):
+    def __init__(self, pin=27, pwm=None, gpio=None):
         """
         initialize buzzer
-        
+
         Args:
             pin: GPIO pin number for buzzer
+            pwm: PWM object to use instead of creating one on pin (for testing)
+            gpio: GPIO backend (default = gpio_backend.get_backend())
         """
         self.pin = pin
-        GPIO.setup(pin, GPIO.OUT)
-        self.pwm = GPIO.PWM(pin, 1000)
+        if pwm is None:
+            gpio = gpio if gpio is not None else get_backend()
+            gpio.setup(pin)
+            pwm = gpio.PWM(pin, 1000)
+        self.pwm = pwm
         self.pwm.start(0)
-    
+
+        # sequencer state, guarded by _cond
+        self._cond = threading.Condition()
+        self._queue = deque()           # (priority, pattern)
+        self._playing_priority = None   # priority of the pattern being played
+        self._preempt = False
+        self._running = True
+
+        self._thread = threading.Thread(target=self._run, name="buzzer", daemon=True)
+        self._thread.start()
+
+    def play(self, pattern, priority=PRIORITY_MODE):
+        """
+        queue a tone pattern without blocking
+
+        Args:
+            pattern: list of (frequency, on_seconds, off_seconds_after)
+            priority: PRIORITY_MODE, PRIORITY_CONNECTION or PRIORITY_ERROR
+        """
+        with self._cond:
+            # latest sound wins over anything queued that is no more important
+            self._queue = deque(item for item in self._queue if item[0] > priority)
+            self._queue.append((priority, pattern))
+            if self._playing_priority is not None and priority > self._playing_priority:
+                self._preempt = True
+            self._cond.notify()
+
     def beep(self, frequency, duration=0.1):
-        self.pwm.ChangeFrequency(frequency)
-        self.pwm.ChangeDutyCycle(50)
-        time.sleep(duration)
-        self.pwm.ChangeDutyCycle(0)
-    
+        self.play([(frequency, duration, 0)])
+
     def connect_sound(self):
-        self.beep(3500, 0.1)
-        time.sleep(0.05)
-        self.beep(4000, 0.1)
-        time.sleep(0.05)
-        self.beep(4500, 0.15)
-    
+        self.play(CONNECT_PATTERN, PRIORITY_CONNECTION)
+
     def disconnect_sound(self):
-        self.beep(4500, 0.1)
-        time.sleep(0.05)
-        self.beep(4000, 0.1)
-        time.sleep(0.05)
-        self.beep(3500, 0.15)
-    
+        self.play(DISCONNECT_PATTERN, PRIORITY_CONNECTION)
+
     def drive_mode_sound(self):
-        self.beep(4500, 0.08)
-        time.sleep(0.08)
-        self.beep(4500, 0.08)
-    
+        self.play(DRIVE_MODE_PATTERN, PRIORITY_MODE)
+
     def hitch_mode_sound(self):
-        self.beep(3500, 0.08)
-        time.sleep(0.08)
-        self.beep(3500, 0.08)
-    
+        self.play(HITCH_MODE_PATTERN, PRIORITY_MODE)
+
     def error_sound(self):
-        for _ in range(3):
-            self.beep(4000, 0.1)
-            time.sleep(0.05)
-    
+        self.play(ERROR_PATTERN, PRIORITY_ERROR)
+
+    def is_idle(self):
+        """true if nothing is playing or queued"""
+        with self._cond:
+            return not self._queue and self._playing_priority is None
+
+    def wait_idle(self, timeout=None):
+        """
+        block until all queued sounds have played (e.g. before shutdown)
+
+        Returns:
+            True if idle, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._playing_priority is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        """sequencer thread: play queued patterns one at a time"""
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                priority, pattern = self._queue.popleft()
+                self._playing_priority = priority
+                self._preempt = False
+
+            for frequency, on_time, off_time in pattern:
+                self.pwm.ChangeFrequency(frequency)
+                self.pwm.ChangeDutyCycle(50)
+                interrupted = self._wait(on_time)
+                self.pwm.ChangeDutyCycle(0)
+                if interrupted or self._wait(off_time):
+                    break
+
+            with self._cond:
+                self._playing_priority = None
+                self._cond.notify_all()
+
+    def _wait(self, duration):
+        """sleep for duration, returns True early if preempted or shutting down"""
+        deadline = time.monotonic() + duration
+        with self._cond:
+            while not self._preempt and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
     def cleanup(self):
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
         self.pwm.ChangeDutyCycle(0)
         self.pwm.stop()
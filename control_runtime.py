@@ -0,0 +1,356 @@
+"""
+asyncio control runtime
+wakes on controller input instead of sleep-polling, runs input, control/ramp,
+feedback and reconnection as separate tasks
+"""
+import asyncio
+import threading
+import time
+from tick_scheduler import TickScheduler
+from robot_log import get_logger
+
+READY_BANNER = "\n".join([
+    "",
+    "=" * 50,
+    "ROBOT READY",
+    "=" * 50,
+    "",
+    "Controls:",
+    "  Joystick Y-axis   - Forward/Backward",
+    "  Joystick X-axis   - Turn Left/Right",
+    "  Button X (top)    - Raise Tongue",
+    "  Button B (bottom) - Lower Tongue",
+    "  Button Y (left)   - Hitch Mode (25% max speed)",
+    "  Button A (right)  - Drive Mode (100% max speed)",
+    "  Ctrl+C            - Emergency Stop & Exit",
+    "",
+    "=" * 50,
+    "",
+])
+
+
+def run_blocking(func, *args):
+    """
+    run a blocking call on a daemon thread and await its result
+    (executor threads are joined at exit, which would hang shutdown while
+    bluetoothctl or a controller scan is still running)
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def worker():
+        try:
+            result = func(*args)
+        except BaseException as e:
+            loop.call_soon_threadsafe(_set_future, future, None, e)
+        else:
+            loop.call_soon_threadsafe(_set_future, future, result, None)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return future
+
+
+def _set_future(future, result, error):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class ControlRuntime:
+    def __init__(self, robot, connect_controller, scheduler=None, command_timeout=1.5,
+                 startup=None, watchdog=None):
+        """
+        initialize control runtime
+
+        Args:
+            robot: Robot instance to drive
+            connect_controller: blocking callable returning a connected BluetoothController
+            scheduler: TickScheduler for the ramp deadline (default 20Hz)
+            command_timeout: stop all motors if no commands for this many seconds
+            startup: StartupReport, reported on the first accepted input
+            watchdog: Watchdog heartbeated every tick, armed while connected
+        """
+        self.robot = robot
+        self.connect_controller = connect_controller
+        self.scheduler = scheduler if scheduler is not None else TickScheduler(20)
+        self.command_timeout = command_timeout
+        self.startup = startup
+        self.watchdog = watchdog
+
+        self.controller = None
+        self.current_mode = "drive"
+
+        # last tick's state, published to telemetry
+        self.stick_x = 0
+        self.stick_y = 0
+        self.timed_out = False
+
+        # counters for the metrics endpoint
+        self.connections = 0
+        self.timeout_stops = 0
+        # events/frames of controllers that already dropped, and the last of
+        # them - a controller's own counters start from 0 on each connection
+        self._input_totals = (0, 0, None)
+
+        # off-thread logging; the per-tick drive line is change-only, max 10/s
+        self.log = get_logger()
+        self.log.set_rate_limit("drive", 0.1)
+        self.last_command_time = time.time()
+
+        # created in run() so they bind to the running event loop
+        self._connected = None
+        self._disconnected = None
+        self._input_ready = None
+        self._readable = None
+        self._feedback = None
+
+    async def run(self):
+        """run all tasks until cancelled"""
+        self._connected = asyncio.Event()
+        self._disconnected = asyncio.Event()
+        self._input_ready = asyncio.Event()
+        self._readable = asyncio.Event()
+        self._feedback = asyncio.Queue()
+
+        tasks = [
+            asyncio.create_task(self._reconnect_task()),
+            asyncio.create_task(self._input_task()),
+            asyncio.create_task(self._control_task()),
+            asyncio.create_task(self._feedback_task()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def input_totals(self):
+        """
+        input events and frames over every connection, for the metrics
+        endpoint (safe to call from another thread)
+
+        Returns:
+            (events, frames)
+        """
+        events, frames, retired = self._input_totals
+        controller = self.controller
+        if controller is not None and controller is not retired:
+            events += getattr(controller, "events", 0)
+            frames += controller.frames
+        return events, frames
+
+    def play_sound(self, name):
+        """queue a buzzer sound (e.g. "connect", "drive_mode") for the feedback task"""
+        self._feedback.put_nowait(name)
+
+    def _mark_disconnected(self):
+        if self.watchdog is not None:
+            self.watchdog.disarm()
+        self._connected.clear()
+        self._disconnected.set()
+        self._input_ready.set()
+        self._readable.set()
+
+    async def _reconnect_task(self):
+        """connect the controller, then wait for it to drop and clean up"""
+        while True:
+            self.log.log("\nWaiting for Bluetooth controller...")
+            self.controller = await run_blocking(self.connect_controller)
+            self.connections += 1
+            if self.startup is not None:
+                self.startup.mark("connected")
+
+            self.play_sound("connect")
+            self.log.log(READY_BANNER)
+
+            self.last_command_time = time.time()
+            self._disconnected.clear()
+            self._connected.set()
+            if self.watchdog is not None:
+                self.watchdog.arm()
+
+            await self._disconnected.wait()
+
+            self.play_sound("disconnect")
+            self.robot.stop_all()
+            self._retire_controller()
+            self.log.critical("\nWARNING: Controller disconnected\nActuator speed after stop: {}",
+                              self.robot.actuator.current_speed)
+
+    def _retire_controller(self):
+        """release a dropped controller's inputs, close it and keep its counts"""
+        controller = self.controller
+        controller.reset_all_inputs()
+        # every disconnect (ENODEV, is_connected() failing, a tick exception)
+        # goes through _mark_disconnected and ends up here
+        controller.close()
+        events, frames, _ = self._input_totals
+        # one assignment, so a scrape sees the counts either before or after
+        self._input_totals = (events + getattr(controller, "events", 0),
+                              frames + controller.frames, controller)
+
+    async def _input_task(self):
+        """wake on controller fd readability and drain pending events"""
+        loop = asyncio.get_running_loop()
+        readable = self._readable
+        timers = self.robot.timers
+
+        while True:
+            await self._connected.wait()
+            controller = self.controller
+            fd = controller.fileno()
+            readable.clear()
+            loop.add_reader(fd, readable.set)
+            try:
+                while self._connected.is_set():
+                    await readable.wait()
+                    readable.clear()
+                    if not self._connected.is_set():
+                        # woken by _mark_disconnected - the device is being closed
+                        break
+                    read_start = time.perf_counter()
+                    try:
+                        controller.read_events()
+                    except OSError:
+                        # device node went away (ENODEV) - controller dropped
+                        self._mark_disconnected()
+                        break
+                    timers.record("input", time.perf_counter() - read_start)
+                    if controller.received_events_this_frame:
+                        self.last_command_time = time.time()
+                        self._input_ready.set()
+            finally:
+                loop.remove_reader(fd)
+
+    async def _control_task(self):
+        """run a tick on new input, and always on the scheduler's deadline"""
+        scheduler = self.scheduler
+
+        while True:
+            if not self._connected.is_set():
+                await self._connected.wait()
+                scheduler.start()
+
+            # a flood of input must not starve the deadline tick, so only
+            # wait for input while the deadline is still in the future
+            delay = scheduler.time_until_deadline()
+            if delay > 0 and not self._input_ready.is_set():
+                try:
+                    await asyncio.wait_for(self._input_ready.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._input_ready.clear()
+            scheduled = scheduler.time_until_deadline() == 0
+
+            if not self._connected.is_set():
+                continue
+            if not self.controller.is_connected():
+                self._mark_disconnected()
+                continue
+
+            if scheduled:
+                scheduler.begin_tick()
+            if self.startup is not None:
+                self.startup.mark("first tick")
+            tick_start = time.perf_counter()
+            try:
+                self._tick(shed=scheduler.shedding)
+                tick_time = time.perf_counter() - tick_start
+                self.robot.timers.record("tick", tick_time)
+                self.robot.publish_telemetry(self.stick_x, self.stick_y, self.current_mode,
+                                             tick_time, self.timed_out)
+            except Exception as e:
+                self.robot.stop_all()
+                if self.watchdog is not None:
+                    # already stopped, and the pause below is deliberate
+                    self.watchdog.disarm()
+                self.log.critical("\n\nERROR: {}\nEmergency stop activated", e)
+                await asyncio.sleep(2)
+                self._mark_disconnected()
+            if scheduled:
+                scheduler.end_tick()
+            if self.watchdog is not None:
+                self.watchdog.heartbeat()
+
+    def _tick(self, shed=False):
+        """
+        one control step: ramp -> mode -> drive -> actuator
+
+        Args:
+            shed: last scheduled tick overran - skip logging and feedback
+                  sounds, motor updates always run
+        """
+        robot = self.robot
+        controller = self.controller
+
+        robot.update()
+
+        speed_adjustment = controller.get_speed_adjustment()
+        if speed_adjustment == "drive" and self.current_mode != "drive":
+            self.current_mode = "drive"
+            robot.set_max_speed(100)
+            if not shed:
+                self.play_sound("drive_mode")
+                self.log.log(">> DRIVE MODE activated (100% speed)")
+        elif speed_adjustment == "hitch" and self.current_mode != "hitch":
+            self.current_mode = "hitch"
+            robot.set_max_speed(50)
+            if not shed:
+                self.play_sound("hitch_mode")
+                self.log.log(">> HITCH MODE activated (50% speed)")
+
+        # get drive commands
+        forward, turn = controller.get_drive_values()
+        self.stick_x = turn
+        self.stick_y = forward
+
+        # held buttons / deflected stick also count as commands
+        if controller.has_input():
+            self.last_command_time = time.time()
+            if self.startup is not None:
+                self.log.log(self.startup.first_input())
+                self.startup = None
+
+        # check for command timeout (safety feature)
+        timed_out = time.time() - self.last_command_time > self.command_timeout
+        if timed_out and not self.timed_out:
+            self.timeout_stops += 1
+        self.timed_out = timed_out
+        if timed_out:
+            robot.stop_all()
+        else:
+            # send drive commands to robot
+            steer_start = time.perf_counter()
+            robot.drive(turn, forward, controller.take_input_stamp())
+            steer_end = time.perf_counter()
+            robot.timers.record("steering", steer_end - steer_start)
+            if (forward != 0 or turn != 0) and not shed:
+                # reuse the speeds drive() just computed, formatting happens off-thread
+                left = robot.steering.get_left_motor()
+                right = robot.steering.get_right_motor()
+                self.log.log_change("drive", "Input: x={:3d}, y={:3d} | Output: L={:3d}, R={:3d}",
+                                    turn, forward, left, right)
+                robot.timers.record("log", time.perf_counter() - steer_end)
+
+        # get actuator command
+        actuator_cmd = controller.get_actuator_command()
+        if actuator_cmd == "raise":
+            robot.raise_tongue(100)
+        elif actuator_cmd == "lower":
+            robot.lower_tongue(100)
+        else:
+            robot.stop_actuator()
+
+    async def _feedback_task(self):
+        """hand queued sounds to the buzzer sequencer (which never blocks)"""
+        while True:
+            name = await self._feedback.get()
+            start = time.perf_counter()
+            try:
+                getattr(self.robot.buzzer, f"{name}_sound")()
+            except Exception as e:
+                self.log.log("Buzzer error: {}", e)
+            self.robot.timers.record("feedback", time.perf_counter() - start)
@@ -3,29 +3,91 @@ bluetooth controller input handler
 reads joystick and button inputs from controller
 single joystick / one-handed
 """
-import evdev
-from evdev import ecodes
+import time
+from event_recording import RecordingDevice
+from raw_input import RawEventReader
+from stick_response import StickResponse
+from device_discovery import ControllerDiscovery
+
+# evdev is imported by the first BluetoothController, so at startup it loads
+# on the connect thread instead of delaying hardware init
+ecodes = None
+
+# raw device state, one slot per input the robot uses
+TRIGGER, NORTH, SOUTH, WEST, EAST, STICK_X, STICK_Y = range(7)
+KEY_SLOTS = (TRIGGER, NORTH, SOUTH, WEST, EAST)
+ABS_SLOTS = (STICK_X, STICK_Y)
+
+# (type, code) -> slot, built with ecodes
+_dispatch = None
+_slot_codes = None
+_syn_report = None
+_syn_dropped = None
+
+def _load_evdev():
+    global ecodes, _dispatch, _slot_codes, _syn_report, _syn_dropped
+    if ecodes is not None:
+        return
+    from evdev import ecodes as evdev_ecodes
+    _slot_codes = (evdev_ecodes.BTN_TR2, evdev_ecodes.BTN_NORTH, evdev_ecodes.BTN_SOUTH,
+                   evdev_ecodes.BTN_WEST, evdev_ecodes.BTN_EAST,
+                   evdev_ecodes.ABS_RX, evdev_ecodes.ABS_RY)
+    _dispatch = {}
+    for slot in KEY_SLOTS:
+        _dispatch[(evdev_ecodes.EV_KEY, _slot_codes[slot])] = slot
+    for slot in ABS_SLOTS:
+        _dispatch[(evdev_ecodes.EV_ABS, _slot_codes[slot])] = slot
+    _syn_report = (evdev_ecodes.EV_SYN, evdev_ecodes.SYN_REPORT)
+    _syn_dropped = (evdev_ecodes.EV_SYN, evdev_ecodes.SYN_DROPPED)
+    ecodes = evdev_ecodes
+
+_default_discovery = None
+_default_response = None
+
+def get_default_response():
+    """shared StickResponse, built once instead of on every reconnect"""
+    global _default_response
+    if _default_response is None:
+        _default_response = StickResponse()
+    return _default_response
+
+def get_default_discovery():
+    """shared ControllerDiscovery for the Joy-Con (R)"""
+    global _default_discovery
+    if _default_discovery is None:
+        _default_discovery = ControllerDiscovery("Joy-Con (R)")
+    return _default_discovery
 
 class BluetoothController:
-    def __init__(self):
-        """initialize bluetooth controller"""
-        # find controller
-        devices = [evdev.InputDevice(path) for path in evdev.list_devices()]
-        
-        self.controller = None
-        for device in devices:
-            device_name = device.name.lower()
-            if "joy-con (r)" == device_name:
-                self.controller = device
-                print(f"Found controller: {device.name}")
-                break
-        
-        if not self.controller:
-            print("WARNING: No controller found!")
-            print("Available devices:")
-            for device in devices:
-                print(f"  - {device.name}")
-            raise Exception("No Bluetooth controller found!")
+    def __init__(self, device=None, record_path=None, discovery=None, raw=False,
+                 response=None):
+        """
+        initialize bluetooth controller
+
+        Args:
+            device: input device to read instead of searching evdev
+                    (e.g. event_recording.ReplayDevice)
+            record_path: append the raw event stream to this file
+            discovery: ControllerDiscovery to find the device with
+                       (default = one shared instance, so its cache survives reconnects)
+            raw: read input_event records straight from the device's file
+                 descriptor (raw_input.RawEventReader) instead of evdev's read()
+            response: StickResponse (dead zone, calibration, expo) for the joystick
+                      (default = 10% radial dead zone, linear)
+        """
+        _load_evdev()
+        self.controller = device
+        if self.controller is None:
+            self.controller = self._find_controller(discovery or get_default_discovery())
+
+        if record_path:
+            self.controller = RecordingDevice(self.controller, record_path)
+            print(f"Recording controller events to {record_path}")
+
+        self.raw_reader = None
+        if raw:
+            recorder = self.controller.recorder if record_path else None
+            self.raw_reader = RawEventReader(self.controller.fileno(), recorder=recorder)
         
         # initialize input values
         self.joystick_x = 0   # left/right turn (-100 to 100)
@@ -39,14 +101,46 @@ class BluetoothController:
 
         self.bottom_trigger = False   # trigger at top of joy con
         
-        # joystick dead zone (ignore small movements near center)
-        self.dead_zone = 10
+        # radial dead zone, calibration and expo, precompiled into lookup tables
+        self.response = response if response is not None else get_default_response()
 
         # track if controller sent events
         self.received_events_this_frame = False
 
+        # raw values by slot: events update the pending frame, SYN_REPORT
+        # commits it, and only committed state reaches the fields above
+        self._pending = [0] * len(_slot_codes)
+        self._committed = [0] * len(_slot_codes)
+        self._dropping = False
+        self.frames = 0
+        self.resyncs = 0
+        self.events = 0
+        # start from the live state, e.g. trigger already held at connect
+        self._resync()
+
+        # kernel timestamp / read time of the oldest input change not yet
+        # handed to the control loop (for latency measurement)
+        self.input_kernel_time = None
+        self.input_read_time = None
+
+    def _find_controller(self, discovery):
+        """open only the Joy-Con's event node (see device_discovery)"""
+        device = discovery.open()
+        if device is not None:
+            print(f"Found controller: {device.name}")
+            return device
+        
+        print("WARNING: No controller found!")
+        print("Available devices:")
+        for name in discovery.available_names():
+            print(f"  - {name}")
+        raise Exception("No Bluetooth controller found!")
+
     def reset_all_inputs(self):
         """Clear all input states - call when controller disconnects"""
+        self._pending[:] = [0] * len(self._pending)
+        self._committed[:] = self._pending
+        self._dropping = False
         self.joystick_x = 0
         self.joystick_y = 0
         self.button_x = False
@@ -59,61 +153,132 @@ class BluetoothController:
         """
         read controller events and update values
         call this repeatedly in your main loop
+
+        events are collected into a pending frame that is committed on
+        SYN_REPORT; a partial frame waits for the next read, and when several
+        frames arrive at once only the last one is applied
         """
         self.received_events_this_frame = False
+        state_before = self._input_state()
+        first_event_time = None
+        pending = self._pending
+        dispatch = _dispatch
+        committed = False
+        count = 0
 
         try:
-            for event in self.controller.read():
-                self.received_events_this_frame = True
-                    
-                if event.type == ecodes.EV_KEY:
-                    if event.code == ecodes.BTN_TR2:
-                        self.bottom_trigger = (event.value == 1)
-                        
-                        if not self.bottom_trigger:
-                                self.joystick_x = 0
-                                self.joystick_y = 0
-                                self.button_x = False
-                                self.button_b = False
-                                self.button_a = False # can be taken out depending on functionality of button
-                                self.button_y = False # ^^
-                        
-                    elif self.bottom_trigger:
-                    # listening for button press
-                        if event.code == ecodes.BTN_NORTH:
-                            self.button_x = (event.value == 1)
-                        elif event.code == ecodes.BTN_SOUTH:
-                            self.button_b = (event.value == 1)
-                        elif event.code == ecodes.BTN_WEST:
-                            self.button_y = (event.value == 1)
-                        elif event.code == ecodes.BTN_EAST:
-                            self.button_a = (event.value == 1) 
-                        
-                if event.type == ecodes.EV_ABS and self.bottom_trigger:
-                    # listening for joystick movement
-                    if event.code == ecodes.ABS_RX:
-                        # x-axis (left/right turn)
-                        raw_value = round(event.value * 100 / 32767) # this is using (-32767,32767) range for controller
-                        # apply dead zone
-                        if abs(raw_value) < self.dead_zone:
-                            self.joystick_x = 0
-                        else:
-                            self.joystick_x = raw_value
-                    
-                    elif event.code == ecodes.ABS_RY:
-                        # y-axis (forward/backward)
-                        raw_value = round(event.value * 100 / 32767)
-                        # apply dead zone
-                        if abs(raw_value) < self.dead_zone:
-                            self.joystick_y = 0
-                        else:
-                            self.joystick_y = -raw_value 
-
-                
-        
+            if self.raw_reader is not None:
+                for sec, usec, event_type, code, value in self.raw_reader.read():
+                    count += 1
+                    if first_event_time is None:
+                        first_event_time = sec + usec / 1000000.0
+                    key = (event_type, code)
+                    slot = dispatch.get(key)
+                    if slot is not None:
+                        pending[slot] = value
+                    elif self._sync(key):
+                        committed = True
+            else:
+                for event in self.controller.read():
+                    count += 1
+                    if first_event_time is None:
+                        first_event_time = event.timestamp()
+                    key = (event.type, event.code)
+                    slot = dispatch.get(key)
+                    if slot is not None:
+                        pending[slot] = event.value
+                    elif self._sync(key):
+                        committed = True
+
         except BlockingIOError:
             # no events available right now
             pass
+
+        self.events += count
+        self.received_events_this_frame = first_event_time is not None
+
+        if committed:
+            self._apply_frame()
+
+        if (first_event_time is not None and self.input_kernel_time is None
+                and self._input_state() != state_before):
+            self.input_kernel_time = first_event_time
+            self.input_read_time = time.time()
+
+    def _sync(self, key):
+        """
+        handle an event that isn't in the dispatch table
+
+        Returns:
+            True if it committed the pending frame
+        """
+        if key == _syn_report:
+            if self._dropping:
+                # events up to this report were lost - re-read the device state
+                self._dropping = False
+                self._resync()
+                self.resyncs += 1
+            self._committed[:] = self._pending
+            self.frames += 1
+            return True
+        if key == _syn_dropped:
+            self._dropping = True
+        return False
+
+    def _resync(self):
+        """reload the pending frame from the device's current key/axis state"""
+        device = self.controller
+        pending = self._pending
+        try:
+            active = set(device.active_keys())
+            for slot in KEY_SLOTS:
+                pending[slot] = 1 if _slot_codes[slot] in active else 0
+            for slot in ABS_SLOTS:
+                pending[slot] = device.absinfo(_slot_codes[slot]).value
+        except (AttributeError, OSError):
+            # replayed streams have no live state - keep what was pending
+            pass
+
+    def _apply_frame(self):
+        """update the public input fields from the last committed frame"""
+        frame = self._committed
+        self.bottom_trigger = frame[TRIGGER] == 1
+        if not self.bottom_trigger:
+            # trigger released - drop all commands
+            self.joystick_x = 0
+            self.joystick_y = 0
+            self.button_x = False
+            self.button_b = False
+            self.button_a = False # can be taken out depending on functionality of button
+            self.button_y = False # ^^
+            return
+
+        # listening for button press
+        self.button_x = frame[NORTH] == 1
+        self.button_b = frame[SOUTH] == 1
+        self.button_y = frame[WEST] == 1
+        self.button_a = frame[EAST] == 1
+
+        # joystick, raw (-32767,32767) range through the response tables
+        self.joystick_x, self.joystick_y = self.response.apply(frame[STICK_X], frame[STICK_Y])
+
+    def _input_state(self):
+        return (self.joystick_x, self.joystick_y, self.button_x, self.button_b,
+                self.button_y, self.button_a, self.bottom_trigger)
+
+    def take_input_stamp(self):
+        """
+        get and clear the timing of the oldest unhandled input change
+
+        Returns:
+            (kernel_time, read_time) in time.time() seconds, or None if no change
+        """
+        if self.input_kernel_time is None:
+            return None
+        stamp = (self.input_kernel_time, self.input_read_time)
+        self.input_kernel_time = None
+        self.input_read_time = None
+        return stamp
     
     def get_drive_values(self):
         """
@@ -155,6 +320,17 @@ class BluetoothController:
             return None
     
 
+    def close(self):
+        """close the device and the --record file once the controller has dropped"""
+        try:
+            self.controller.close()
+        except OSError:
+            pass
+
+    def fileno(self):
+        """file descriptor of the controller device (for select/asyncio readers)"""
+        return self.controller.fileno()
+
     def is_connected(self):
         """check if controller is still connected"""
         try:
@@ -0,0 +1,187 @@
+"""
+controller discovery without opening every input device
+parses /proc/bus/input/devices to find the Joy-Con's event node by name,
+and remembers it by name, uniq (bluetooth MAC) and phys so a reconnect
+goes straight to the right node
+"""
+import os
+
+PROC_INPUT_DEVICES = "/proc/bus/input/devices"
+
+
+class InputDeviceInfo:
+    """one block of /proc/bus/input/devices"""
+    __slots__ = ("name", "phys", "uniq", "sysfs", "handlers")
+
+    def __init__(self):
+        self.name = ""
+        self.phys = ""
+        self.uniq = ""
+        self.sysfs = ""
+        self.handlers = []
+
+    def event_handler(self):
+        """name of the evdev handler (e.g. "event3"), or None"""
+        for handler in self.handlers:
+            if handler.startswith("event"):
+                return handler
+        return None
+
+
+def parse_input_devices(text):
+    """
+    parse the contents of /proc/bus/input/devices
+
+    Returns:
+        list of InputDeviceInfo
+    """
+    devices = []
+    info = None
+    for line in text.splitlines():
+        if not line.strip():
+            info = None
+            continue
+        if info is None:
+            info = InputDeviceInfo()
+            devices.append(info)
+
+        kind, _, rest = line.partition(": ")
+        key, _, value = rest.partition("=")
+        if kind == "N" and key == "Name":
+            info.name = value.strip('"')
+        elif kind == "P" and key == "Phys":
+            info.phys = value
+        elif kind == "U" and key == "Uniq":
+            info.uniq = value
+        elif kind == "S" and key == "Sysfs":
+            info.sysfs = value
+        elif kind == "H" and key == "Handlers":
+            info.handlers = value.split()
+    return devices
+
+
+class ControllerDiscovery:
+    def __init__(self, name="Joy-Con (R)", proc_path=PROC_INPUT_DEVICES,
+                 dev_input_dir="/dev/input", open_device=None):
+        """
+        initialize discovery
+
+        Args:
+            name: exact device name to look for (case-insensitive)
+            proc_path: input device list to parse
+            dev_input_dir: directory holding the event nodes
+            open_device: function(path) -> device, default evdev.InputDevice
+        """
+        self.name = name.lower()
+        self.proc_path = proc_path
+        self.dev_input_dir = dev_input_dir
+        self.open_device = open_device
+
+        # last known node per identity
+        self.cache = {}     # ("name"|"uniq"|"phys", value) -> /dev/input/eventN
+        self.uniq = None    # bluetooth MAC of the last controller found
+        self.phys = None
+
+        self.proc_scans = 0
+        self.cache_hits = 0
+
+    def list_devices(self):
+        """
+        Returns:
+            list of InputDeviceInfo (empty if the list can't be read)
+        """
+        try:
+            with open(self.proc_path) as f:
+                text = f.read()
+        except OSError:
+            return []
+        self.proc_scans += 1
+        return parse_input_devices(text)
+
+    def find(self):
+        """
+        find the controller's event node without opening anything
+
+        Returns:
+            (path, InputDeviceInfo), or (None, None) if not present
+        """
+        matches = [info for info in self.list_devices()
+                   if info.name.lower() == self.name and info.event_handler()]
+        if not matches:
+            return None, None
+
+        # prefer the exact controller we had before, then the same port
+        best = matches[0]
+        for info in matches:
+            if self.uniq and info.uniq == self.uniq:
+                best = info
+                break
+            if self.phys and info.phys == self.phys:
+                best = info
+
+        path = os.path.join(self.dev_input_dir, best.event_handler())
+        self._remember(path, best)
+        return path, best
+
+    def _remember(self, path, info):
+        self.cache[("name", self.name)] = path
+        if info.uniq:
+            self.uniq = info.uniq
+            self.cache[("uniq", info.uniq)] = path
+        if info.phys:
+            self.phys = info.phys
+            self.cache[("phys", info.phys)] = path
+
+    def _cached_path(self):
+        for key in (("uniq", self.uniq), ("phys", self.phys), ("name", self.name)):
+            path = self.cache.get(key)
+            if path is not None:
+                return path
+        return None
+
+    def _open(self, path):
+        if self.open_device is not None:
+            return self.open_device(path)
+        import evdev
+        return evdev.InputDevice(path)
+
+    def _matches(self, device):
+        if device.name.lower() != self.name:
+            return False
+        uniq = getattr(device, "uniq", "")
+        return not (self.uniq and uniq and uniq != self.uniq)
+
+    def open(self):
+        """
+        open only the controller's event node
+
+        Returns:
+            the opened device, or None if the controller isn't present
+        """
+        # reconnect fast path: the cached node still belongs to our controller
+        path = self._cached_path()
+        if path is not None and os.path.exists(path):
+            device = self._try_open(path)
+            if device is not None:
+                self.cache_hits += 1
+                return device
+
+        path, _ = self.find()
+        if path is None:
+            return None
+        return self._try_open(path)
+
+    def _try_open(self, path):
+        try:
+            device = self._open(path)
+        except OSError:
+            return None
+        if not self._matches(device):
+            # node number was reused by another device
+            device.close()
+            return None
+        return device
+
+    def available_names(self):
+        """names of all input devices (for error messages)"""
+        return [info.name for info in self.list_devices()]
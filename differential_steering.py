@@ -3,8 +3,10 @@ differential steering algorithm
 converts joystick X/Y input into left/right motor speeds
 """
 
+from steering_table import SteeringTable
+
 class DifferentialSteering:
-    def __init__(self, pivot_y_limit=25):
+    def __init__(self, pivot_y_limit=25, use_table=True, table_cache_dir=None):
         """
         initialize differential steering
         
@@ -12,11 +14,25 @@ class DifferentialSteering:
             pivot_y_limit: threshold for pivot turning (0-100)
                           higher = more range for pivot turns
                           default 25 = pivot when joystick is in center 25% range
+            use_table: precompute a 201x201 lookup table so compute_motors is one index
+            table_cache_dir: directory to cache the table on disk (None = build in memory)
         """
         self.pivot_y_limit = pivot_y_limit
         self.left_motor = 0
         self.right_motor = 0
         self.compute_range = 100
+
+        self.table = None
+        if use_table:
+            self.table = SteeringTable.load_or_build(self._compute_motors_direct,
+                                                     self.table_key(), table_cache_dir)
+            # building the table leaves the last grid point in left/right_motor
+            self.left_motor = 0
+            self.right_motor = 0
+
+    def table_key(self):
+        """cache key for this mapper's lookup table"""
+        return f"differential_pivot{self.pivot_y_limit}"
     
     def compute_motors(self, x_value, y_value):
         """
@@ -33,6 +49,16 @@ class DifferentialSteering:
         Returns:
             (left_motor, right_motor): motor speeds in range -100 to 100
         """
+        pair = self.table.lookup(x_value, y_value) if self.table else None
+        if pair is None:
+            # off-grid input (float or out of range) - compute directly
+            return self._compute_motors_direct(x_value, y_value)
+
+        self.left_motor, self.right_motor = pair
+        return pair
+
+    def _compute_motors_direct(self, x_value, y_value):
+        """compute motor speeds without the lookup table (used to build it)"""
         # calculate drive turn output due to X input
         if y_value >= 0:
             # forward
@@ -70,6 +96,53 @@ class DifferentialSteering:
         
         return self.left_motor, self.right_motor
     
+    def compute_motors_batch(self, xs, ys):
+        """
+        compute left and right motor speeds for many joystick positions at once
+
+        matches compute_motors element for element (same float operations in the
+        same order, truncated the same way), so results are bit-identical
+
+        Args:
+            xs: array of turn inputs (-100 to 100)
+            ys: array of drive inputs (-100 to 100), same shape as xs
+
+        Returns:
+            (left, right): int64 numpy arrays of motor speeds
+        """
+        import numpy as np  # only needed for offline analysis, not on the robot
+
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+
+        forward = ys >= 0
+        x_positive = xs >= 0
+        full = self.compute_range
+
+        # calculate drive turn output due to X input
+        mot_premix_l = np.where(forward,
+                                np.where(x_positive, full, full + xs),
+                                np.where(x_positive, full - xs, full))
+        mot_premix_r = np.where(forward,
+                                np.where(x_positive, full - xs, full),
+                                np.where(x_positive, full, full + xs))
+
+        # scale drive output due to y input
+        mot_premix_l = mot_premix_l * ys / self.compute_range
+        mot_premix_r = mot_premix_r * ys / self.compute_range
+
+        # calculate pivot
+        piv_speed = xs
+
+        # determine pivot blending based on y position
+        piv_scale = np.where(np.abs(ys) > self.pivot_y_limit,
+                             0.0, 1.0 - np.abs(ys) / self.pivot_y_limit)
+
+        # mix of drive and pivot
+        left = np.trunc((1.0 - piv_scale) * mot_premix_l + piv_scale * piv_speed)
+        right = np.trunc((1.0 - piv_scale) * mot_premix_r + piv_scale * (-piv_speed))
+        return left.astype(np.int64), right.astype(np.int64)
+    
     def get_left_motor(self):
         """get last computed left motor speed"""
         return self.left_motor
@@ -3,18 +3,34 @@
 Converts joystick into 8 discrete directions based on x/y thresholds
 """
 
+from steering_table import SteeringTable
+
 class EightDirectionJoystick:
-    def __init__(self, pivot_y_limit=25):
+    def __init__(self, pivot_y_limit=25, use_table=True, table_cache_dir=None):
         """
         Initialize 8-direction joystick mapper
         
         Args:
             pivot_y_limit: Not used in this version, kept for compatibility
+            use_table: precompute a 201x201 lookup table so compute_motors is one index
+            table_cache_dir: directory to cache the table on disk (None = build in memory)
         """
         self.pivot_y_limit = pivot_y_limit
         self.left_motor = 0
         self.right_motor = 0
         self.compute_range = 100
+
+        self.table = None
+        if use_table:
+            self.table = SteeringTable.load_or_build(self._compute_motors_direct,
+                                                     self.table_key(), table_cache_dir)
+            # building the table leaves the last grid point in left/right_motor
+            self.left_motor = 0
+            self.right_motor = 0
+
+    def table_key(self):
+        """cache key for this mapper's lookup table"""
+        return f"eight_direction_pivot{self.pivot_y_limit}"
     
     def compute_motors(self, x_value, y_value):
         """
@@ -31,6 +47,16 @@ class EightDirectionJoystick:
         Returns:
             (left_motor, right_motor): motor speeds in range -100 to 100
         """
+        pair = self.table.lookup(x_value, y_value) if self.table else None
+        if pair is None:
+            # off-grid input (float or out of range) - compute directly
+            return self._compute_motors_direct(x_value, y_value)
+
+        self.left_motor, self.right_motor = pair
+        return pair
+
+    def _compute_motors_direct(self, x_value, y_value):
+        """compute motor speeds without the lookup table (used to build it)"""
         if x_value == 0 and y_value == 0:
             self.left_motor = 0
             self.right_motor = 0
@@ -99,6 +125,56 @@ class EightDirectionJoystick:
         
         return self.left_motor, self.right_motor
     
+    def compute_motors_batch(self, xs, ys):
+        """
+        compute left and right motor speeds for many joystick positions at once
+
+        matches compute_motors element for element (same float operations in the
+        same order, truncated the same way), so results are bit-identical
+
+        Args:
+            xs: array of turn inputs (-100 to 100)
+            ys: array of drive inputs (-100 to 100), same shape as xs
+
+        Returns:
+            (left, right): int64 numpy arrays of motor speeds
+        """
+        import numpy as np  # only needed for offline analysis, not on the robot
+
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+
+        # calculate magnitude for speed (pythagorean theorem)
+        magnitude = np.trunc(np.sqrt(xs.astype(np.float64) ** 2 + ys.astype(np.float64) ** 2))
+        magnitude = np.minimum(magnitude, self.compute_range).astype(np.int64)
+
+        # threshold for diagonal detection (tan(22.5°) ≈ 0.414)
+        threshold = 0.4142135623730950488016887242097
+
+        abs_x = np.abs(xs)
+        abs_y = np.abs(ys)
+        vertical = abs_x < abs_y * threshold
+        horizontal = abs_y < abs_x * threshold
+        forward = ys > 0
+        right_side = xs > 0
+
+        # sign of each motor per section, same branch order as compute_motors
+        left_sign = np.select(
+            [vertical & forward, vertical, right_side & horizontal, right_side & forward,
+             right_side, horizontal, forward],
+            [1, -1, 1, 1, -1, -1, 0],
+            default=0)
+        right_sign = np.select(
+            [vertical & forward, vertical, right_side & horizontal, right_side,
+             horizontal, forward],
+            [1, -1, -1, 0, 1, 1],
+            default=-1)
+
+        centered = (xs == 0) & (ys == 0)
+        left = np.where(centered, 0, left_sign * magnitude)
+        right = np.where(centered, 0, right_sign * magnitude)
+        return left, right
+    
     def get_left_motor(self):
         """get last computed left motor speed"""
         return self.left_motor
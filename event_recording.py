@@ -0,0 +1,265 @@
+"""
+controller event recording and replay
+records the raw evdev stream to a compact binary file, and plays it back
+through a device object that plugs in where evdev.InputDevice is used
+
+file format: 8 byte header (b"JCEV" + u32 version), then one 20 byte
+little-endian record per event: sec (i64), usec (i32), type (u16),
+code (u16), value (i32) - the kernel timestamp and event as read
+"""
+import errno
+import os
+import struct
+import threading
+import time
+
+MAGIC = b"JCEV"
+VERSION = 1
+HEADER = struct.Struct("<4sI")
+RECORD = struct.Struct("<qiHHi")
+
+
+class ReplayFinished(Exception):
+    """raised when a replay source is asked to reconnect after the file ran out"""
+
+
+class ReplayEvent:
+    """minimal stand-in for evdev.InputEvent"""
+    __slots__ = ("sec", "usec", "type", "code", "value")
+
+    def __init__(self, sec, usec, event_type, code, value):
+        self.sec = sec
+        self.usec = usec
+        self.type = event_type
+        self.code = code
+        self.value = value
+
+    def timestamp(self):
+        return self.sec + self.usec / 1000000.0
+
+
+class EventRecorder:
+    def __init__(self, path):
+        """
+        open a recording file, appending if it already has events
+
+        Args:
+            path: file to write
+        """
+        self.path = path
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.count = 0
+
+    def write(self, event):
+        self.write_values(event.sec, event.usec, event.type, event.code, event.value)
+
+    def write_values(self, sec, usec, event_type, code, value):
+        self.file.write(RECORD.pack(sec, usec, event_type, code, value))
+        self.count += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+class RecordingDevice:
+    """wraps an evdev.InputDevice and records everything read from it"""
+
+    def __init__(self, device, path):
+        self.device = device
+        self.recorder = EventRecorder(path)
+        self.name = device.name
+        self.path = device.path
+
+    def read(self):
+        recorder = self.recorder
+        try:
+            for event in self.device.read():
+                recorder.write(event)
+                yield event
+        finally:
+            # one flush per read batch, not per event
+            recorder.flush()
+
+    def fileno(self):
+        return self.device.fileno()
+
+    def active_keys(self):
+        return self.device.active_keys()
+
+    def absinfo(self, code):
+        return self.device.absinfo(code)
+
+    def close(self):
+        try:
+            self.recorder.close()
+        finally:
+            self.device.close()
+
+
+def load_events(path):
+    """
+    read a recording file
+
+    Returns:
+        list of (sec, usec, type, code, value) tuples
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: not an event recording (too short)")
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not an event recording (bad header)")
+    body = memoryview(data)[HEADER.size:]
+    usable = len(body) - len(body) % RECORD.size
+    return list(RECORD.iter_unpack(body[:usable]))
+
+
+class ReplayDevice:
+    """
+    plays a recording back like an evdev.InputDevice
+
+    read() yields the events that are due and raises BlockingIOError when
+    none are, fileno() becomes readable when the next event is due, and once
+    the file runs out read() raises ENODEV the way a dropped controller does
+    """
+    def __init__(self, path, realtime=True, keep_timestamps=False, name="Joy-Con (R)",
+                 batch_size=64):
+        """
+        Args:
+            path: recording file
+            realtime: deliver events with their recorded spacing,
+                      False = as fast as they are read
+            keep_timestamps: keep the recorded kernel timestamps instead of
+                             rebasing them onto the replay's wall clock
+            name: device name reported to BluetoothController
+            batch_size: max events per read() when not realtime
+        """
+        self.path = path
+        self.name = name
+        self.realtime = realtime
+        self.keep_timestamps = keep_timestamps
+        self.batch_size = batch_size
+
+        self.events = load_events(path)
+        self.position = 0
+        self.closed = False
+
+        first = self.events[0] if self.events else (0, 0, 0, 0, 0)
+        self.first_time = first[0] + first[1] / 1000000.0
+        self.start_monotonic = None
+        self.start_wall = None
+
+        # readiness pipe - one byte in it means "read() has something to do"
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+        self._signalled = False
+        self._timer = None
+        self._lock = threading.Lock()
+        self._signal()
+
+    def fileno(self):
+        if self.closed:
+            raise OSError(errno.EBADF, "replay device closed")
+        return self._read_fd
+
+    def _offset(self, index):
+        sec, usec = self.events[index][0], self.events[index][1]
+        return sec + usec / 1000000.0 - self.first_time
+
+    def _signal(self):
+        with self._lock:
+            if self._signalled or self.closed:
+                return
+            self._signalled = True
+            try:
+                os.write(self._write_fd, b"\0")
+            except OSError:
+                pass
+
+    def _drain(self):
+        with self._lock:
+            self._signalled = False
+            try:
+                os.read(self._read_fd, 64)
+            except (BlockingIOError, OSError):
+                pass
+
+    def _arm(self, now):
+        """make fileno() readable when the next event is due"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.position >= len(self.events) or not self.realtime:
+            # more to read right away, or end of file (reader then gets ENODEV)
+            self._signal()
+            return
+        delay = self._offset(self.position) - (now - self.start_monotonic)
+        if delay <= 0:
+            self._signal()
+        else:
+            self._timer = threading.Timer(delay, self._signal)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def read(self):
+        """yield events that are due, like evdev.InputDevice.read()"""
+        if self.closed:
+            raise OSError(errno.EBADF, "replay device closed")
+        self._drain()
+
+        now = time.monotonic()
+        if self.start_monotonic is None:
+            self.start_monotonic = now
+            self.start_wall = time.time()
+
+        if self.position >= len(self.events):
+            raise OSError(errno.ENODEV, "replay finished")
+
+        end = self.position
+        if self.realtime:
+            elapsed = now - self.start_monotonic
+            while end < len(self.events) and self._offset(end) <= elapsed:
+                end += 1
+        else:
+            end = min(self.position + self.batch_size, len(self.events))
+
+        if end == self.position:
+            self._arm(now)
+            raise BlockingIOError(errno.EAGAIN, "no replay events due")
+
+        batch = self.events[self.position:end]
+        self.position = end
+        self._arm(now)
+        return self._generate(batch)
+
+    def _generate(self, batch):
+        wall = time.time()
+        for sec, usec, event_type, code, value in batch:
+            if not self.keep_timestamps:
+                if self.realtime:
+                    stamp = self.start_wall + sec + usec / 1000000.0 - self.first_time
+                else:
+                    stamp = wall
+                sec = int(stamp)
+                usec = int((stamp - sec) * 1000000)
+            yield ReplayEvent(sec, usec, event_type, code, value)
+
+    def finished(self):
+        return self.position >= len(self.events)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+        os.close(self._read_fd)
+        os.close(self._write_fd)
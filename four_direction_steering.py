@@ -2,18 +2,34 @@
 4-direction joystick
 """
 
+from steering_table import SteeringTable
+
 class FourDirectionJoystick:
-    def __init__(self, pivot_y_limit=25):
+    def __init__(self, pivot_y_limit=25, use_table=True, table_cache_dir=None):
         """
         initialize 4-direction joystick mapper
         
         Args:
             pivot_y_limit: not used in this version, kept for compatibility
+            use_table: precompute a 201x201 lookup table so compute_motors is one index
+            table_cache_dir: directory to cache the table on disk (None = build in memory)
         """
         self.pivot_y_limit = pivot_y_limit
         self.left_motor = 0
         self.right_motor = 0
         self.compute_range = 100
+
+        self.table = None
+        if use_table:
+            self.table = SteeringTable.load_or_build(self._compute_motors_direct,
+                                                     self.table_key(), table_cache_dir)
+            # building the table leaves the last grid point in left/right_motor
+            self.left_motor = 0
+            self.right_motor = 0
+
+    def table_key(self):
+        """cache key for this mapper's lookup table"""
+        return f"four_direction_pivot{self.pivot_y_limit}"
     
     def compute_motors(self, x_value, y_value):
         """
@@ -30,6 +46,16 @@ class FourDirectionJoystick:
         Returns:
             (left_motor, right_motor): motor speeds in range -100 to 100
         """
+        pair = self.table.lookup(x_value, y_value) if self.table else None
+        if pair is None:
+            # off-grid input (float or out of range) - compute directly
+            return self._compute_motors_direct(x_value, y_value)
+
+        self.left_motor, self.right_motor = pair
+        return pair
+
+    def _compute_motors_direct(self, x_value, y_value):
+        """compute motor speeds without the lookup table (used to build it)"""
         if x_value == 0 and y_value == 0:
             self.left_motor = 0
             self.right_motor = 0
@@ -67,6 +93,39 @@ class FourDirectionJoystick:
         
         return self.left_motor, self.right_motor
     
+    def compute_motors_batch(self, xs, ys):
+        """
+        compute left and right motor speeds for many joystick positions at once
+
+        matches compute_motors element for element (same float operations in the
+        same order, truncated the same way), so results are bit-identical
+
+        Args:
+            xs: array of turn inputs (-100 to 100)
+            ys: array of drive inputs (-100 to 100), same shape as xs
+
+        Returns:
+            (left, right): int64 numpy arrays of motor speeds
+        """
+        import numpy as np  # only needed for offline analysis, not on the robot
+
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+
+        # calculate magnitude for speed (pythagorean theorem)
+        magnitude = np.trunc(np.sqrt(xs.astype(np.float64) ** 2 + ys.astype(np.float64) ** 2))
+        magnitude = np.minimum(magnitude, self.compute_range).astype(np.int64)
+
+        # y-axis dominant -> forward/backward, otherwise right/left pivot
+        y_dominant = np.abs(ys) > np.abs(xs)
+        left_sign = np.where(y_dominant, np.where(ys > 0, 1, -1), np.where(xs > 0, 1, -1))
+        right_sign = np.where(y_dominant, np.where(ys > 0, 1, -1), np.where(xs > 0, -1, 1))
+
+        centered = (xs == 0) & (ys == 0)
+        left = np.where(centered, 0, left_sign * magnitude)
+        right = np.where(centered, 0, right_sign * magnitude)
+        return left, right
+    
     def get_left_motor(self):
         """get last computed left motor speed"""
         return self.left_motor
@@ -0,0 +1,464 @@
+"""
+gpio backends
+motor_driver, buzzer and robot talk to a backend instead of importing
+RPi.GPIO directly, so the stack also runs off the Pi against a simulator
+
+every backend provides:
+    setup(pin)                  configure pin as output (BCM numbering)
+    output(pin, value)          drive pin LOW/HIGH
+    PWM(pin, frequency)         object with start / ChangeDutyCycle /
+                                ChangeFrequency / stop, same as RPi.GPIO
+    cleanup()                   release all pins
+"""
+import array
+import mmap
+import os
+import threading
+import time
+
+LOW = 0
+HIGH = 1
+
+
+class RPiGPIOBackend:
+    """RPi.GPIO software PWM (the original behaviour)"""
+    name = "rpi"
+
+    def __init__(self):
+        # imported here so the simulator works on machines without RPi.GPIO
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        GPIO.setmode(GPIO.BCM)
+
+    def setup(self, pin):
+        self.GPIO.setup(pin, self.GPIO.OUT)
+
+    def output(self, pin, value):
+        self.GPIO.output(pin, self.GPIO.HIGH if value else self.GPIO.LOW)
+
+    def PWM(self, pin, frequency):
+        return self.GPIO.PWM(pin, frequency)
+
+    def cleanup(self):
+        self.GPIO.cleanup()
+
+
+# BCM pin -> (pwmchip, channel) with dtoverlay=pwm-2chan (GPIO18 = PWM0, GPIO19 = PWM1)
+DEFAULT_PWM_CHANNELS = {18: (0, 0), 19: (0, 1)}
+SYSFS_PWM_ROOT = "/sys/class/pwm"
+
+
+def parse_pwm_channels(text):
+    """
+    Args:
+        text: "pin=chip:channel,..." e.g. "18=0:0,19=0:1"
+
+    Returns:
+        dict of pin -> (chip, channel)
+    """
+    channels = {}
+    for item in text.split(","):
+        pin, _, target = item.partition("=")
+        chip, _, channel = target.partition(":")
+        channels[int(pin)] = (int(chip), int(channel))
+    return channels
+
+
+class SysfsPWM:
+    """
+    one kernel PWM channel, same interface as RPi.GPIO's PWM object
+    period/duty_cycle/enable stay open; every change is a single pwrite
+    """
+
+    def __init__(self, path, frequency):
+        """
+        Args:
+            path: exported channel directory, e.g. /sys/class/pwm/pwmchip0/pwm0
+            frequency: Hz
+        """
+        self.path = path
+        flags = os.O_WRONLY | os.O_CLOEXEC
+        self._period_fd = os.open(os.path.join(path, "period"), flags)
+        self._duty_fd = os.open(os.path.join(path, "duty_cycle"), flags)
+        self._enable_fd = os.open(os.path.join(path, "enable"), flags)
+        self.period_ns = 0
+        self.duty_ns = 0
+        self.duty = 0.0
+        self.enabled = False
+        self.frequency = frequency
+
+    def _write(self, fd, value):
+        os.pwrite(fd, b"%d\n" % value, 0)
+
+    def _write_duty_ns(self, duty_ns):
+        if duty_ns != self.duty_ns:
+            self._write(self._duty_fd, duty_ns)
+            self.duty_ns = duty_ns
+
+    def _set_period(self, period_ns):
+        # the kernel rejects a period shorter than the current duty cycle
+        if self.duty_ns > period_ns:
+            self._write_duty_ns(0)
+        self._write(self._period_fd, period_ns)
+        self.period_ns = period_ns
+
+    def start(self, duty):
+        self._set_period(round(1e9 / self.frequency))
+        self.ChangeDutyCycle(duty)
+        if not self.enabled:
+            self._write(self._enable_fd, 1)
+            self.enabled = True
+
+    def ChangeDutyCycle(self, duty):
+        self.duty = duty
+        self._write_duty_ns(round(self.period_ns * duty / 100))
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+        if self.period_ns:
+            self._set_period(round(1e9 / frequency))
+            self.ChangeDutyCycle(self.duty)
+
+    def stop(self):
+        self._write_duty_ns(0)
+        if self.enabled:
+            self._write(self._enable_fd, 0)
+            self.enabled = False
+
+    def close(self):
+        self.stop()
+        for fd in (self._period_fd, self._duty_fd, self._enable_fd):
+            os.close(fd)
+        self._period_fd = self._duty_fd = self._enable_fd = None
+
+
+class SysfsPWMBackend:
+    """
+    kernel hardware PWM through /sys/class/pwm for pins that have a channel,
+    software PWM (RPi.GPIO) for the rest
+
+    a hardware pin is muxed to its PWM function, so output() on it sets the
+    duty to 0% / 100% instead of touching the GPIO
+    """
+    name = "sysfs"
+
+    def __init__(self, channels=None, pwm_root=SYSFS_PWM_ROOT, fallback=None,
+                 export_timeout=1.0):
+        """
+        Args:
+            channels: dict of BCM pin -> (pwmchip, channel), default DEFAULT_PWM_CHANNELS
+            pwm_root: sysfs PWM class directory (a fake tree for testing)
+            fallback: backend class for pins without a channel (default RPiGPIOBackend),
+                      created on first use
+            export_timeout: seconds to wait for an exported channel to appear
+        """
+        self.channels = dict(DEFAULT_PWM_CHANNELS if channels is None else channels)
+        self.pwm_root = pwm_root
+        self.fallback_class = fallback if fallback is not None else RPiGPIOBackend
+        self.export_timeout = export_timeout
+        self.fallback = None
+        self.exported = {}   # pin -> channel directory
+        self.pwms = {}       # pin -> SysfsPWM
+
+    def _software(self):
+        if self.fallback is None:
+            self.fallback = self.fallback_class()
+        return self.fallback
+
+    def _export(self, pin):
+        """
+        Returns:
+            channel directory, or None if the channel isn't available
+        """
+        chip, channel = self.channels[pin]
+        chip_path = os.path.join(self.pwm_root, f"pwmchip{chip}")
+        path = os.path.join(chip_path, f"pwm{channel}")
+        try:
+            if not os.path.isdir(path):
+                with open(os.path.join(chip_path, "export"), "w") as f:
+                    f.write(f"{channel}\n")
+            # udev creates the attributes and fixes their permissions asynchronously
+            deadline = time.monotonic() + self.export_timeout
+            while not os.access(os.path.join(path, "enable"), os.W_OK):
+                if time.monotonic() > deadline:
+                    raise OSError(f"{path} did not appear after export")
+                time.sleep(0.01)
+        except OSError as e:
+            print(f"GPIO{pin}: no hardware PWM ({e}), using software PWM")
+            return None
+        print(f"GPIO{pin}: hardware PWM pwmchip{chip}/pwm{channel}")
+        return path
+
+    def _is_hardware(self, pin):
+        return pin in self.exported
+
+    def setup(self, pin):
+        if self._is_hardware(pin):
+            return
+        if pin in self.channels:
+            path = self._export(pin)
+            if path is not None:
+                self.exported[pin] = path
+                return
+            # e.g. the pwm-2chan overlay isn't loaded
+            del self.channels[pin]
+        self._software().setup(pin)
+
+    def output(self, pin, value):
+        pwm = self.pwms.get(pin)
+        if pwm is not None:
+            pwm.ChangeDutyCycle(100 if value else 0)
+        elif self._is_hardware(pin):
+            # no PWM object yet - drive the level through a fixed-period channel
+            self.PWM(pin, 1000).start(100 if value else 0)
+        else:
+            self._software().output(pin, value)
+
+    def PWM(self, pin, frequency):
+        if not self._is_hardware(pin):
+            return self._software().PWM(pin, frequency)
+        pwm = self.pwms.get(pin)
+        if pwm is None:
+            pwm = SysfsPWM(self.exported[pin], frequency)
+            self.pwms[pin] = pwm
+        else:
+            pwm.ChangeFrequency(frequency)
+        return pwm
+
+    def cleanup(self):
+        for pwm in self.pwms.values():
+            pwm.close()
+        self.pwms.clear()
+        for pin, path in self.exported.items():
+            chip_path = os.path.dirname(path)
+            try:
+                with open(os.path.join(chip_path, "unexport"), "w") as f:
+                    f.write(f"{self.channels[pin][1]}\n")
+            except OSError:
+                pass
+        self.exported.clear()
+        if self.fallback is not None:
+            self.fallback.cleanup()
+
+
+# BCM283x GPIO register block as mapped by /dev/gpiomem (byte offsets)
+GPIO_BLOCK_SIZE = 4096
+GPSET0 = 0x1C
+GPCLR0 = 0x28
+GPLEV0 = 0x34
+
+
+class GpiomemBackend:
+    """
+    GPIO set/clear registers mmap'd from /dev/gpiomem, so a whole pin mask
+    changes with one 32-bit store; setup and PWM still go through the
+    wrapped backend (RPi.GPIO software PWM by default)
+
+    bulk API on top of the common one:
+        pin_masks(pins)         precompute (bank 0, bank 1) masks
+        set_masks(masks)        drive every pin in the masks HIGH
+        clear_masks(masks)      drive every pin in the masks LOW
+    """
+    name = "gpiomem"
+
+    def __init__(self, path="/dev/gpiomem", pwm=None):
+        """
+        Args:
+            path: register block device (any file of GPIO_BLOCK_SIZE bytes for testing)
+            pwm: backend class providing setup/PWM (default RPiGPIOBackend)
+        """
+        self.pwm_backend = (pwm if pwm is not None else RPiGPIOBackend)()
+        fd = os.open(path, os.O_RDWR | os.O_SYNC | os.O_CLOEXEC)
+        try:
+            self._map = mmap.mmap(fd, GPIO_BLOCK_SIZE, mmap.MAP_SHARED,
+                                  mmap.PROT_READ | mmap.PROT_WRITE)
+        finally:
+            os.close(fd)
+        # 32-bit word view: one item assignment is one register write
+        self._regs = memoryview(self._map).cast("I")
+
+    def setup(self, pin):
+        self.pwm_backend.setup(pin)
+
+    def output(self, pin, value):
+        offset = GPSET0 if value else GPCLR0
+        self._regs[offset // 4 + pin // 32] = 1 << (pin % 32)
+
+    def PWM(self, pin, frequency):
+        return self.pwm_backend.PWM(pin, frequency)
+
+    def pin_masks(self, pins):
+        """
+        Returns:
+            (bank 0 mask, bank 1 mask) for set_masks / clear_masks
+        """
+        masks = [0, 0]
+        for pin in pins:
+            masks[pin // 32] |= 1 << (pin % 32)
+        return masks[0], masks[1]
+
+    def set_masks(self, masks):
+        self._write_masks(GPSET0 // 4, masks)
+
+    def clear_masks(self, masks):
+        self._write_masks(GPCLR0 // 4, masks)
+
+    def _write_masks(self, index, masks):
+        regs = self._regs
+        if masks[0]:
+            regs[index] = masks[0]
+        if masks[1]:
+            regs[index + 1] = masks[1]
+
+    def level(self, pin):
+        """current input level of pin (0 or 1)"""
+        return (self._regs[GPLEV0 // 4 + pin // 32] >> (pin % 32)) & 1
+
+    def cleanup(self):
+        self.pwm_backend.cleanup()
+        if self._regs is not None:
+            self._regs.release()
+            self._map.close()
+            self._regs = None
+
+
+class SimulatedPWM:
+    def __init__(self, backend, pin, frequency):
+        self.backend = backend
+        self.pin = pin
+        self.frequency = frequency
+        self.running = False
+
+    def start(self, duty):
+        self.running = True
+        self.backend._record(self.pin, duty)
+
+    def ChangeDutyCycle(self, duty):
+        self.backend._record(self.pin, duty)
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+
+    def stop(self):
+        self.running = False
+        self.backend._record(self.pin, 0)
+
+
+class SimulatedGPIOBackend:
+    """
+    in-memory simulator
+    records a timestamped duty-cycle timeline per pin (0-100, plain
+    outputs record 0 or 100) in compact arrays
+    """
+    name = "sim"
+
+    def __init__(self, clock=time.monotonic):
+        """
+        Args:
+            clock: function returning the current time in seconds
+        """
+        self.clock = clock
+        self.configured = set()
+        self.pwms = {}
+        self._times = {}    # pin -> array('d') of timestamps
+        self._duties = {}   # pin -> array('f') of duty cycles
+        self._lock = threading.Lock()
+
+    def setup(self, pin):
+        self.configured.add(pin)
+        self._timeline_arrays(pin)
+
+    def output(self, pin, value):
+        self._record(pin, 100 if value else 0)
+
+    def PWM(self, pin, frequency):
+        pwm = SimulatedPWM(self, pin, frequency)
+        self.pwms[pin] = pwm
+        return pwm
+
+    def cleanup(self):
+        for pin in self.configured:
+            self._record(pin, 0)
+        self.configured.clear()
+
+    def _timeline_arrays(self, pin):
+        if pin not in self._times:
+            self._times[pin] = array.array('d')
+            self._duties[pin] = array.array('f')
+        return self._times[pin], self._duties[pin]
+
+    def _record(self, pin, duty):
+        now = self.clock()
+        with self._lock:
+            times, duties = self._timeline_arrays(pin)
+            times.append(now)
+            duties.append(duty)
+
+    def timeline(self, pin):
+        """
+        get everything written to a pin
+
+        Returns:
+            list of (timestamp, duty) in write order
+        """
+        with self._lock:
+            times, duties = self._timeline_arrays(pin)
+            return list(zip(times, duties))
+
+    def duty(self, pin):
+        """last duty written to pin (0 if never written)"""
+        with self._lock:
+            duties = self._duties.get(pin)
+            return duties[-1] if duties else 0
+
+    def write_count(self, pin=None):
+        """number of writes to one pin, or to all pins if pin is None"""
+        with self._lock:
+            if pin is not None:
+                return len(self._duties.get(pin, ()))
+            return sum(len(duties) for duties in self._duties.values())
+
+    def reset_timeline(self):
+        """forget recorded writes (e.g. between benchmark phases)"""
+        with self._lock:
+            for pin in self._times:
+                self._times[pin] = array.array('d')
+                self._duties[pin] = array.array('f')
+
+
+BACKENDS = {
+    "rpi": RPiGPIOBackend,
+    "sim": SimulatedGPIOBackend,
+    "sysfs": SysfsPWMBackend,
+    "gpiomem": GpiomemBackend,
+}
+
+# set once at startup by select_backend(), or from ROBOT_GPIO_BACKEND
+_backend = None
+
+
+def select_backend(name=None, **kwargs):
+    """
+    choose the GPIO backend for this process (call before creating Robot)
+
+    Args:
+        name: key in BACKENDS, default $ROBOT_GPIO_BACKEND or "rpi"
+        kwargs: passed to the backend constructor
+
+    Returns:
+        the backend instance
+    """
+    global _backend
+    if name is None:
+        name = os.environ.get("ROBOT_GPIO_BACKEND", "rpi")
+    if name not in BACKENDS:
+        raise ValueError(f"unknown GPIO backend '{name}', expected one of {sorted(BACKENDS)}")
+    _backend = BACKENDS[name](**kwargs)
+    return _backend
+
+
+def get_backend():
+    """get the selected backend, selecting the default on first use"""
+    if _backend is None:
+        return select_backend()
+    return _backend
@@ -0,0 +1,427 @@
+"""
+split input process
+runs controller reading (evdev decoding, frame commit, stick response) in
+its own process, so it no longer shares the GIL with the control loop and
+RPi.GPIO's PWM threads. the latest input frame is exchanged through a
+shared-memory slot guarded by a sequence counter (odd while being written),
+the same scheme as telemetry.py; a pipe byte only wakes the control side up
+
+main.py forks a small supervisor process before any of its own threads
+exist; the supervisor forks the reader and respawns it if it dies. every
+fork therefore happens in a single-threaded process, so no lock (stdout's,
+the logger's, RPi.GPIO's) can be copied into a child in a held state.
+main.py stops the supervisor (and with it the reader) on shutdown
+"""
+import ctypes
+import ctypes.util
+import errno
+import mmap
+import multiprocessing
+import os
+import select
+import signal
+import struct
+import sys
+import time
+import traceback
+
+from controller import BluetoothController
+from event_recording import ReplayFinished
+
+# seq, then the frame, then (own cache line) the control side's stamp ack
+# and the supervisor's restart count
+SEQ = struct.Struct("<Q")
+FRAME = struct.Struct("<hh6BxxIIQdd")
+FRAME_OFFSET = SEQ.size
+ACK_OFFSET = 64
+RESTARTS_OFFSET = ACK_OFFSET + SEQ.size
+SLOT_SIZE = RESTARTS_OFFSET + SEQ.size
+
+# a publish is two stores apart, so this only runs out if the writer is gone
+# (or preempted mid-write, in which case the next wakeup retries)
+READ_ATTEMPTS = 1000
+
+EXIT_REPLAY_FINISHED = 3
+PR_SET_PDEATHSIG = 1
+RESTART_DELAY = 0.5
+
+
+class InputProcessExited(Exception):
+    """the input supervisor is gone, so no reader will be started again"""
+
+
+def parse_cpus(text):
+    """
+    Args:
+        text: CPU list like "0" or "1,2,3" (None/"" = no change)
+
+    Returns:
+        set of CPU numbers, or None
+    """
+    if not text:
+        return None
+    return {int(cpu) for cpu in text.split(",")}
+
+
+def apply_cpu_policy(name, cpus=None, fifo_priority=None):
+    """
+    pin the calling process (thread, and threads it starts later) to CPUs
+    and optionally switch it to SCHED_FIFO (needs root or CAP_SYS_NICE)
+
+    Args:
+        name: label for messages
+        cpus: set of CPU numbers, None = leave as is
+        fifo_priority: 1-99, None = stay SCHED_OTHER
+    """
+    if cpus:
+        try:
+            os.sched_setaffinity(0, cpus)
+            print(f"{name}: pinned to CPU {','.join(str(c) for c in sorted(cpus))}")
+        except OSError as e:
+            print(f"{name}: could not set CPU affinity ({e})")
+    if fifo_priority:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(fifo_priority))
+            print(f"{name}: SCHED_FIFO priority {fifo_priority}")
+        except OSError as e:
+            print(f"{name}: could not set SCHED_FIFO ({e}), staying SCHED_OTHER")
+
+
+class InputSlot:
+    """latest input frame in anonymous shared memory (created before fork)"""
+
+    def __init__(self):
+        self.buf = mmap.mmap(-1, SLOT_SIZE)
+        self.seq = 0
+        self.stamp_id = 0
+        self._stamp = (0.0, 0.0)
+
+    def publish(self, controller, connected, generation, frames, stamp):
+        """
+        input side: write the controller's current state
+
+        Args:
+            stamp: (kernel_time, read_time) from take_input_stamp(), or None
+        """
+        kernel_time = read_time = 0.0
+        if stamp is not None or self._stamp_pending():
+            if not self._stamp_pending():
+                self.stamp_id += 1
+                self._stamp = stamp
+            # else: control side hasn't taken the older stamp yet - keep it
+            kernel_time, read_time = self._stamp
+
+        buf = self.buf
+        seq = self.seq
+        SEQ.pack_into(buf, 0, seq + 1)
+        FRAME.pack_into(buf, FRAME_OFFSET,
+                        controller.joystick_x, controller.joystick_y,
+                        controller.button_x, controller.button_b,
+                        controller.button_y, controller.button_a,
+                        controller.bottom_trigger, connected,
+                        generation, frames, self.stamp_id, kernel_time, read_time)
+        SEQ.pack_into(buf, 0, seq + 2)
+        self.seq = seq + 2
+
+    def publish_disconnected(self):
+        """
+        supervisor side: mark the connection gone with every input released,
+        for a reader that died without saying so (call recover() first)
+        """
+        generation, frames, stamp_id = self.last_written()[8:11]
+        buf = self.buf
+        seq = self.seq
+        SEQ.pack_into(buf, 0, seq + 1)
+        FRAME.pack_into(buf, FRAME_OFFSET, 0, 0, 0, 0, 0, 0, 0, False,
+                        generation, frames, stamp_id, 0.0, 0.0)
+        SEQ.pack_into(buf, 0, seq + 2)
+        self.seq = seq + 2
+
+    def count_restart(self):
+        SEQ.pack_into(self.buf, RESTARTS_OFFSET, self.restarts() + 1)
+
+    def restarts(self):
+        return SEQ.unpack_from(self.buf, RESTARTS_OFFSET)[0]
+
+    def _stamp_pending(self):
+        return self.stamp_id > SEQ.unpack_from(self.buf, ACK_OFFSET)[0]
+
+    def read(self, attempts=READ_ATTEMPTS):
+        """
+        control side: consistent snapshot of the frame
+
+        Args:
+            attempts: tries before giving up - a writer that died between
+                      its two SEQ stores leaves the slot odd for good
+
+        Returns:
+            FRAME tuple, or None if no stable snapshot was seen
+        """
+        buf = self.buf
+        for _ in range(attempts):
+            seq = SEQ.unpack_from(buf, 0)[0]
+            if seq & 1:
+                continue
+            frame = FRAME.unpack_from(buf, FRAME_OFFSET)
+            if SEQ.unpack_from(buf, 0)[0] == seq:
+                return frame
+        return None
+
+    def last_written(self):
+        """
+        input side: the frame in the slot, read without retrying - after
+        recover() the caller is the only writer, so nothing changes under it
+
+        Returns:
+            FRAME tuple
+        """
+        return FRAME.unpack_from(self.buf, FRAME_OFFSET)
+
+    def recover(self):
+        """
+        input side: take over as writer (after a previous one exited),
+        closing a write it left half done
+        """
+        seq = SEQ.unpack_from(self.buf, 0)[0]
+        if seq & 1:
+            seq += 1
+            SEQ.pack_into(self.buf, 0, seq)
+        self.seq = seq
+
+    def ack(self, stamp_id):
+        """control side: stamps up to stamp_id have been taken"""
+        SEQ.pack_into(self.buf, ACK_OFFSET, stamp_id)
+
+
+class SharedInputController(BluetoothController):
+    """
+    control-side stand-in for BluetoothController: the getters are inherited,
+    the state comes from the input process's slot instead of a device
+    """
+
+    def __init__(self, process, generation):
+        self.process = process
+        self.generation = generation
+        self.reset_all_inputs()
+        self.received_events_this_frame = False
+        self.frames = 0
+        self.stamp_id = 0
+        self.input_kernel_time = None
+        self.input_read_time = None
+
+    def reset_all_inputs(self):
+        self.joystick_x = 0
+        self.joystick_y = 0
+        self.button_x = False
+        self.button_b = False
+        self.button_y = False
+        self.button_a = False
+        self.bottom_trigger = False
+
+    def fileno(self):
+        return self.process.wake_fd
+
+    def close(self):
+        # the device belongs to the input process, which closes it
+        pass
+
+    def is_connected(self):
+        return self.process.is_alive()
+
+    def read_events(self):
+        """take the latest frame from the input process"""
+        self.process.drain_wake()
+        frame = self.process.slot.read()
+        if frame is None:
+            if not self.process.is_alive():
+                raise OSError(errno.ENODEV, "controller disconnected (input process exited)")
+            # writer mid-update: keep the last frame, its wake byte follows
+            self.received_events_this_frame = False
+            return
+        (x, y, bx, bb, by, ba, trigger, connected, generation, frames,
+         stamp_id, kernel_time, read_time) = frame
+        if not connected or generation != self.generation:
+            raise OSError(errno.ENODEV, "controller disconnected (input process)")
+
+        self.received_events_this_frame = frames != self.frames
+        self.frames = frames
+        self.joystick_x = x
+        self.joystick_y = y
+        self.button_x = bool(bx)
+        self.button_b = bool(bb)
+        self.button_y = bool(by)
+        self.button_a = bool(ba)
+        self.bottom_trigger = bool(trigger)
+
+        if stamp_id > self.stamp_id:
+            self.stamp_id = stamp_id
+            if self.input_kernel_time is None:
+                self.input_kernel_time = kernel_time
+                self.input_read_time = read_time
+            self.process.slot.ack(stamp_id)
+
+
+class InputProcess:
+    def __init__(self, open_controller, cpus=None, fifo_priority=None):
+        """
+        control-side handle for the input supervisor and reader
+
+        Args:
+            open_controller: blocking callable returning a connected BluetoothController,
+                             called in the reader (e.g. ReconnectManager.wait_for_controller)
+            cpus: CPUs for the input processes (set of ints, None = any)
+            fifo_priority: SCHED_FIFO priority for the input processes, None = SCHED_OTHER
+        """
+        self.open_controller = open_controller
+        self.cpus = cpus
+        self.fifo_priority = fifo_priority
+        self.slot = InputSlot()
+        self.wake_fd, self._wake_write = os.pipe()
+        os.set_blocking(self.wake_fd, False)
+        os.set_blocking(self._wake_write, False)
+        self.process = None
+        self.last_generation = 0
+
+    @property
+    def restarts(self):
+        """times the supervisor restarted the reader"""
+        return self.slot.restarts()
+
+    def start(self):
+        # fork: the supervisor gets the slot mapping and pipe; it must start
+        # before GPIO threads exist so no lock is copied in a held state
+        context = multiprocessing.get_context("fork")
+        self.process = context.Process(target=self._supervise, name="robot-input", daemon=True)
+        self.process.start()
+        print(f"Input process started (pid {self.process.pid})")
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def drain_wake(self):
+        try:
+            os.read(self.wake_fd, 4096)
+        except BlockingIOError:
+            pass
+
+    def wait_for_controller(self):
+        """
+        block until the input process reports a new connection
+
+        Returns:
+            SharedInputController for that connection
+        """
+        while True:
+            if not self.is_alive():
+                if self.process.exitcode == EXIT_REPLAY_FINISHED:
+                    raise ReplayFinished("input process")
+                raise InputProcessExited(f"input supervisor exited ({self.process.exitcode})")
+
+            frame = self.slot.read()
+            if frame is None:
+                # stuck or mid-write - the liveness check above decides next time
+                connected = generation = 0
+            else:
+                connected, generation = frame[7], frame[8]
+            if connected and generation != self.last_generation:
+                self.last_generation = generation
+                return SharedInputController(self, generation)
+
+            select.select([self.wake_fd], [], [], 0.1)
+            self.drain_wake()
+
+    def stop(self):
+        # the reader gets SIGTERM from PDEATHSIG when the supervisor goes
+        if self.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+
+    def _wake(self):
+        try:
+            os.write(self._wake_write, b"\0")
+        except BlockingIOError:
+            pass    # pipe already full of wakeups
+
+    def _die_with_parent(self):
+        # the control process handles Ctrl+C; go away with the parent
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            libc.prctl(PR_SET_PDEATHSIG, signal.SIGTERM)
+        except (OSError, AttributeError):
+            pass
+
+    def _supervise(self):
+        """supervisor process: fork the reader, respawn it when it dies"""
+        self._die_with_parent()
+        # inherited by every reader forked below
+        apply_cpu_policy("input process", self.cpus, self.fifo_priority)
+
+        while True:
+            pid = os.fork()
+            if pid == 0:
+                code = 1
+                try:
+                    self._child()
+                except SystemExit as e:
+                    code = e.code if isinstance(e.code, int) else 1
+                except BaseException:
+                    traceback.print_exc()
+                finally:
+                    sys.stdout.flush()
+                    os._exit(code)
+
+            _, status = os.waitpid(pid, 0)
+            code = os.waitstatus_to_exitcode(status)
+            if code == EXIT_REPLAY_FINISHED:
+                sys.stdout.flush()
+                os._exit(code)
+
+            # release every input before the control side sees the next frame
+            slot = self.slot
+            slot.recover()
+            slot.publish_disconnected()
+            slot.count_restart()
+            self._wake()
+            print(f"Input process exited ({code}), restarting")
+            time.sleep(RESTART_DELAY)
+
+    def _child(self):
+        """reader process: open the controller and publish its frames"""
+        self._die_with_parent()
+
+        slot = self.slot
+        slot.recover()
+        # continue numbering across restarts so the control side sees a new connection
+        generation = slot.last_written()[8]
+        while True:
+            try:
+                controller = self.open_controller()
+            except ReplayFinished:
+                sys.stdout.flush()
+                os._exit(EXIT_REPLAY_FINISHED)
+            generation += 1
+            fd = controller.fileno()
+            slot.publish(controller, True, generation, 0, None)
+            self._wake()
+
+            frames = 0
+            while True:
+                readable, _, _ = select.select([fd], [], [], 0.5)
+                if not readable:
+                    continue
+                try:
+                    controller.read_events()
+                except OSError:
+                    break
+                if controller.received_events_this_frame:
+                    frames += 1
+                    slot.publish(controller, True, generation, frames,
+                                 controller.take_input_stamp())
+                    self._wake()
+
+            controller.reset_all_inputs()
+            slot.publish(controller, False, generation, frames, None)
+            self._wake()
+            controller.close()
+            time.sleep(0.1)
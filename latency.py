@@ -0,0 +1,159 @@
+"""
+input-to-PWM latency measurement
+tags each controller input change with its evdev kernel timestamp and
+records how long it takes to reach the motor pins, per stage, in
+HDR-style log-linear histograms
+
+stages:
+    queue     kernel timestamp -> read_events() saw the event
+    steering  read_events() -> Robot.drive() computed motor targets
+    ramp      Robot.drive() -> first duty write on a motor pin
+    total     kernel timestamp -> first duty write
+"""
+import time
+
+STAGES = ("queue", "steering", "ramp", "total")
+
+
+class LatencyHistogram:
+    def __init__(self, max_value_us=10000000, precision_bits=5):
+        """
+        initialize histogram of microsecond values
+
+        Args:
+            max_value_us: largest value tracked exactly, bigger ones land in the top bucket
+            precision_bits: linear sub-buckets per power of two = 2^(bits-1)
+                            (5 bits -> values within ~3% of their true value)
+        """
+        self.bits = precision_bits
+        self.sub_count = 1 << precision_bits
+        self.half = self.sub_count >> 1
+        self.max_index = self._index(max_value_us)
+        self.counts = [0] * (self.max_index + 1)
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def _index(self, value):
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.bits
+        return shift * self.half + (value >> shift)
+
+    def _bucket_upper(self, index):
+        if index < self.sub_count:
+            return index
+        shift = index // self.half - 1
+        mantissa = index - shift * self.half
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds):
+        """record one latency given in seconds (negative values count as 0)"""
+        value = int(seconds * 1000000)
+        if value < 0:
+            value = 0
+        index = self._index(value)
+        if index > self.max_index:
+            index = self.max_index
+        self.counts[index] += 1
+        self.count += 1
+        self.total_us += value
+        if value > self.max_us:
+            self.max_us = value
+
+    def percentile(self, percent):
+        """
+        get a percentile in seconds (upper edge of the bucket it falls in)
+
+        Args:
+            percent: 0-100
+        """
+        if self.count == 0:
+            return 0.0
+        target = max(1, int(self.count * percent / 100.0 + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._bucket_upper(index), self.max_us) / 1000000.0
+        return self.max_us / 1000000.0
+
+    def mean(self):
+        return self.total_us / self.count / 1000000.0 if self.count else 0.0
+
+    def max(self):
+        return self.max_us / 1000000.0
+
+
+class InputStamp:
+    """one input change, carried from the controller to the first PWM write"""
+    __slots__ = ("tracker", "kernel_time", "read_time", "steer_time", "written")
+
+    def __init__(self, tracker, kernel_time, read_time):
+        self.tracker = tracker
+        self.kernel_time = kernel_time
+        self.read_time = read_time
+        self.steer_time = None
+        self.written = False
+
+    def steering_done(self, now=None):
+        """called once drive() has computed and set the motor targets"""
+        self.steer_time = time.time() if now is None else now
+        self.tracker.record("queue", self.read_time - self.kernel_time)
+        self.tracker.record("steering", self.steer_time - self.read_time)
+
+    def pwm_written(self, now=None):
+        """called by the first motor that writes a duty for this input"""
+        if self.written or self.steer_time is None:
+            return
+        self.written = True
+        now = time.time() if now is None else now
+        self.tracker.record("ramp", now - self.steer_time)
+        self.tracker.record("total", now - self.kernel_time)
+
+
+class LatencyTracker:
+    def __init__(self):
+        """initialize one histogram per stage"""
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+
+    def stamp(self, kernel_time, read_time):
+        """create a stamp for an input change (kernel_time from event.timestamp())"""
+        return InputStamp(self, kernel_time, read_time)
+
+    def record(self, stage, seconds):
+        self.histograms[stage].record(seconds)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def get_stats(self):
+        """
+        get latency statistics
+
+        Returns:
+            dict of stage -> {count, p50_ms, p99_ms, max_ms, mean_ms}
+        """
+        stats = {}
+        for stage, histogram in self.histograms.items():
+            stats[stage] = {
+                "count": histogram.count,
+                "p50_ms": histogram.percentile(50) * 1000,
+                "p99_ms": histogram.percentile(99) * 1000,
+                "max_ms": histogram.max() * 1000,
+                "mean_ms": histogram.mean() * 1000,
+            }
+        return stats
+
+    def report(self):
+        """print per-stage p50/p99/max"""
+        print("Input-to-PWM latency:")
+        for stage, s in self.get_stats().items():
+            print(f"  {stage:9s} n={s['count']:6d}  p50 {s['p50_ms']:7.2f}ms  "
+                  f"p99 {s['p99_ms']:7.2f}ms  max {s['max_ms']:7.2f}ms")
@@ -2,176 +2,287 @@
 main control program
 reads bluetooth controller and controls device
 """
+import argparse
+import asyncio
 import time
 import signal
 import sys
-import subprocess
+import gpio_backend
 from robot import Robot
 from controller import BluetoothController
+from control_runtime import ControlRuntime
+from event_recording import ReplayDevice, ReplayFinished
+from reconnect import ReconnectManager
+from tick_scheduler import TickScheduler, SUPPORTED_RATES
+from robot_log import get_logger
+from telemetry import DEFAULT_PATH as TELEMETRY_PATH
+from startup import StartupReport, PrefetchedConnect
+from stick_response import StickResponse, load_calibration
+from input_process import InputProcess, InputProcessExited, apply_cpu_policy, parse_cpus
+from watchdog import Watchdog
+from profiling import SamplingProfiler
+from metrics import RobotMetrics, MetricsServer, DEFAULT_SOCKET as METRICS_SOCKET
 
 robot = None
+runtime = None
+input_process = None
+profiler = None
+metrics_server = None
 
 def signal_handler(sig, frame):
-    """handle shutdown signals"""
-    global robot
+    """handle shutdown signals during startup (before the control loop runs)"""
+    shutdown_on_signal()
+
+def shutdown_on_signal():
     print("=" * 50)
     print("SHUTDOWN SIGNAL RECEIVED")
     print("=" * 50)
+    shutdown()
+    sys.exit(0)
+
+async def run_until_signal(runtime):
+    """
+    run the control tasks until SIGINT/SIGTERM
+    the signal only cancels the tasks; shutdown() runs after the loop has
+    stopped, so it can never interrupt a ramp pass holding the motor lock.
+    USR1/USR2 dumps run between callbacks too, never inside a tick
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    handlers = {
+        signal.SIGINT: (task.cancel,),
+        signal.SIGTERM: (task.cancel,),
+        signal.SIGUSR1: (dump_timers_handler, signal.SIGUSR1, None),
+        signal.SIGUSR2: (profile_handler, signal.SIGUSR2, None),
+    }
+    previous = {sig: signal.getsignal(sig) for sig in handlers}
+    for sig, (callback, *args) in handlers.items():
+        loop.add_signal_handler(sig, callback, *args)
+    try:
+        await runtime.run()
+    finally:
+        # back to the plain handlers for shutdown (the loop would reset them to default)
+        for sig, handler in previous.items():
+            loop.remove_signal_handler(sig)
+            signal.signal(sig, handler)
+
+def dump_timers_handler(sig, frame):
+    """SIGUSR1: print the loop stage timers and latency histograms"""
+    if robot:
+        robot.timers.report()
+        robot.latency.report()
+    if runtime:
+        runtime.scheduler.report()
+
+def profile_handler(sig, frame):
+    """SIGUSR2: start the sampling profiler, or stop it early"""
+    if profiler:
+        profiler.toggle()
+
+def shutdown():
+    """stop motors, report stats and release GPIO"""
+    # motors first - everything below joins threads and prints reports
     if robot:
         print("Stopping all motors...")
         robot.stop_all()
+        robot.motors.report_stops()
+    # the watchdog keeps guarding the motors until they are stopped
+    if runtime and runtime.watchdog:
+        runtime.watchdog.stop()
+    # write out anything still queued before the shutdown report
+    log = get_logger()
+    log.close()
+    if input_process:
+        input_process.stop()
+    if metrics_server:
+        metrics_server.stop()
+    if profiler and profiler.is_running():
+        # write out what was sampled so far
+        profiler.stop(wait=True)
+    if runtime:
+        if runtime.startup is not None:
+            # never got an input - still show how far startup got
+            print(runtime.startup.format())
+        runtime.scheduler.report()
+        if runtime.watchdog:
+            runtime.watchdog.report()
+        if metrics_server:
+            metrics_server.report()
+        stats = log.get_stats()
+        print(f"Log: {stats['written']} written, {stats['dropped']} dropped, "
+              f"{stats['rate_limited']} rate limited, {stats['unchanged']} unchanged")
+    if robot:
+        robot.timers.report()
+        robot.latency.report()
         time.sleep(0.5)
         print("Cleaning up GPIO...")
         robot.cleanup()
     print("=" * 50)
     print("ROBOT SHUTDOWN COMPLETE")
     print("=" * 50)
-    sys.exit(0)
 
-def connect_bluetooth_controller():
-    try:
-        result = subprocess.run(['bluetoothctl', 'devices'], 
-                              capture_output=True, text=True, timeout=5)
-        
-        for line in result.stdout.split('\n'):
-            if 'joy-con (r)' in line.lower():
-                parts = line.split()
-                if len(parts) >= 2:
-                    mac_address = parts[1]
-                    print(f"Found Joy-Con at {mac_address}, connecting...")
-                    
-                    subprocess.run(['bluetoothctl', 'connect', mac_address], 
-                                 capture_output=True, timeout=10)
-                    time.sleep(3)
-                    return True
-        
-        print("Joy-Con not found in paired devices")
-        return False
-        
-    except Exception as e:
-        print(f"Bluetooth connection attempt failed: {e}")
-        return False
-
-def wait_for_controller():
-    while True:
-        connect_bluetooth_controller()
-        try:
-            print("Connecting to controller...")
-            controller = BluetoothController()
-            print("Controller connected!")
-            return controller
-        except Exception as e:
-            print(f"Controller not found, retrying in 3 seconds...")
-            time.sleep(3)
+def make_replay_connector(path, realtime, response=None):
+    """
+    connect function that plays a recording instead of a real controller
+    the second call (after the recording ran out) ends the run
+    """
+    replays = []
+
+    def connect():
+        if replays:
+            raise ReplayFinished(path)
+        print(f"Replaying controller events from {path} "
+              f"({'real time' if realtime else 'as fast as possible'})")
+        replays.append(path)
+        return BluetoothController(device=ReplayDevice(path, realtime=realtime), response=response)
+
+    return connect
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="robot control system")
+    parser.add_argument("--rate", type=int, choices=SUPPORTED_RATES, default=20,
+                        help="control loop rate in Hz (default 20)")
+    parser.add_argument("--steering-cache", metavar="DIR", default=None,
+                        help="cache the steering lookup table in DIR for faster startup")
+    parser.add_argument("--gpio-backend", choices=sorted(gpio_backend.BACKENDS), default=None,
+                        help="GPIO backend: rpi (default, or $ROBOT_GPIO_BACKEND), sim, "
+                             "sysfs (kernel hardware PWM where available, RPi.GPIO for other pins) "
+                             "or gpiomem (RPi.GPIO PWM, pin writes and bulk stop via /dev/gpiomem)")
+    parser.add_argument("--pwm-channels", metavar="MAP", default=None,
+                        help="sysfs backend: pin=chip:channel list (default 18=0:0,19=0:1)")
+    parser.add_argument("--record", metavar="FILE", default=None,
+                        help="append the raw controller event stream to FILE")
+    parser.add_argument("--replay", metavar="FILE", default=None,
+                        help="drive from a recorded event stream instead of the controller")
+    parser.add_argument("--replay-fast", action="store_true",
+                        help="replay as fast as possible instead of in real time")
+    parser.add_argument("--input-reader", choices=("evdev", "raw"), default="evdev",
+                        help="read controller events with evdev or the raw input_event reader")
+    parser.add_argument("--dead-zone", type=int, default=10,
+                        help="radial joystick dead zone in percent (default 10)")
+    parser.add_argument("--expo", type=float, default=0.0,
+                        help="joystick expo, 0 = linear to 1 = cubic (finer low-speed control)")
+    parser.add_argument("--stick-calibration", metavar="FILE", default=None,
+                        help="joystick center/range from 'python stick_response.py calibrate FILE'")
+    parser.add_argument("--watchdog-timeout", metavar="SEC", type=float, default=0.25,
+                        help="stop all motors if the control loop misses heartbeats "
+                             "for SEC seconds (0 = off, default 0.25)")
+    parser.add_argument("--profile-seconds", metavar="SEC", type=float, default=30.0,
+                        help="how long SIGUSR2 samples for (default 30)")
+    parser.add_argument("--profile-dir", metavar="DIR", default="/tmp",
+                        help="where SIGUSR2 writes collapsed stacks (default /tmp)")
+    parser.add_argument("--split-input", action="store_true",
+                        help="read the controller in a separate process (shared-memory frame slot)")
+    parser.add_argument("--input-cpus", metavar="LIST", default=None,
+                        help="CPUs for the input process with --split-input, e.g. 0")
+    parser.add_argument("--control-cpus", metavar="LIST", default=None,
+                        help="CPUs for the control process with --split-input, e.g. 1,2,3")
+    parser.add_argument("--input-fifo", metavar="PRIO", type=int, default=None,
+                        help="run the input process SCHED_FIFO at PRIO (needs root)")
+    parser.add_argument("--control-fifo", metavar="PRIO", type=int, default=None,
+                        help="run the control process SCHED_FIFO at PRIO (needs root)")
+    parser.add_argument("--telemetry", metavar="PATH", default=TELEMETRY_PATH,
+                        help=f"shared-memory telemetry ring (default {TELEMETRY_PATH})")
+    parser.add_argument("--no-telemetry", action="store_true",
+                        help="don't publish per-tick telemetry")
+    parser.add_argument("--metrics-socket", metavar="PATH", default=METRICS_SOCKET,
+                        help=f"serve Prometheus metrics on a UNIX socket (default {METRICS_SOCKET})")
+    parser.add_argument("--metrics-port", metavar="PORT", type=int, default=None,
+                        help="also serve metrics on 127.0.0.1:PORT")
+    parser.add_argument("--no-metrics", action="store_true",
+                        help="don't serve metrics")
+    args = parser.parse_args()
+    if args.pwm_channels and args.gpio_backend != "sysfs":
+        parser.error("--pwm-channels needs --gpio-backend sysfs")
+    return args
 
 def main():
-    global robot
+    global robot, runtime, input_process, profiler, metrics_server
+
+    startup = StartupReport()
+    args = parse_args()
 
     print("=" * 50)
     print("CONTROL SYSTEM")
     print("=" * 50)
-    
+
+    # start connecting first - discovery/bluetoothctl (and the evdev import)
+    # run on their own thread while the hardware initializes
+    print("\n[1/2] Connecting to Bluetooth controller in the background...")
+    calibration = load_calibration(args.stick_calibration) if args.stick_calibration else (None, None)
+    response = StickResponse(args.dead_zone, args.expo, *calibration)
+    if args.replay:
+        connect = make_replay_connector(args.replay, realtime=not args.replay_fast,
+                                        response=response)
+    else:
+        # resumes as soon as the Joy-Con's /dev/input node appears,
+        # bluetoothctl runs in the background with backoff
+        raw = args.input_reader == "raw"
+        reconnect = ReconnectManager(lambda: BluetoothController(
+            record_path=args.record, raw=raw, response=response))
+        connect = reconnect.wait_for_controller
+    if args.split_input:
+        # fork the reader before any GPIO/buzzer/logging threads exist
+        input_process = InputProcess(connect, cpus=parse_cpus(args.input_cpus),
+                                     fifo_priority=args.input_fifo)
+        input_process.start()
+        apply_cpu_policy("control process", parse_cpus(args.control_cpus), args.control_fifo)
+        connect = input_process.wait_for_controller
+    connect = PrefetchedConnect(connect, startup)
+
     # initialize robot
-    print("\n[1/2] Initializing robot hardware...")
-    robot = Robot()
+    print("\n[2/2] Initializing robot hardware...")
+    with startup.phase("gpio backend"):
+        backend_options = {}
+        if args.pwm_channels:
+            backend_options["channels"] = gpio_backend.parse_pwm_channels(args.pwm_channels)
+        gpio = gpio_backend.select_backend(args.gpio_backend, **backend_options)
+    print(f"GPIO backend: {gpio.name}")
+    with startup.phase("hardware"):
+        robot = Robot(steering_cache_dir=args.steering_cache)
+        if not args.no_telemetry:
+            robot.enable_telemetry(args.telemetry)
 
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
+
+    # field diagnostics: kill -USR1 dumps timers, kill -USR2 profiles
+    # (until the loop starts - run_until_signal moves them onto the loop)
+    profiler = SamplingProfiler(args.profile_dir, duration=args.profile_seconds)
+    signal.signal(signal.SIGUSR1, dump_timers_handler)
+    signal.signal(signal.SIGUSR2, profile_handler)
     
-    # set initial max speed
-    current_mode = "drive"
+    # set initial max speed (drive mode)
     robot.set_max_speed(100)
-    print("Max speed set to 100%")
-    
-    while True:
-    # initialize controller 
-        print("\n[2/2] Connecting to Bluetooth controller...")
-        controller = wait_for_controller()
 
-        robot.buzzer.connect_sound()
-        time.sleep(0.5)
-    
-        print("\n" + "=" * 50)
-        print("ROBOT READY")
-        print("=" * 50)
-        print("\nControls:")
-        print("  Joystick Y-axis   - Forward/Backward")
-        print("  Joystick X-axis   - Turn Left/Right")
-        print("  Button X (top)    - Raise Tongue")
-        print("  Button B (bottom) - Lower Tongue")
-        print("  Button Y (left)   - Hitch Mode (25% max speed)")
-        print("  Button A (right)  - Drive Mode (100% max speed)")
-        print("  Ctrl+C            - Emergency Stop & Exit") # can change if we get an actual button / could be button on the remote (but idk because if the remote unpairs)
-        print("\n" + "=" * 50 + "\n")
-    
-        # track last command time for timeout safety - if controller disconnects
-        last_command_time = time.time()
-        command_timeout = 1.5  # stop if no commands for 1.5 seconds
-        
-        try:
-            while True:
-                # check if controller is still connected
-                if not controller.is_connected():
-                    print("\nWARNING: Controller disconnected")
-                    robot.buzzer.disconnect_sound()
-                    print(f"Actuator speed before stop: {robot.actuator.current_speed}")
-                    controller.reset_all_inputs()
-                    robot.stop_all()
-                    print(f"Actuator speed before stop: {robot.actuator.current_speed}")
-                    time.sleep(0.2)
-                    break
-                
-                # read controller input
-                controller.read_events()
-                
-                robot.update()
-
-                speed_adjustment = controller.get_speed_adjustment()
-                if speed_adjustment == "drive" and current_mode != "drive":
-                    current_mode = "drive"
-                    robot.set_max_speed(100)
-                    robot.buzzer.drive_mode_sound()
-                    print(">> DRIVE MODE activated (100% speed)")
-                elif speed_adjustment == "hitch" and current_mode != "hitch":
-                    current_mode = "hitch"
-                    robot.set_max_speed(50)
-                    robot.buzzer.hitch_mode_sound()
-                    print(">> HITCH MODE activated (50% speed)")
-                
-                # get drive commands
-                forward, turn = controller.get_drive_values()
-                if forward != 0 or turn != 0:
-                    left, right = robot.steering.compute_motors(turn, forward)
-                    print(f"Input: x={turn:3d}, y={forward:3d} | Output: L={left:3d}, R={right:3d}")
-                
-                # update command time if there's input
-                if controller.received_events_this_frame or controller.has_input():
-                    last_command_time = time.time()
-                
-                # check for command timeout (safety feature)
-                if time.time() - last_command_time > command_timeout:
-                    robot.stop_all()
-                else:
-                    # send drive commands to robot
-                    robot.drive(turn, forward)
-                
-                # get actuator command
-                actuator_cmd = controller.get_actuator_command()
-                if actuator_cmd == "raise":
-                    robot.raise_tongue(100)
-                elif actuator_cmd == "lower":
-                    robot.lower_tongue(100)
-                else:
-                    robot.stop_actuator()
-                
-                # small delay (20Hz update rate)
-                time.sleep(0.05)
-        
-        except Exception as e:
-            print(f"\n\nERROR: {e}")
-            print("Emergency stop activated")
-            robot.stop_all()
-            time.sleep(2)
+    # input, control/ramp, feedback and reconnection run as asyncio tasks
+    # stops the motors from its own thread if the loop stalls
+    watchdog = None
+    if args.watchdog_timeout > 0:
+        watchdog = Watchdog(robot.stop_all, timeout=args.watchdog_timeout)
+
+    runtime = ControlRuntime(robot, connect, scheduler=TickScheduler(args.rate),
+                             command_timeout=1.5, startup=startup, watchdog=watchdog)
+
+    if not args.no_metrics:
+        metrics_server = MetricsServer(RobotMetrics(robot, runtime, input_process).render,
+                                       unix_path=args.metrics_socket, tcp_port=args.metrics_port)
+        metrics_server.start()
+    try:
+        asyncio.run(run_until_signal(runtime))
+    except ReplayFinished:
+        print("\nReplay finished")
+        shutdown()
+    except InputProcessExited as e:
+        print(f"\nERROR: {e}")
+        shutdown()
+    except asyncio.CancelledError:
+        shutdown_on_signal()
+    except Exception as e:
+        # a task died - never leave the motors at their last duty
+        print(f"\nERROR: {e}")
+        shutdown()
+        raise
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,326 @@
+"""
+local metrics endpoint
+serves counters and gauges in the Prometheus text exposition format over
+HTTP on a UNIX-domain socket (and optionally localhost TCP) from a
+background thread. rendering only reads plain attributes the control loop
+already keeps (ints, floats, array elements), so a scrape never takes a lock
+the loop uses
+
+    curl --unix-socket /tmp/robot_metrics.sock http://localhost/metrics
+    python metrics.py [--port PORT] [socket]
+"""
+import argparse
+import os
+import selectors
+import socket
+import stat
+import threading
+import time
+from latency import LatencyHistogram
+
+DEFAULT_SOCKET = "/tmp/robot_metrics.sock"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+MAX_REQUEST = 8192
+
+
+def format_labels(**labels):
+    """
+    Returns:
+        '{name="value",...}' with values escaped as the text format requires
+    """
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def add_family(lines, name, kind, help_text, samples):
+    """
+    append one metric family
+
+    Args:
+        lines: output list
+        name: metric name
+        kind: "counter" or "gauge"
+        help_text: HELP line
+        samples: list of (labels string, value); labels "" for none
+    """
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{labels} {value}")
+
+
+class RobotMetrics:
+    def __init__(self, robot, runtime, input_process=None):
+        """
+        collects metrics from the running control stack
+
+        Args:
+            robot: Robot
+            runtime: ControlRuntime (loop counters, current controller and mode)
+            input_process: InputProcess when --split-input is used
+        """
+        self.robot = robot
+        self.runtime = runtime
+        self.input_process = input_process
+        # label strings never change, build them once
+        self.motor_labels = [format_labels(motor=driver.name) for driver in robot.motors.drivers]
+
+    def render(self):
+        """
+        Returns:
+            exposition text (str)
+        """
+        robot = self.robot
+        runtime = self.runtime
+        scheduler = runtime.scheduler
+        drivers = robot.motors.drivers
+        labels = self.motor_labels
+        lines = []
+
+        add_family(lines, "robot_ticks_total", "counter",
+                   "Control ticks run (scheduled and input-triggered).",
+                   [("", robot.timers.histograms["tick"].count)])
+        add_family(lines, "robot_scheduled_ticks_total", "counter",
+                   "Ticks run on the scheduler deadline.", [("", scheduler.ticks)])
+        add_family(lines, "robot_tick_overruns_total", "counter",
+                   "Scheduled ticks that ran past their budget.", [("", scheduler.overruns)])
+        add_family(lines, "robot_ticks_shed_total", "counter",
+                   "Ticks that skipped logging and sounds after an overrun.",
+                   [("", scheduler.shed_ticks)])
+        add_family(lines, "robot_deadlines_skipped_total", "counter",
+                   "Scheduler deadlines skipped because the loop fell behind.",
+                   [("", scheduler.skipped_deadlines)])
+        add_family(lines, "robot_command_timeout_stops_total", "counter",
+                   "Times the command timeout stopped all motors.",
+                   [("", runtime.timeout_stops)])
+
+        connected = runtime._connected is not None and runtime._connected.is_set()
+        add_family(lines, "robot_controller_connected", "gauge",
+                   "1 while a controller is connected.", [("", int(connected))])
+        add_family(lines, "robot_controller_reconnects_total", "counter",
+                   "Controller connections after the first one.",
+                   [("", max(0, runtime.connections - 1))])
+        # totals over all connections, each controller counts from 0 again
+        events, frames = runtime.input_totals()
+        if self.input_process is None:
+            # with --split-input the events are read (and counted) in the input process
+            add_family(lines, "robot_input_events_total", "counter",
+                       "Input events read from the controller.", [("", events)])
+        add_family(lines, "robot_input_frames_total", "counter",
+                   "Input frames committed.", [("", frames)])
+        if self.input_process is not None:
+            add_family(lines, "robot_input_process_restarts_total", "counter",
+                       "Times the input process was restarted.",
+                       [("", self.input_process.restarts)])
+
+        mode = runtime.current_mode
+        add_family(lines, "robot_mode", "gauge", "1 for the active drive mode.",
+                   [(format_labels(mode=m), int(m == mode)) for m in ("drive", "hitch")])
+        add_family(lines, "robot_max_speed_percent", "gauge",
+                   "Drive speed limit.", [("", robot.max_speed)])
+
+        add_family(lines, "robot_motor_speed", "gauge",
+                   "Current (ramped) motor speed, -100 to 100.",
+                   [(labels[i], robot.motors.current[i]) for i in range(len(drivers))])
+        add_family(lines, "robot_motor_target_speed", "gauge",
+                   "Motor target speed, -100 to 100.",
+                   [(labels[i], robot.motors.target[i]) for i in range(len(drivers))])
+        writes = []
+        for driver in drivers:
+            writes.append((format_labels(motor=driver.name, result="issued"), driver.writes_issued))
+            writes.append((format_labels(motor=driver.name, result="suppressed"),
+                           driver.writes_suppressed))
+        add_family(lines, "robot_pwm_writes_total", "counter",
+                   "PWM/GPIO writes issued to hardware or skipped as redundant.", writes)
+
+        watchdog = runtime.watchdog
+        if watchdog is not None:
+            add_family(lines, "robot_watchdog_trips_total", "counter",
+                       "Times the watchdog stopped all motors.", [("", watchdog.trips)])
+        log = runtime.log
+        add_family(lines, "robot_log_dropped_total", "counter",
+                   "Log lines dropped because the ring was full.", [("", log.dropped)])
+
+        lines.append("")
+        return "\n".join(lines)
+
+
+class MetricsServer:
+    def __init__(self, render, unix_path=DEFAULT_SOCKET, tcp_port=None, tcp_host="127.0.0.1"):
+        """
+        initialize server (nothing listens until start())
+
+        Args:
+            render: callable returning the exposition text
+            unix_path: UNIX socket path, None = no UNIX socket
+            tcp_port: also listen on tcp_host:tcp_port, None = no TCP
+            tcp_host: TCP address, localhost by default
+        """
+        self.render = render
+        self.unix_path = unix_path
+        self.tcp_port = tcp_port
+        self.tcp_host = tcp_host
+        self.tcp_address = None
+        self.scrapes = 0
+        self.errors = 0
+        self.render_time = LatencyHistogram()
+
+        self._sockets = []
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """
+        open the sockets and start serving
+
+        Returns:
+            True if at least one socket is listening
+        """
+        if self.unix_path:
+            try:
+                self._remove_stale_socket()
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.bind(self.unix_path)
+                sock.listen(4)
+                self._sockets.append(sock)
+                print(f"Metrics: unix:{self.unix_path}")
+            except OSError as e:
+                print(f"Metrics: could not listen on {self.unix_path}: {e}")
+        if self.tcp_port is not None:
+            try:
+                sock = socket.create_server((self.tcp_host, self.tcp_port))
+                self._sockets.append(sock)
+                self.tcp_address = sock.getsockname()
+                print(f"Metrics: http://{self.tcp_host}:{self.tcp_address[1]}/metrics")
+            except OSError as e:
+                print(f"Metrics: could not listen on {self.tcp_host}:{self.tcp_port}: {e}")
+        if not self._sockets:
+            return False
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+        self._thread.start()
+        return True
+
+    def _remove_stale_socket(self):
+        # left behind by a previous run that didn't shut down cleanly
+        try:
+            if stat.S_ISSOCK(os.lstat(self.unix_path).st_mode):
+                os.unlink(self.unix_path)
+        except FileNotFoundError:
+            pass
+
+    def _run(self):
+        # threads inherit the control process's SCHED_FIFO (--control-fifo);
+        # scraping must never compete with the loop for the CPU
+        try:
+            os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (OSError, AttributeError):
+            pass
+
+        selector = selectors.DefaultSelector()
+        for sock in self._sockets:
+            selector.register(sock, selectors.EVENT_READ)
+        while self._running:
+            for key, _ in selector.select(timeout=0.5):
+                try:
+                    conn, _ = key.fileobj.accept()
+                except OSError:
+                    continue
+                with conn:
+                    try:
+                        self._serve(conn)
+                    except OSError:
+                        self.errors += 1
+        selector.close()
+
+    def _serve(self, conn):
+        # one request per connection, HTTP/1.0 style
+        conn.settimeout(1.0)
+        request = b""
+        while b"\r\n\r\n" not in request and b"\n\n" not in request:
+            chunk = conn.recv(1024)
+            if not chunk:
+                break
+            request += chunk
+            if len(request) > MAX_REQUEST:
+                break
+        parts = request.split(b"\r\n", 1)[0].split()
+        path = parts[1].decode("latin-1") if len(parts) > 1 else "/"
+
+        if path.split("?")[0] not in ("/", "/metrics"):
+            status, body = "404 Not Found", "not found\n"
+        else:
+            start = time.perf_counter()
+            body = self.render()
+            self.render_time.record(time.perf_counter() - start)
+            status = "200 OK"
+            self.scrapes += 1
+
+        payload = body.encode()
+        conn.sendall(f"HTTP/1.0 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n"
+                     .encode() + payload)
+
+    def report(self):
+        h = self.render_time
+        print(f"Metrics: {self.scrapes} scrapes, {self.errors} errors, render "
+              f"p50 {h.percentile(50) * 1000:.2f}ms  max {h.max() * 1000:.2f}ms")
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        for sock in self._sockets:
+            sock.close()
+        self._sockets = []
+        if self.unix_path:
+            try:
+                os.unlink(self.unix_path)
+            except OSError:
+                pass
+
+
+def scrape(unix_path=DEFAULT_SOCKET, tcp_port=None, tcp_host="127.0.0.1", timeout=2.0):
+    """
+    fetch /metrics the way a collector would
+
+    Returns:
+        (status line, body text)
+    """
+    if tcp_port is not None:
+        sock = socket.create_connection((tcp_host, tcp_port), timeout=timeout)
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(unix_path)
+    with sock:
+        sock.sendall(b"GET /metrics HTTP/1.0\r\nHost: localhost\r\n\r\n")
+        response = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.split(b"\r\n", 1)[0].decode(), body.decode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="scrape the robot's metrics endpoint")
+    parser.add_argument("socket", nargs="?", default=DEFAULT_SOCKET)
+    parser.add_argument("--port", type=int, default=None, help="scrape localhost TCP instead")
+    args = parser.parse_args()
+
+    status, body = scrape(args.socket, args.port)
+    if not status.endswith("200 OK"):
+        raise SystemExit(status)
+    print(body, end="")
+
+
+if __name__ == "__main__":
+    main()
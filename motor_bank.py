@@ -0,0 +1,218 @@
+"""
+motor bank
+ramps any number of motor channels together: target/current speeds and
+accelerations live in contiguous arrays, the clock is read once per tick
+and every channel ramps with the same dt, then PWM writes go out in one batch
+"""
+import array
+import threading
+import time
+from gpio_backend import get_backend
+from latency import LatencyHistogram
+from motor_driver import MotorDriver
+
+
+class MotorChannel:
+    """per-motor handle with the same API Robot used on MotorDriver"""
+
+    def __init__(self, bank, index, driver):
+        self.bank = bank
+        self.index = index
+        self.driver = driver
+        self.name = driver.name
+
+    @property
+    def current_speed(self):
+        return self.bank.current[self.index]
+
+    @property
+    def target_speed(self):
+        return self.bank.target[self.index]
+
+    @property
+    def acceleration(self):
+        return self.bank.acceleration[self.index]
+
+    def set_speed(self, speed, input_stamp=None):
+        self.bank.set_speed(self.index, speed, input_stamp)
+
+    def set_speed_instant(self, speed):
+        self.bank.set_speed_instant(self.index, speed)
+
+    def set_acceleration(self, acceleration):
+        self.bank.acceleration[self.index] = max(1, acceleration)
+
+    def stop(self):
+        """stop the motor (ramped)"""
+        self.bank.set_speed(self.index, 0)
+
+    def emergency_stop(self):
+        """emergency stop - no ramping"""
+        self.bank.emergency_stop(self.index)
+
+    def get_write_stats(self):
+        return self.driver.get_write_stats()
+
+    def cleanup(self):
+        self.driver.cleanup()
+
+
+class MotorBank:
+    def __init__(self, gpio=None, clock=time.monotonic, timers=None):
+        """
+        initialize an empty motor bank
+
+        Args:
+            gpio: GPIO backend passed to each MotorDriver (default = selected backend)
+            clock: time source, read once per update()
+            timers: profiling.StageTimers to record "ramp" and "pwm" time in
+        """
+        self.gpio = gpio if gpio is not None else get_backend()
+        self.clock = clock
+        self.timers = timers
+
+        # hardware side (pins, PWM, dirty tracking) stays in MotorDriver
+        self.drivers = []
+        self.channels = []
+
+        # ramp state, index = channel
+        self.target = array.array('d')
+        self.current = array.array('d')
+        self.acceleration = array.array('d')
+
+        self.last_update_time = clock()
+
+        # held around ramp + PWM writes, so a stop from another thread (watchdog)
+        # can't be overwritten by a ramp step computed before it
+        self.lock = threading.Lock()
+
+        # backends with bulk pin writes (gpiomem) cut every motor pin in
+        # stop_all() with one register write before the per-driver cleanup
+        self.bulk_stop = hasattr(self.gpio, "clear_masks")
+        self.stop_masks = (0, 0)
+        # for stops that stopped something, from stop_all() entry:
+        #   stop_latency   every driver's PWM duty zeroed, pins stay LOW from here on
+        #   clear_latency  bulk register clear written (pins LOW, but software
+        #                  PWM can still raise them until its duty is zeroed)
+        self.stop_latency = LatencyHistogram()
+        self.clear_latency = LatencyHistogram()
+
+    def add_motor(self, rpwm_pin, lpwm_pin, name="Motor", acceleration=300):
+        """
+        add a motor channel
+
+        Returns:
+            MotorChannel handle for the new motor
+        """
+        driver = MotorDriver(rpwm_pin, lpwm_pin, name, acceleration, gpio=self.gpio)
+        channel = MotorChannel(self, len(self.drivers), driver)
+        self.drivers.append(driver)
+        self.channels.append(channel)
+        self.target.append(0.0)
+        self.current.append(0.0)
+        self.acceleration.append(max(1, acceleration))
+        if self.bulk_stop:
+            self.stop_masks = self.gpio.pin_masks(
+                [pin for d in self.drivers for pin in (d.rpwm_pin, d.lpwm_pin)])
+        return channel
+
+    def set_speed(self, index, speed, input_stamp=None):
+        speed = max(-100, min(100, speed))
+        if input_stamp is not None and speed != self.target[index]:
+            self.drivers[index].pending_stamp = input_stamp
+        self.target[index] = speed
+
+    def set_speed_instant(self, index, speed):
+        speed = max(-100, min(100, speed))
+        with self.lock:
+            self.target[index] = speed
+            self.current[index] = speed
+            self.drivers[index]._set_speed_instant(speed)
+
+    def update(self):
+        """ramp every channel toward its target with one shared dt"""
+        with self.lock:
+            self._update()
+
+    def _update(self):
+        start = time.perf_counter()
+        now = self.clock()
+        dt = now - self.last_update_time
+        self.last_update_time = now
+        if dt <= 0:
+            return
+
+        target = self.target
+        current = self.current
+        acceleration = self.acceleration
+        changed = []
+
+        for i in range(len(current)):
+            diff = target[i] - current[i]
+            if diff == 0:
+                continue
+            max_change = acceleration[i] * dt
+            if abs(diff) <= max_change:
+                current[i] = target[i]
+            elif diff > 0:
+                current[i] += max_change
+            else:
+                current[i] -= max_change
+            changed.append(i)
+
+        ramped = time.perf_counter()
+
+        # batch the PWM writes after the ramp pass
+        drivers = self.drivers
+        for i in changed:
+            drivers[i]._set_speed_instant(current[i])
+
+        if self.timers is not None:
+            self.timers.record("ramp", ramped - start)
+            self.timers.record("pwm", time.perf_counter() - ramped)
+
+    def emergency_stop(self, index):
+        with self.lock:
+            self.target[index] = 0
+            self.current[index] = 0
+            self.drivers[index].emergency_stop()
+
+    def stop_all(self):
+        """emergency stop every channel (safe to call from any thread)"""
+        start = time.perf_counter()
+        with self.lock:
+            drivers = self.drivers
+            stopping = not all(driver.pins_forced_low for driver in drivers)
+            if self.bulk_stop:
+                # always written - one store, and it also undoes any stray HIGH
+                self.gpio.clear_masks(self.stop_masks)
+                cleared = time.perf_counter()
+            for i in range(len(drivers)):
+                self.target[i] = 0
+                self.current[i] = 0
+            for driver in drivers:
+                driver.emergency_stop(pins_low=self.bulk_stop)
+            stopped = time.perf_counter()
+        if stopping:
+            self.stop_latency.record(stopped - start)
+            if self.bulk_stop:
+                self.clear_latency.record(cleared - start)
+
+    def report_stops(self):
+        h = self.stop_latency
+        method = "bulk register clear" if self.bulk_stop else "per-pin writes"
+        print(f"Stop latency ({method}): {h.count} stops")
+        if not h.count:
+            return
+        print(f"  stop_all -> all PWM duties zeroed:  p50 {h.percentile(50) * 1e6:.0f}us  "
+              f"p99 {h.percentile(99) * 1e6:.0f}us  max {h.max() * 1e6:.0f}us")
+        if self.bulk_stop:
+            c = self.clear_latency
+            print(f"  stop_all -> register clear written: p50 {c.percentile(50) * 1e6:.0f}us  "
+                  f"p99 {c.percentile(99) * 1e6:.0f}us  max {c.max() * 1e6:.0f}us "
+                  f"(software PWM may raise pins again until its duty is zeroed)")
+
+    def cleanup(self):
+        with self.lock:
+            for driver in self.drivers:
+                driver.cleanup()
@@ -2,11 +2,13 @@
 motor driver class for BTS7960 motor controllers
 controls one motor
 """
-import RPi.GPIO as GPIO
 import time
+from gpio_backend import get_backend, LOW
+
+PWM_FREQUENCY = 10000
 
 class MotorDriver:
-    def __init__(self, rpwm_pin, lpwm_pin, name="Motor", acceleration=300):
+    def __init__(self, rpwm_pin, lpwm_pin, name="Motor", acceleration=300, gpio=None):
         """
         initialize motor driver.
         
@@ -14,10 +16,12 @@ class MotorDriver:
             rpwm_pin: GPIO pin for forward control (RPWM on BTS7960)
             lpwm_pin: GPIO pin for reverse control (LPWM on BTS7960)
             name: Name for this motor (for debugging)
+            gpio: GPIO backend (default = gpio_backend.get_backend())
         """
         self.rpwm_pin = rpwm_pin
         self.lpwm_pin = lpwm_pin
         self.name = name
+        self.gpio = gpio if gpio is not None else get_backend()
         
         self.acceleration = acceleration
         
@@ -25,35 +29,81 @@ class MotorDriver:
         self.current_speed = 0
         self.target_speed = 0
         self.last_update_time = time.time()
+
+        # RPi.GPIO software PWM times the on-period in whole microseconds,
+        # so at 10kHz (100us period) duty only changes in 1% steps
+        self.pwm_frequency = PWM_FREQUENCY
+        self.duty_resolution = 100.0 * self.pwm_frequency / 1e6
+
+        # last duty actually written per channel, so unchanged writes are skipped
+        self.forward_duty = 0
+        self.reverse_duty = 0
+        self.pins_forced_low = False
+
+        # write counters (hardware calls issued vs skipped as redundant)
+        self.writes_issued = 0
+        self.writes_suppressed = 0
+
+        # latency.InputStamp of the input whose target hasn't reached the pins yet
+        self.pending_stamp = None
         
         # setup GPIO pins
-        GPIO.setup(rpwm_pin, GPIO.OUT)
-        GPIO.setup(lpwm_pin, GPIO.OUT)
+        self.gpio.setup(rpwm_pin)
+        self.gpio.setup(lpwm_pin)
         
         # create PWM objects (1000 Hz frequency)
-        self.pwm_forward = GPIO.PWM(rpwm_pin, 10000)
-        self.pwm_reverse = GPIO.PWM(lpwm_pin, 10000)
+        self.pwm_forward = self.gpio.PWM(rpwm_pin, self.pwm_frequency)
+        self.pwm_reverse = self.gpio.PWM(lpwm_pin, self.pwm_frequency)
         
         # start PWM at 0% duty cycle
         self.pwm_forward.start(0)
         self.pwm_reverse.start(0)
         
+    def _quantize_duty(self, duty):
+        """truncate duty to the PWM resolution, the same way RPi.GPIO does"""
+        return int(duty / self.duty_resolution) * self.duty_resolution
+
+    def _write_forward(self, duty):
+        duty = self._quantize_duty(duty)
+        if duty == self.forward_duty:
+            self.writes_suppressed += 1
+            return
+        self.pwm_forward.ChangeDutyCycle(duty)
+        self.forward_duty = duty
+        self.pins_forced_low = False
+        self.writes_issued += 1
+
+    def _write_reverse(self, duty):
+        duty = self._quantize_duty(duty)
+        if duty == self.reverse_duty:
+            self.writes_suppressed += 1
+            return
+        self.pwm_reverse.ChangeDutyCycle(duty)
+        self.reverse_duty = duty
+        self.pins_forced_low = False
+        self.writes_issued += 1
+
     def _set_speed_instant(self, speed):
         # clamp speed to valid range
         speed = max(-100, min(100, speed))
+        writes_before = self.writes_issued
         
         if speed > 0:
             # forward
-            self.pwm_reverse.ChangeDutyCycle(0)
-            self.pwm_forward.ChangeDutyCycle(speed)
+            self._write_reverse(0)
+            self._write_forward(speed)
         elif speed < 0:
             # reverse
-            self.pwm_forward.ChangeDutyCycle(0)
-            self.pwm_reverse.ChangeDutyCycle(abs(speed))
+            self._write_forward(0)
+            self._write_reverse(abs(speed))
         else:
             # stop
-            self.pwm_forward.ChangeDutyCycle(0)
-            self.pwm_reverse.ChangeDutyCycle(0)
+            self._write_forward(0)
+            self._write_reverse(0)
+
+        if self.pending_stamp is not None and self.writes_issued != writes_before:
+            self.pending_stamp.pwm_written()
+            self.pending_stamp = None
             
     def update(self):
         if self.current_speed == self.target_speed:
@@ -80,8 +130,18 @@ class MotorDriver:
             
         self._set_speed_instant(self.current_speed)
     
-    def set_speed(self, speed):
-        self.target_speed = max(-100, min(100, speed))
+    def set_speed(self, speed, input_stamp=None):
+        """
+        set target speed, reached by ramping in update()
+
+        Args:
+            speed: -100 to 100
+            input_stamp: latency.InputStamp of the input that caused this change
+        """
+        speed = max(-100, min(100, speed))
+        if input_stamp is not None and speed != self.target_speed:
+            self.pending_stamp = input_stamp
+        self.target_speed = speed
         
     def set_speed_instant(self, speed):
         speed = max(-100, min(100, speed))
@@ -96,14 +156,38 @@ class MotorDriver:
         """stop the motor"""
         self.set_speed(0)
     
-    def emergency_stop(self):
-        """emergency stop - no ramping"""
+    def emergency_stop(self, pins_low=False):
+        """
+        emergency stop - no ramping
+
+        Args:
+            pins_low: both pins were already driven LOW by a bulk register
+                      write (MotorBank.stop_all), only the PWM duty is left
+        """
         self.target_speed = 0
         self.current_speed = 0
-        self.pwm_forward.ChangeDutyCycle(0)
-        self.pwm_reverse.ChangeDutyCycle(0)
-        GPIO.output(self.rpwm_pin, GPIO.LOW)
-        GPIO.output(self.lpwm_pin, GPIO.LOW)
+        if self.pins_forced_low:
+            # already stopped and nothing written since - all four calls are redundant
+            self.writes_suppressed += 4
+            return
+        self._write_forward(0)
+        self._write_reverse(0)
+        if pins_low:
+            self.writes_suppressed += 2
+        else:
+            self.gpio.output(self.rpwm_pin, LOW)
+            self.gpio.output(self.lpwm_pin, LOW)
+            self.writes_issued += 2
+        self.pins_forced_low = True
+
+    def get_write_stats(self):
+        """
+        get PWM write counters
+
+        Returns:
+            (writes_issued, writes_suppressed)
+        """
+        return self.writes_issued, self.writes_suppressed
     
     
     def cleanup(self):
@@ -0,0 +1,140 @@
+"""
+loop profiling
+per-stage tick timers that are always on (a perf_counter pair and a
+histogram increment per stage), and a sampling profiler that only runs when
+asked for and writes collapsed stacks for flamegraph.pl / speedscope
+
+    kill -USR1 <pid>    dump the stage timer histograms
+    kill -USR2 <pid>    start the sampling profiler (again to stop it early)
+"""
+import os
+import sys
+import threading
+import time
+from latency import LatencyHistogram
+
+STAGES = ("input", "ramp", "pwm", "steering", "log", "feedback", "tick")
+
+
+class StageTimers:
+    def __init__(self, stages=STAGES):
+        """initialize one histogram per loop stage"""
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+
+    def record(self, stage, seconds):
+        self.histograms[stage].record(seconds)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def get_stats(self):
+        """
+        Returns:
+            dict of stage -> {count, p50_ms, p99_ms, max_ms, mean_ms, total_ms}
+        """
+        stats = {}
+        for stage, histogram in self.histograms.items():
+            stats[stage] = {
+                "count": histogram.count,
+                "p50_ms": histogram.percentile(50) * 1000,
+                "p99_ms": histogram.percentile(99) * 1000,
+                "max_ms": histogram.max() * 1000,
+                "mean_ms": histogram.mean() * 1000,
+                "total_ms": histogram.total_us / 1000,
+            }
+        return stats
+
+    def report(self):
+        """print per-stage p50/p99/max and total time spent"""
+        print("Loop stage timers:")
+        for stage, s in self.get_stats().items():
+            print(f"  {stage:9s} n={s['count']:7d}  p50 {s['p50_ms']:7.3f}ms  "
+                  f"p99 {s['p99_ms']:7.3f}ms  max {s['max_ms']:7.3f}ms  "
+                  f"total {s['total_ms'] / 1000:8.2f}s")
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, output_dir="/tmp", interval=0.005, duration=30.0):
+        """
+        initialize profiler (nothing runs until start())
+
+        Args:
+            output_dir: where collapsed-stack files are written
+            interval: seconds between samples
+            duration: stop automatically after this many seconds
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.duration = duration
+        self._thread = None
+        self._stop = threading.Event()
+        self.last_path = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def toggle(self):
+        """start sampling, or stop early if already running"""
+        if self.is_running():
+            self.stop()
+        else:
+            self.start()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=False):
+        """
+        Args:
+            wait: block until the collapsed stacks have been written
+        """
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join(timeout=5.0)
+
+    def _run(self):
+        counts = {}
+        names = {}
+        own_id = threading.get_ident()
+        samples = 0
+        start = time.monotonic()
+        end = start + self.duration
+        print(f"Profiler: sampling every {self.interval * 1000:.1f}ms for up to {self.duration:.0f}s")
+
+        while not self._stop.is_set() and time.monotonic() < end:
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                key = ";".join(reversed(stack))
+                counts[key] = counts.get(key, 0) + 1
+            samples += 1
+            self._stop.wait(self.interval)
+
+        elapsed = time.monotonic() - start
+        path = os.path.join(self.output_dir,
+                            f"robot-profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        try:
+            with open(path, "w") as f:
+                for key, count in sorted(counts.items()):
+                    f.write(f"{key} {count}\n")
+        except OSError as e:
+            print(f"Profiler: could not write {path}: {e}")
+            return
+        self.last_path = path
+        print(f"Profiler: {samples} samples over {elapsed:.1f}s written to {path}")
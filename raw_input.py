@@ -0,0 +1,61 @@
+"""
+raw input_event reader
+reads many struct input_event records from an evdev file descriptor with one
+os.readv() into a reusable buffer and decodes them with a precompiled
+struct, instead of evdev.InputDevice.read() building an InputEvent object
+per event
+
+events come out as (sec, usec, type, code, value) tuples
+"""
+import errno
+import os
+import struct
+
+# struct input_event: struct timeval (two C longs), __u16 type, __u16 code,
+# __s32 value - 24 bytes on 64-bit, 16 on 32-bit Raspberry Pi OS
+INPUT_EVENT = struct.Struct("@llHHi")
+
+
+class RawEventReader:
+    def __init__(self, fd, batch_size=64, recorder=None):
+        """
+        initialize reader
+
+        Args:
+            fd: open (non-blocking) evdev file descriptor - evdev still opens,
+                grabs and closes the device, this only reads from it
+            batch_size: max events per read() call
+            recorder: event_recording.EventRecorder to append every event to
+        """
+        self.fd = fd
+        self.batch_size = batch_size
+        self.recorder = recorder
+        self.buffer = bytearray(batch_size * INPUT_EVENT.size)
+        self.view = memoryview(self.buffer)
+        self._buffers = [self.buffer]
+        self.reads = 0
+        self.events = 0
+
+    def read(self):
+        """
+        read the events that are waiting
+
+        Returns:
+            iterator of (sec, usec, type, code, value), valid until the next read()
+
+        Raises:
+            BlockingIOError: nothing to read
+            OSError: device gone (ENODEV, like evdev)
+        """
+        n = os.readv(self.fd, self._buffers)
+        if n == 0:
+            raise OSError(errno.ENODEV, "input device closed")
+        n -= n % INPUT_EVENT.size
+        self.reads += 1
+        self.events += n // INPUT_EVENT.size
+        data = self.view[:n]
+        if self.recorder is not None:
+            for sec, usec, event_type, code, value in INPUT_EVENT.iter_unpack(data):
+                self.recorder.write_values(sec, usec, event_type, code, value)
+            self.recorder.flush()
+        return INPUT_EVENT.iter_unpack(data)
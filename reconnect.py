@@ -0,0 +1,225 @@
+"""
+controller reconnection manager
+watches /dev/input with inotify so the loop resumes as soon as the Joy-Con's
+event node appears, and falls back to bluetoothctl (with a cached MAC address
+and jittered exponential backoff) in the background
+"""
+import ctypes
+import ctypes.util
+import os
+import random
+import select
+import struct
+import subprocess
+import threading
+import time
+
+# inotify(7) constants
+IN_ATTRIB = 0x00000004
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+INOTIFY_EVENT = struct.Struct("iIII")   # wd, mask, cookie, len
+
+
+class DirectoryWatcher:
+    """
+    reports names created in a directory
+    uses inotify on linux, polls the directory listing elsewhere
+    """
+
+    def __init__(self, path, poll_interval=0.1):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.fd = None
+        self._known = None
+
+        libc_name = ctypes.util.find_library("c")
+        try:
+            libc = ctypes.CDLL(libc_name, use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            # udev creates the node, then fixes its permissions (IN_ATTRIB)
+            wd = libc.inotify_add_watch(fd, os.fsencode(path), IN_CREATE | IN_ATTRIB | IN_MOVED_TO)
+            if wd < 0:
+                os.close(fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch {path} failed")
+            self.fd = fd
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), polling {path}")
+            self._known = self._listing()
+
+    def _listing(self):
+        try:
+            return set(os.listdir(self.path))
+        except OSError:
+            return set()
+
+    def wait(self, timeout):
+        """
+        wait for new entries
+
+        Args:
+            timeout: max seconds to wait
+
+        Returns:
+            list of names created/changed (empty on timeout)
+        """
+        if self.fd is None:
+            return self._poll(timeout)
+
+        readable, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 4096)
+        except BlockingIOError:
+            return []
+
+        names = []
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def _poll(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._listing()
+            new = current - self._known
+            self._known = current
+            if new:
+                return sorted(new)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            time.sleep(min(self.poll_interval, remaining))
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def run_bluetoothctl(*args, timeout=10):
+    """run bluetoothctl and return its stdout ("" on failure)"""
+    try:
+        result = subprocess.run(["bluetoothctl", *args],
+                                capture_output=True, text=True, timeout=timeout)
+        return result.stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"bluetoothctl {' '.join(args)} failed: {e}")
+        return ""
+
+
+class ReconnectManager:
+    def __init__(self, open_controller, dev_input_dir="/dev/input",
+                 device_name="joy-con (r)", backoff_base=0.5, backoff_max=8.0,
+                 bluetoothctl=run_bluetoothctl, watcher=None):
+        """
+        initialize reconnection manager
+
+        Args:
+            open_controller: callable returning a connected controller, raises if not found
+            dev_input_dir: directory to watch for new event nodes
+            device_name: bluetooth device name to look up the MAC address (lowercase)
+            backoff_base: first bluetoothctl retry delay in seconds
+            backoff_max: cap on the retry delay
+            bluetoothctl: function(*args, timeout=...) -> stdout, replaceable for testing
+                          (None = never run bluetoothctl)
+            watcher: DirectoryWatcher to use (default = watch dev_input_dir)
+        """
+        self.open_controller = open_controller
+        self.dev_input_dir = dev_input_dir
+        self.device_name = device_name
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bluetoothctl = bluetoothctl
+        self.watcher = watcher if watcher is not None else DirectoryWatcher(dev_input_dir)
+
+        # cached after the first successful scan so reconnects skip `devices`
+        self.mac_address = None
+
+        self.reconnects = 0
+        self.fallback_attempts = 0
+        self.last_recovery_time = None
+
+        self._fallback_thread = None
+
+    def backoff_delay(self, attempt):
+        """jittered exponential backoff: 50-100% of min(max, base * 2^attempt)"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _try_open(self):
+        try:
+            return self.open_controller()
+        except Exception:
+            return None
+
+    def wait_for_controller(self):
+        """
+        block until the controller can be opened
+
+        Returns:
+            the connected controller
+        """
+        start = time.monotonic()
+        attempt = 0
+        next_fallback = start
+
+        while True:
+            controller = self._try_open()
+            if controller is not None:
+                self.reconnects += 1
+                self.last_recovery_time = time.monotonic() - start
+                print(f"Controller connected after {self.last_recovery_time:.3f}s")
+                return controller
+
+            now = time.monotonic()
+            if now >= next_fallback:
+                self._start_fallback()
+                next_fallback = now + self.backoff_delay(attempt)
+                attempt += 1
+
+            # wake as soon as a node appears in /dev/input, or at the next fallback
+            self.watcher.wait(next_fallback - time.monotonic())
+
+    def _start_fallback(self):
+        """kick bluetoothctl in the background (never blocks the inotify path)"""
+        if self.bluetoothctl is None:
+            return
+        if self._fallback_thread is not None and self._fallback_thread.is_alive():
+            return
+        self.fallback_attempts += 1
+        self._fallback_thread = threading.Thread(target=self._bluetooth_connect,
+                                                 name="bt-reconnect", daemon=True)
+        self._fallback_thread.start()
+
+    def _bluetooth_connect(self):
+        if self.mac_address is None:
+            self.mac_address = self._find_mac_address()
+            if self.mac_address is None:
+                print("Joy-Con not found in paired devices")
+                return
+        print(f"Connecting to Joy-Con at {self.mac_address}...")
+        self.bluetoothctl("connect", self.mac_address)
+
+    def _find_mac_address(self):
+        for line in self.bluetoothctl("devices", timeout=5).split("\n"):
+            if self.device_name in line.lower():
+                parts = line.split()
+                if len(parts) >= 2:
+                    print(f"Found Joy-Con at {parts[1]}")
+                    return parts[1]
+        return None
+
+    def close(self):
+        self.watcher.close()
@@ -2,30 +2,45 @@
 robot control class
 manages 4 individual motors and actuator, uses differential steering
 """
-import RPi.GPIO as GPIO
-from motor_driver import MotorDriver
+from gpio_backend import get_backend
+from motor_bank import MotorBank
 # from differential_steering import DifferentialSteering
 # from four_direction_steering import FourDirectionJoystick as DifferentialSteering
 from eight_direction_steering import EightDirectionJoystick as DifferentialSteering
 from buzzer import Buzzer
+from steering_table import quantize_input
+from latency import LatencyTracker
+from profiling import StageTimers
+from robot_log import get_logger
+from telemetry import TelemetryWriter, MODES
 
 class Robot:
-    def __init__(self):
-        """initialize the device"""
-        GPIO.setmode(GPIO.BCM)
+    def __init__(self, steering_cache_dir=None):
+        """
+        initialize the device
+
+        Args:
+            steering_cache_dir: directory to cache the steering lookup table (None = build in memory)
+        """
+        # RPi.GPIO on the Pi, or the simulator (see gpio_backend.select_backend)
+        self.gpio = get_backend()
         
-        # initialize motor drivers
-        self.motor_front_left = MotorDriver(17, 4, "Front Left", 200)
-        self.motor_front_right = MotorDriver(15, 18, "Front Right", 200)
-        self.motor_rear_left = MotorDriver(5, 11, "Rear Left", 200)
-        self.motor_rear_right = MotorDriver(23, 24, "Rear Right", 200)
-        self.actuator = MotorDriver(19, 26, "Actuator", 200)
+        # always-on per-stage loop timers (dumped with SIGUSR1)
+        self.timers = StageTimers()
+
+        # initialize motor drivers - one bank ramps all channels together
+        self.motors = MotorBank(gpio=self.gpio, timers=self.timers)
+        self.motor_front_left = self.motors.add_motor(17, 4, "Front Left", 200)
+        self.motor_front_right = self.motors.add_motor(15, 18, "Front Right", 200)
+        self.motor_rear_left = self.motors.add_motor(5, 11, "Rear Left", 200)
+        self.motor_rear_right = self.motors.add_motor(23, 24, "Rear Right", 200)
+        self.actuator = self.motors.add_motor(19, 26, "Actuator", 200)
 
         # initialize buzzer pin
         self.buzzer = Buzzer(pin=27)
         
         # initialize differential steering algo
-        self.steering = DifferentialSteering(pivot_y_limit=25)
+        self.steering = DifferentialSteering(pivot_y_limit=25, table_cache_dir=steering_cache_dir)
         
         # speed limit (0-100)
         self.max_speed = 100
@@ -33,15 +48,52 @@ class Robot:
         # track actuator position (approximate)
         self.actuator_position = 0  # 0 = fully down, 100 = fully up
         self.actuator_limit = 18  # 18 inches of travel
+
+        # input-to-PWM latency histograms, fed by stamps passed to drive()
+        self.latency = LatencyTracker()
+
+        # per-tick shared-memory telemetry, off until enable_telemetry()
+        self.telemetry = None
+
+    def enable_telemetry(self, path):
+        """
+        publish per-tick state to a shared-memory ring (see telemetry.py)
+
+        Args:
+            path: ring file, normally under /dev/shm
+
+        Returns:
+            True if the ring was created
+        """
+        try:
+            self.telemetry = TelemetryWriter(path, motor_count=len(self.motors.drivers))
+        except OSError as e:
+            print(f"Telemetry disabled: {e}")
+            return False
+        print(f"Telemetry: {path}")
+        return True
+
+    def publish_telemetry(self, x, y, mode, tick_duration, timed_out):
+        """
+        write this tick's state to the telemetry ring (no-op when disabled)
+
+        Args:
+            x, y: stick values this tick
+            mode: "drive" or "hitch"
+            tick_duration: seconds the tick took
+            timed_out: command timeout active
+        """
+        if self.telemetry is None:
+            return
+        duties = [driver.forward_duty - driver.reverse_duty for driver in self.motors.drivers]
+        self.telemetry.publish(x, y, MODES.index(mode), tick_duration, timed_out,
+                               self.motors.target, self.motors.current, duties)
     
     def update(self):
-        self.motor_front_left.update()
-        self.motor_front_right.update()
-        self.motor_rear_left.update()
-        self.motor_rear_right.update()
-        self.actuator.update()
+        """apply acceleration ramping to all motors (one clock read, one dt)"""
+        self.motors.update()
         
-    def drive(self, x_input, y_input):
+    def drive(self, x_input, y_input, input_stamp=None):
         """
         drive the robot using differential steering
         
@@ -52,17 +104,26 @@ class Robot:
             y_input: Forward/backward value (-100 to 100)
                     negative = reverse
                     positive = forward
+            input_stamp: (kernel_time, read_time) from BluetoothController.take_input_stamp(),
+                         tracked through to the first motor PWM write
         """
-        # speed limit
-        y_input = y_input * self.max_speed / 100
+        # speed limit, quantized back onto the integer grid so the
+        # steering lookup table stays exact (e.g. 61 at 50% -> 31)
+        x_input = quantize_input(x_input)
+        y_input = quantize_input(y_input * self.max_speed / 100)
         
         # compute motor speeds using differential steering algo
         left_speed, right_speed = self.steering.compute_motors(x_input, y_input)
+
+        stamp = None
+        if input_stamp is not None:
+            stamp = self.latency.stamp(*input_stamp)
+            stamp.steering_done()
         
-        self.motor_front_left.set_speed(left_speed)
-        self.motor_rear_left.set_speed(left_speed)
-        self.motor_front_right.set_speed(-right_speed)
-        self.motor_rear_right.set_speed(-right_speed)
+        self.motor_front_left.set_speed(left_speed, stamp)
+        self.motor_rear_left.set_speed(left_speed, stamp)
+        self.motor_front_right.set_speed(-right_speed, stamp)
+        self.motor_rear_right.set_speed(-right_speed, stamp)
     
     def set_max_speed(self, speed_percent):
         """
@@ -72,7 +133,7 @@ class Robot:
             speed_percent: 0-100, percentage of full speed
         """
         self.max_speed = max(0, min(100, speed_percent))
-        print(f"Max speed set to {self.max_speed}%")
+        get_logger().log("Max speed set to {}%", self.max_speed)
     
     def set_drive_acceleration(self, acceleration):
         self.motor_front_left.set_acceleration(acceleration)
@@ -106,19 +167,13 @@ class Robot:
     
     def stop_all(self):
         """emergency stop - stop all motors immediately"""
-        self.motor_front_left.emergency_stop()
-        self.motor_front_right.emergency_stop()
-        self.motor_rear_left.emergency_stop()
-        self.motor_rear_right.emergency_stop()
-        self.actuator.emergency_stop()
+        self.motors.stop_all()
     
     def cleanup(self):
         """clean up GPIO pins."""
-        self.motor_front_left.cleanup()
-        self.motor_front_right.cleanup()
-        self.motor_rear_left.cleanup()
-        self.motor_rear_right.cleanup()
-        self.actuator.cleanup()
+        self.motors.cleanup()
         self.buzzer.cleanup()
-        GPIO.cleanup()
+        if self.telemetry is not None:
+            self.telemetry.close()
+        self.gpio.cleanup()
         print("GPIO cleanup complete")
@@ -0,0 +1,201 @@
+"""
+off-thread logging for the control loop
+records go into a preallocated ring buffer and a background thread formats
+and writes them, so logging never blocks a control tick. per-key rate limits
+and change-only emission keep the per-tick stream small; when the ring is
+full new records are dropped (and counted) instead of stalling the loop.
+after close() there is no writer thread, so records are written directly
+"""
+import sys
+import threading
+import time
+
+
+class RingLogger:
+    def __init__(self, capacity=256, stream=None, flush_interval=0.05):
+        """
+        initialize logger and start its writer thread
+
+        Args:
+            capacity: ring buffer slots
+            stream: where formatted lines go (default sys.stdout)
+            flush_interval: how often the writer thread drains the ring, in seconds
+        """
+        self.capacity = capacity
+        self.stream = stream
+        self.flush_interval = flush_interval
+
+        # preallocated slots of (template, args); head = next write, tail = next read
+        self._slots = [None] * capacity
+        self._head = 0
+        self._tail = 0
+        self._lock = threading.Lock()   # producers (loop thread + helpers)
+        self._overflow = []   # critical records that found the ring full
+        self._closed = False
+
+        # per-key limits: key -> min seconds between records
+        self._min_interval = {}
+        self._last_emit = {}
+        self._last_args = {}
+
+        self.written = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.unchanged = 0
+
+        self._wake = threading.Event()
+        self._drained = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="robot-log", daemon=True)
+        self._thread.start()
+
+    def set_rate_limit(self, key, min_interval):
+        """emit at most one record per min_interval seconds for key"""
+        self._min_interval[key] = min_interval
+
+    def log(self, template, *args, key=None):
+        """
+        queue a record, formatted later with template.format(*args)
+
+        Args:
+            template: str.format template (e.g. "L={:3d}")
+            args: values for the template - pass values, not pre-formatted strings
+            key: rate-limit key (see set_rate_limit), None = never limited
+
+        Returns:
+            True if queued, False if rate limited or dropped
+        """
+        if key is not None:
+            interval = self._min_interval.get(key)
+            if interval is not None:
+                now = time.monotonic()
+                if now - self._last_emit.get(key, -interval) < interval:
+                    self.rate_limited += 1
+                    return False
+                self._last_emit[key] = now
+        return self._push(template, args)
+
+    def log_change(self, key, template, *args):
+        """queue a record only if args differ from the last one queued for key"""
+        if self._last_args.get(key) == args:
+            self.unchanged += 1
+            return False
+        if self.log(template, *args, key=key):
+            self._last_args[key] = args
+            return True
+        return False
+
+    def critical(self, template, *args):
+        """
+        log a record that must not be lost (shutdown, disconnect, errors)
+        the writer thread is woken to write it now; the caller doesn't wait
+        """
+        self._push(template, args, keep=True)
+        self._wake.set()
+
+    def _push(self, template, args, keep=False):
+        with self._lock:
+            if not self._closed:
+                head = self._head
+                if head - self._tail >= self.capacity:
+                    if keep:
+                        self._overflow.append((template, args))
+                        return True
+                    self.dropped += 1
+                    return False
+                self._slots[head % self.capacity] = (template, args)
+                self._head = head + 1
+                return True
+        # closed: no writer thread left, write in the caller
+        self._write([self._format(template, args)])
+        return True
+
+    def flush(self, timeout=1.0):
+        """block until everything queued so far has been written"""
+        target = self._head
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        with self._drained:
+            while (self._tail < target or self._overflow) and self._thread.is_alive():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._drained.wait(remaining)
+        return True
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+        self._drain()
+
+    @staticmethod
+    def _format(template, args):
+        try:
+            return template.format(*args)
+        except Exception as e:
+            return f"[log format error: {e}] {template!r} {args!r}"
+
+    def _drain(self):
+        with self._lock:
+            head = self._head
+            overflow, self._overflow = self._overflow, []
+        tail = self._tail
+        if tail == head and not overflow:
+            return
+        lines = []
+        while tail < head:
+            slot = tail % self.capacity
+            template, args = self._slots[slot]
+            self._slots[slot] = None
+            lines.append(self._format(template, args))
+            tail += 1
+        for template, args in overflow:
+            lines.append(self._format(template, args))
+        self._write(lines)
+        with self._drained:
+            self._tail = tail
+            self._drained.notify_all()
+
+    def _write(self, lines):
+        stream = self.stream or sys.stdout
+        try:
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+        except (OSError, ValueError):
+            pass
+        self.written += len(lines)
+
+    def close(self):
+        """
+        write everything still queued and stop the writer thread
+        records logged afterwards are written directly by the caller
+        """
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout=2.0)
+        with self._lock:
+            self._closed = True
+        if not self._thread.is_alive():
+            # anything queued between the thread's last drain and now
+            self._drain()
+
+    def get_stats(self):
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+            "unchanged": self.unchanged,
+        }
+
+
+_logger = None
+
+
+def get_logger():
+    """the process-wide logger, created on first use"""
+    global _logger
+    if _logger is None:
+        _logger = RingLogger()
+    return _logger
@@ -0,0 +1,147 @@
+"""
+startup timing
+hardware init and controller connection run in parallel at startup; this
+module starts the connection early and measures each phase from process
+start to the first accepted controller input
+"""
+import os
+import threading
+import time
+
+
+def process_age():
+    """
+    seconds since this process was started (from /proc), so interpreter
+    startup and imports are counted too
+
+    Returns:
+        seconds, or None if /proc isn't available
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # comm (field 2) may contain spaces, the rest follows the last ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    start_ticks = int(fields[19])     # field 22, starttime
+    return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+class StartupReport:
+    def __init__(self, clock=time.monotonic):
+        """start timing (call as early as possible in main)"""
+        self.clock = clock
+        now = clock()
+        age = process_age()
+        self.process_start = now - age if age is not None else now
+        self.phases = {}     # name -> [start, end], in the order begun
+        self.events = {}     # name -> time
+        self.phases["imports"] = [self.process_start, now]
+        self.done = False
+
+    def begin(self, name):
+        self.phases[name] = [self.clock(), None]
+
+    def end(self, name):
+        self.phases[name][1] = self.clock()
+
+    def phase(self, name):
+        """context manager timing one phase"""
+        return _Phase(self, name)
+
+    def mark(self, name):
+        """record a one-off event (first one wins)"""
+        self.events.setdefault(name, self.clock())
+
+    def first_input(self):
+        """
+        record the first accepted controller input
+
+        Returns:
+            the formatted report the first time, None afterwards
+        """
+        if self.done:
+            return None
+        self.done = True
+        self.mark("first input")
+        return self.format()
+
+    def total(self):
+        """seconds from process start to the first accepted input (None until then)"""
+        if "first input" not in self.events:
+            return None
+        return self.events["first input"] - self.process_start
+
+    def format(self):
+        ms = lambda t: (t - self.process_start) * 1000
+        lines = ["Startup (ms from process start):"]
+        for name, (start, end) in self.phases.items():
+            if end is None:
+                lines.append(f"  {name:16s} {ms(start):8.1f} -> (running)")
+            else:
+                lines.append(f"  {name:16s} {ms(start):8.1f} -> {ms(end):8.1f}  "
+                             f"({(end - start) * 1000:7.1f})")
+        for name, t in self.events.items():
+            lines.append(f"  {name:16s} {ms(t):8.1f}")
+        total = self.total()
+        if total is not None:
+            lines.append(f"  time to first input: {total:.3f}s")
+        return "\n".join(lines)
+
+
+class _Phase:
+    def __init__(self, report, name):
+        self.report = report
+        self.name = name
+
+    def __enter__(self):
+        self.report.begin(self.name)
+
+    def __exit__(self, *exc):
+        self.report.end(self.name)
+        return False
+
+
+class PrefetchedConnect:
+    """
+    starts connecting to the controller immediately on a background thread;
+    the first call hands over that result, later calls (reconnects) connect
+    directly
+    """
+
+    def __init__(self, connect, report=None):
+        """
+        Args:
+            connect: blocking callable returning a connected controller
+            report: StartupReport to record the "controller" phase in
+        """
+        self.connect = connect
+        self.report = report
+        self._result = None
+        self._error = None
+        self._pending = True
+        if report is not None:
+            report.begin("controller")
+        self._thread = threading.Thread(target=self._run, name="connect", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self._result = self.connect()
+        except BaseException as e:
+            self._error = e
+        if self.report is not None:
+            self.report.end("controller")
+
+    def __call__(self):
+        if not self._pending:
+            return self.connect()
+        self._thread.join()
+        self._pending = False
+        result, error = self._result, self._error
+        self._result = self._error = None
+        if error is not None:
+            raise error
+        return result
@@ -0,0 +1,173 @@
+"""
+steering sweep tool
+evaluates steering mappers over the whole joystick field offline
+
+usage:
+    python steering_sweep.py render eight               # print left/right fields
+    python steering_sweep.py render differential --csv field.csv
+    python steering_sweep.py diff eight four            # where two mappers disagree
+    python steering_sweep.py edges differential         # discontinuities in one mapper
+
+requires numpy (not needed on the robot itself)
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from differential_steering import DifferentialSteering
+from eight_direction_steering import EightDirectionJoystick
+from four_direction_steering import FourDirectionJoystick
+
+MAPPERS = {
+    "eight": EightDirectionJoystick,
+    "four": FourDirectionJoystick,
+    "differential": DifferentialSteering,
+}
+
+INPUT_RANGE = 100
+
+
+def make_mapper(name, pivot_y_limit):
+    # the batch path doesn't use the lookup table, so don't build it
+    return MAPPERS[name](pivot_y_limit=pivot_y_limit, use_table=False)
+
+
+def sweep(mapper):
+    """
+    evaluate a mapper at every integer joystick position
+
+    Returns:
+        (left, right): 201x201 int arrays, row 0 = full forward (y=100),
+                       column 0 = full left (x=-100)
+    """
+    axis = np.arange(-INPUT_RANGE, INPUT_RANGE + 1)
+    xs, ys = np.meshgrid(axis, axis[::-1])
+    return mapper.compute_motors_batch(xs, ys)
+
+
+def print_field(title, field, step):
+    """print a field sampled every step positions, y=100 at the top"""
+    print(f"\n{title}")
+    columns = range(0, field.shape[1], step)
+    print("   y\\x " + "".join(f"{c - INPUT_RANGE:5d}" for c in columns))
+    for row in range(0, field.shape[0], step):
+        y = INPUT_RANGE - row
+        print(f"  {y:4d} " + "".join(f"{field[row, c]:5d}" for c in columns))
+
+
+def print_mask(title, mask, step):
+    """print a coarse map of a boolean field: '#' if any point in the cell is set"""
+    print(f"\n{title}  ('#' = present, y=100 at top, x=-100 at left)")
+    for row in range(0, mask.shape[0], step):
+        line = ""
+        for col in range(0, mask.shape[1], step):
+            line += "#" if mask[row:row + step, col:col + step].any() else "."
+        print("  " + line)
+
+
+def write_csv(path, left, right):
+    axis = np.arange(-INPUT_RANGE, INPUT_RANGE + 1)
+    xs, ys = np.meshgrid(axis, axis[::-1])
+    rows = np.column_stack([xs.ravel(), ys.ravel(), left.ravel(), right.ravel()])
+    np.savetxt(path, rows, fmt="%d", delimiter=",", header="x,y,left,right", comments="")
+    print(f"Wrote {rows.shape[0]} points to {path}")
+
+
+def find_discontinuities(left, right, threshold):
+    """
+    find jumps between neighbouring joystick positions
+
+    Returns:
+        boolean 201x201 mask, True where a step of one unit in x or y
+        changes either motor by more than threshold
+    """
+    mask = np.zeros(left.shape, dtype=bool)
+    for field in (left, right):
+        jump_x = np.abs(np.diff(field, axis=1)) > threshold
+        jump_y = np.abs(np.diff(field, axis=0)) > threshold
+        mask[:, :-1] |= jump_x
+        mask[:, 1:] |= jump_x
+        mask[:-1, :] |= jump_y
+        mask[1:, :] |= jump_y
+    return mask
+
+
+def cmd_render(args):
+    left, right = sweep(make_mapper(args.mapper, args.pivot_y_limit))
+    if args.csv:
+        write_csv(args.csv, left, right)
+        return 0
+    print_field(f"{args.mapper}: LEFT motor", left, args.step)
+    print_field(f"{args.mapper}: RIGHT motor", right, args.step)
+    return 0
+
+
+def cmd_diff(args):
+    left_a, right_a = sweep(make_mapper(args.mapper_a, args.pivot_y_limit))
+    left_b, right_b = sweep(make_mapper(args.mapper_b, args.pivot_y_limit))
+
+    delta = np.maximum(np.abs(left_a - left_b), np.abs(right_a - right_b))
+    differ = delta > 0
+    total = delta.size
+
+    print(f"{args.mapper_a} vs {args.mapper_b}: "
+          f"{int(differ.sum())}/{total} positions differ "
+          f"({100.0 * differ.sum() / total:.1f}%), max difference {int(delta.max())}")
+    if differ.any():
+        print_mask("Differing positions", differ, args.step)
+    return 1 if differ.any() and args.fail_on_diff else 0
+
+
+def cmd_edges(args):
+    left, right = sweep(make_mapper(args.mapper, args.pivot_y_limit))
+    mask = find_discontinuities(left, right, args.threshold)
+
+    print(f"{args.mapper}: {int(mask.sum())} positions next to a jump > {args.threshold}")
+    rows, cols = np.nonzero(mask)
+    for row, col in list(zip(rows, cols))[:args.limit]:
+        print(f"  x={col - INPUT_RANGE:4d} y={INPUT_RANGE - row:4d} "
+              f"L={left[row, col]:4d} R={right[row, col]:4d}")
+    if len(rows) > args.limit:
+        print(f"  ... {len(rows) - args.limit} more")
+    if mask.any():
+        print_mask("Discontinuities", mask, args.step)
+    return 0
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--pivot-y-limit", type=int, default=25,
+                        help="pivot_y_limit passed to every mapper (default 25)")
+    common.add_argument("--step", type=int, default=10,
+                        help="sample spacing for printed maps (default 10)")
+
+    parser = argparse.ArgumentParser(description="offline steering mapper sweep")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    render = commands.add_parser("render", parents=[common], help="print a mapper's output field")
+    render.add_argument("mapper", choices=MAPPERS)
+    render.add_argument("--csv", metavar="PATH", help="write the full field as CSV instead")
+    render.set_defaults(func=cmd_render)
+
+    diff = commands.add_parser("diff", parents=[common], help="compare two mappers")
+    diff.add_argument("mapper_a", choices=MAPPERS)
+    diff.add_argument("mapper_b", choices=MAPPERS)
+    diff.add_argument("--fail-on-diff", action="store_true",
+                      help="exit with status 1 if the mappers differ anywhere")
+    diff.set_defaults(func=cmd_diff)
+
+    edges = commands.add_parser("edges", parents=[common], help="report discontinuities in a mapper")
+    edges.add_argument("mapper", choices=MAPPERS)
+    edges.add_argument("--threshold", type=int, default=20,
+                       help="minimum jump between neighbouring positions (default 20)")
+    edges.add_argument("--limit", type=int, default=20,
+                       help="max positions to list (default 20)")
+    edges.set_defaults(func=cmd_edges)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+precomputed steering lookup table
+maps every integer joystick position in [-100, 100] x [-100, 100] to
+(left, right) motor speeds so compute_motors is a single index
+"""
+import array
+import hashlib
+import inspect
+import os
+
+INPUT_RANGE = 100
+TABLE_WIDTH = 2 * INPUT_RANGE + 1   # 201 positions per axis
+
+# bump when the on-disk layout changes
+CACHE_VERSION = 1
+
+
+def quantize_input(value):
+    """
+    quantize a (possibly scaled) joystick value onto the table grid
+
+    rounds half away from zero so forward and reverse scale symmetrically
+    (python's round() is banker's rounding), then clamps to -100..100
+
+    Args:
+        value: joystick value, int or float
+
+    Returns:
+        int in range -100 to 100
+    """
+    if value >= 0:
+        value = int(value + 0.5)
+    else:
+        value = -int(-value + 0.5)
+    return max(-INPUT_RANGE, min(INPUT_RANGE, value))
+
+
+def source_hash(compute):
+    """
+    short hash of a steering function's source, stored in the cache header
+    so editing the function rebuilds its table instead of loading a stale one
+
+    Returns:
+        12 hex digits (of the bytecode if the source isn't available)
+    """
+    try:
+        source = inspect.getsource(compute).encode()
+    except (OSError, TypeError):
+        code = compute.__code__
+        source = code.co_code + repr(code.co_consts).encode()
+    return hashlib.sha1(source).hexdigest()[:12]
+
+
+class SteeringTable:
+    def __init__(self, left, right):
+        """
+        initialize lookup table from flat left/right arrays
+
+        Args:
+            left: array('b') of TABLE_WIDTH * TABLE_WIDTH left speeds, row = y, column = x
+            right: matching array('b') of right speeds
+        """
+        # one shared tuple per distinct output pair keeps the table small
+        # (8-direction only has ~800 distinct pairs) and lookups allocation-free
+        interned = {}
+        self.pairs = [interned.setdefault(pair, pair) for pair in zip(left, right)]
+        self.left = left
+        self.right = right
+
+    @classmethod
+    def build(cls, compute):
+        """
+        build a table by evaluating a steering function at every grid point
+
+        Args:
+            compute: function (x, y) -> (left, right) with int results in -100..100
+        """
+        left = array.array('b')
+        right = array.array('b')
+        for y in range(-INPUT_RANGE, INPUT_RANGE + 1):
+            for x in range(-INPUT_RANGE, INPUT_RANGE + 1):
+                l, r = compute(x, y)
+                left.append(l)
+                right.append(r)
+        return cls(left, right)
+
+    @classmethod
+    def load_or_build(cls, compute, key, cache_dir=None):
+        """
+        load a cached table from disk, or build it and write the cache
+
+        Args:
+            compute: steering function used when the cache is missing or stale
+            key: string identifying the mapper and its parameters (the cache
+                 file name; a hash of compute's source is added to the header)
+            cache_dir: directory for cached tables, None = no disk cache
+        """
+        if cache_dir is None:
+            return cls.build(compute)
+
+        path = os.path.join(cache_dir, f"{key}.lut")
+        header_key = f"{key} src{source_hash(compute)}"
+        table = cls.load(path, header_key)
+        if table is None:
+            table = cls.build(compute)
+            try:
+                table.save(path, header_key)
+            except OSError as e:
+                print(f"WARNING: could not write steering table cache {path}: {e}")
+        return table
+
+    @classmethod
+    def load(cls, path, key):
+        """
+        load a table written by save()
+
+        Returns:
+            SteeringTable, or None if the file is missing or doesn't match key
+        """
+        count = TABLE_WIDTH * TABLE_WIDTH
+        try:
+            with open(path, 'rb') as f:
+                header = f.readline()
+                body = f.read()
+        except OSError:
+            return None
+
+        if header != cls._header(key) or len(body) != 2 * count:
+            return None
+
+        left = array.array('b')
+        right = array.array('b')
+        left.frombytes(body[:count])
+        right.frombytes(body[count:])
+        return cls(left, right)
+
+    def save(self, path, key):
+        """write the table to disk (atomically, via a temp file)"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(self._header(key))
+            f.write(self.left.tobytes())
+            f.write(self.right.tobytes())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _header(key):
+        return f"steering-lut v{CACHE_VERSION} {key} {TABLE_WIDTH}\n".encode()
+
+    def lookup(self, x_value, y_value):
+        """
+        look up (left, right) for an on-grid joystick position
+
+        Returns:
+            (left, right), or None if the input is not an int in -100..100
+        """
+        if (type(x_value) is int and type(y_value) is int
+                and -INPUT_RANGE <= x_value <= INPUT_RANGE
+                and -INPUT_RANGE <= y_value <= INPUT_RANGE):
+            return self.pairs[(y_value + INPUT_RANGE) * TABLE_WIDTH + x_value + INPUT_RANGE]
+        return None
@@ -0,0 +1,207 @@
+"""
+joystick response curves
+turns raw stick values (±32767) into -100..100 drive values with per-axis
+calibration (center offset and range), a radial dead zone with rescaling,
+and an expo curve for fine control at low deflection. everything is
+compiled into integer lookup tables at startup, so a frame costs two
+table indexes, an isqrt and two multiplies
+
+usage:
+    python stick_response.py show --dead-zone 10 --expo 0.4   # print the curve
+    python stick_response.py calibrate stick.json              # measure the stick
+"""
+import argparse
+import array
+import json
+import math
+import time
+
+AXIS_MAX = 32767
+LUT_SHIFT = 4                        # Joy-Con sticks are 12 bit, so 4096 entries lose nothing
+LUT_SIZE = 65536 >> LUT_SHIFT
+SCALE = 1000                         # calibrated axis units (full deflection)
+GAIN_SHIFT = 16
+OUTPUT_MAX = 100
+
+
+class AxisCalibration:
+    def __init__(self, center=0, minimum=-AXIS_MAX, maximum=AXIS_MAX):
+        """
+        calibration for one stick axis
+
+        Args:
+            center: raw value at rest
+            minimum, maximum: raw values at full deflection
+        """
+        if not minimum < center < maximum:
+            raise ValueError(f"calibration needs minimum < center < maximum, "
+                             f"got {minimum}, {center}, {maximum}")
+        self.center = center
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def normalize(self, raw):
+        """raw value -> -SCALE..SCALE"""
+        offset = raw - self.center
+        if offset >= 0:
+            value = round(offset * SCALE / (self.maximum - self.center))
+        else:
+            value = round(offset * SCALE / (self.center - self.minimum))
+        return -SCALE if value < -SCALE else SCALE if value > SCALE else value
+
+    def to_dict(self):
+        return {"center": self.center, "min": self.minimum, "max": self.maximum}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["center"], data["min"], data["max"])
+
+
+def load_calibration(path):
+    """
+    Returns:
+        (x AxisCalibration, y AxisCalibration) from a file written by save_calibration
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return AxisCalibration.from_dict(data["x"]), AxisCalibration.from_dict(data["y"])
+
+
+def save_calibration(path, calibration_x, calibration_y):
+    with open(path, "w") as f:
+        json.dump({"x": calibration_x.to_dict(), "y": calibration_y.to_dict()}, f, indent=2)
+
+
+class StickResponse:
+    def __init__(self, dead_zone=10, expo=0.0, calibration_x=None, calibration_y=None,
+                 invert_y=True):
+        """
+        compile the lookup tables
+
+        Args:
+            dead_zone: radial dead zone in percent of full deflection; output
+                       is rescaled so it starts from 0 at the dead zone edge
+            expo: 0 = linear, up to 1 = cubic; higher gives finer control
+                  near center with the same full-scale output
+            calibration_x, calibration_y: AxisCalibration (default = full raw range)
+            invert_y: stick up reads negative, drive forward is positive
+        """
+        if not 0 <= dead_zone < 100:
+            raise ValueError(f"dead_zone must be 0-99 percent, got {dead_zone}")
+        if not 0.0 <= expo <= 1.0:
+            raise ValueError(f"expo must be 0.0-1.0, got {expo}")
+        self.dead_zone = dead_zone
+        self.expo = expo
+        self.calibration_x = calibration_x or AxisCalibration()
+        self.calibration_y = calibration_y or AxisCalibration()
+
+        # raw >> LUT_SHIFT (offset to 0) -> calibrated -SCALE..SCALE
+        self.axis_x = self._axis_table(self.calibration_x, 1)
+        self.axis_y = self._axis_table(self.calibration_y, -1 if invert_y else 1)
+
+        # radius -> output per calibrated unit, fixed point (<< GAIN_SHIFT)
+        inner = dead_zone * SCALE // 100
+        self.gain = array.array('l', [0] * (SCALE + 1))
+        for r in range(inner + 1, SCALE + 1):
+            t = (r - inner) / (SCALE - inner)
+            shaped = (1.0 - expo) * t + expo * t * t * t
+            self.gain[r] = int(round(shaped * OUTPUT_MAX * (1 << GAIN_SHIFT) / r))
+
+    def _axis_table(self, calibration, sign):
+        # one entry per raw range, evaluated at its middle
+        start = -32768 + (1 << (LUT_SHIFT - 1))
+        normalize = calibration.normalize
+        return array.array('h', [sign * normalize(raw)
+                                 for raw in range(start, 32768, 1 << LUT_SHIFT)])
+
+    def apply(self, raw_x, raw_y):
+        """
+        map raw stick values to drive values
+
+        Returns:
+            (x, y), each -100 to 100
+        """
+        x = self.axis_x[(raw_x + 32768) >> LUT_SHIFT]
+        y = self.axis_y[(raw_y + 32768) >> LUT_SHIFT]
+        r = math.isqrt(x * x + y * y)
+        gain = self.gain[r if r < SCALE else SCALE]
+        if gain == 0:
+            return 0, 0
+        # round on the magnitude so left and right stay symmetric
+        half = 1 << (GAIN_SHIFT - 1)
+        out_x = (abs(x) * gain + half) >> GAIN_SHIFT
+        out_y = (abs(y) * gain + half) >> GAIN_SHIFT
+        out_x = out_x if out_x < OUTPUT_MAX else OUTPUT_MAX
+        out_y = out_y if out_y < OUTPUT_MAX else OUTPUT_MAX
+        return (out_x if x >= 0 else -out_x), (out_y if y >= 0 else -out_y)
+
+
+def show(args):
+    response = StickResponse(args.dead_zone, args.expo)
+    print(f"dead zone {args.dead_zone}%, expo {args.expo}")
+    print("stick %   output")
+    for percent in range(0, 101, 5):
+        x, _ = response.apply(percent * AXIS_MAX // 100, 0)
+        print(f"  {percent:4d}    {x:4d}  {'#' * (x // 2)}")
+
+
+def calibrate(args):
+    from evdev import ecodes
+    from device_discovery import ControllerDiscovery
+
+    device = ControllerDiscovery(args.name).open()
+    if device is None:
+        raise SystemExit(f"{args.name} not found")
+
+    def sample(seconds):
+        values = {ecodes.ABS_RX: [], ecodes.ABS_RY: []}
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            try:
+                for event in device.read():
+                    if event.type == ecodes.EV_ABS and event.code in values:
+                        values[event.code].append(event.value)
+            except BlockingIOError:
+                time.sleep(0.005)
+        return values
+
+    print(f"leave the stick centered ({args.rest:.0f}s)...")
+    rest = sample(args.rest)
+    print(f"now roll the stick around its full range ({args.sweep:.0f}s)...")
+    sweep = sample(args.sweep)
+
+    calibrations = []
+    for code, axis in ((ecodes.ABS_RX, "x"), (ecodes.ABS_RY, "y")):
+        if not rest[code] or not sweep[code]:
+            raise SystemExit(f"no {axis} axis events - hold the trigger and try again")
+        center = sorted(rest[code])[len(rest[code]) // 2]
+        calibration = AxisCalibration(center, min(sweep[code]), max(sweep[code]))
+        print(f"  {axis}: center {calibration.center}, range "
+              f"{calibration.minimum}..{calibration.maximum}")
+        calibrations.append(calibration)
+    save_calibration(args.output, *calibrations)
+    print(f"saved {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="joystick response curves")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("show", help="print output vs. stick deflection")
+    p.add_argument("--dead-zone", type=int, default=10, help="radial dead zone in percent")
+    p.add_argument("--expo", type=float, default=0.0, help="0 = linear, 1 = cubic")
+    p.set_defaults(func=show)
+
+    p = commands.add_parser("calibrate", help="measure center and range of the stick")
+    p.add_argument("output", help="calibration file to write (JSON)")
+    p.add_argument("--name", default="Joy-Con (R)")
+    p.add_argument("--rest", type=float, default=2.0, help="seconds to sample the center")
+    p.add_argument("--sweep", type=float, default=6.0, help="seconds to sample the range")
+    p.set_defaults(func=calibrate)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+shared-memory telemetry ring
+the control loop publishes one fixed-layout record per tick into an mmap'd
+file under /dev/shm; writing is a struct.pack_into on shared memory, so no
+syscalls and no locks on the control side. each slot carries a sequence
+counter (odd while being written) so readers in another process can detect
+torn or overwritten records and retry
+
+layout (little endian):
+    header  magic "RTLM", version, capacity, record_size, motor_count, pad,
+            published (u64, records written so far)
+    slot    seq (u64), tick (u64), time (f64), tick_duration (f32),
+            x (i16), y (i16), mode (u8), timed_out (u8), pad,
+            then per motor: target (f32), current (f32), duty (f32, signed)
+
+run as a monitor: python telemetry.py [--follow]
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+
+DEFAULT_PATH = "/dev/shm/robot_telemetry"
+MAGIC = b"RTLM"
+VERSION = 1
+
+HEADER = struct.Struct("<4sIIII4xQ")
+PUBLISHED_OFFSET = HEADER.size - 8
+SEQ = struct.Struct("<Q")
+SLOT_HEAD = "<QdfhhBB6x"            # after seq: tick .. timed_out
+MOTOR_FIELDS = "fff"                # target, current, duty
+
+MODES = ("drive", "hitch")
+
+
+def slot_body(motor_count):
+    """struct for one slot without its sequence counter"""
+    return struct.Struct(SLOT_HEAD + MOTOR_FIELDS * motor_count)
+
+
+class TelemetryWriter:
+    def __init__(self, path=DEFAULT_PATH, motor_count=5, capacity=256):
+        """
+        create (or replace) the telemetry file and map it
+
+        Args:
+            path: file to map, normally under /dev/shm
+            motor_count: motors per record
+            capacity: records kept in the ring
+        """
+        self.path = path
+        self.motor_count = motor_count
+        self.capacity = capacity
+        self.body = slot_body(motor_count)
+        self.record_size = SEQ.size + self.body.size
+        size = HEADER.size + capacity * self.record_size
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self.buf = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        HEADER.pack_into(self.buf, 0, MAGIC, VERSION, capacity, self.record_size, motor_count, 0)
+
+        self.published = 0
+        # reused every publish so the tick allocates nothing but the arg tuple
+        self._values = [0] * (7 + 3 * motor_count)
+
+    def publish(self, x, y, mode, tick_duration, timed_out, targets, currents, duties):
+        """
+        write one record
+
+        Args:
+            x, y: stick values (-100 to 100)
+            mode: index into MODES
+            tick_duration: seconds the tick took
+            timed_out: command timeout active
+            targets, currents, duties: per-motor sequences (motor_count long)
+        """
+        n = self.published
+        offset = HEADER.size + (n % self.capacity) * self.record_size
+        buf = self.buf
+
+        values = self._values
+        values[0] = n
+        values[1] = time.time()
+        values[2] = tick_duration
+        values[3] = x
+        values[4] = y
+        values[5] = mode
+        values[6] = 1 if timed_out else 0
+        i = 7
+        for m in range(self.motor_count):
+            values[i] = targets[m]
+            values[i + 1] = currents[m]
+            values[i + 2] = duties[m]
+            i += 3
+
+        # seqlock: odd while the slot is inconsistent, even once it's done
+        SEQ.pack_into(buf, offset, 2 * n + 1)
+        self.body.pack_into(buf, offset + SEQ.size, *values)
+        SEQ.pack_into(buf, offset, 2 * n + 2)
+        self.published = n + 1
+        SEQ.pack_into(buf, PUBLISHED_OFFSET, n + 1)
+
+    def close(self):
+        """unmap the ring; the file stays so the last state can still be read"""
+        if self.buf is not None:
+            self.buf.close()
+            self.buf = None
+
+
+class TelemetryReader:
+    def __init__(self, path=DEFAULT_PATH):
+        """map an existing telemetry file read-only"""
+        with open(path, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.capacity, self.record_size, self.motor_count, _ = \
+            HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a telemetry ring (version {VERSION})")
+        self.body = slot_body(self.motor_count)
+
+    def published(self):
+        """number of records written so far"""
+        return SEQ.unpack_from(self.buf, PUBLISHED_OFFSET)[0]
+
+    def read(self, n, retries=100):
+        """
+        read record number n
+
+        Returns:
+            dict of the record, or None if it was overwritten or never written
+        """
+        offset = HEADER.size + (n % self.capacity) * self.record_size
+        expected = 2 * n + 2
+        for _ in range(retries):
+            seq = SEQ.unpack_from(self.buf, offset)[0]
+            if seq & 1:
+                continue        # writer is in the middle of this slot
+            if seq != expected:
+                return None
+            values = self.body.unpack_from(self.buf, offset + SEQ.size)
+            if SEQ.unpack_from(self.buf, offset)[0] == seq:
+                return self._record(values)
+        return None
+
+    def latest(self):
+        """the newest complete record, or None"""
+        published = self.published()
+        for n in range(published - 1, max(-1, published - self.capacity - 1), -1):
+            record = self.read(n)
+            if record is not None:
+                return record
+        return None
+
+    def records_since(self, n):
+        """
+        records from number n onward that are still in the ring
+
+        Returns:
+            (records, next n to ask for)
+        """
+        published = self.published()
+        start = max(n, published - self.capacity)
+        records = [r for r in (self.read(i) for i in range(start, published)) if r is not None]
+        return records, published
+
+    def _record(self, values):
+        tick, stamp, duration, x, y, mode, timed_out = values[:7]
+        motors = [values[i:i + 3] for i in range(7, len(values), 3)]
+        return {
+            "tick": tick,
+            "time": stamp,
+            "tick_duration": duration,
+            "x": x,
+            "y": y,
+            "mode": MODES[mode] if mode < len(MODES) else mode,
+            "timed_out": bool(timed_out),
+            "targets": [m[0] for m in motors],
+            "currents": [m[1] for m in motors],
+            "duties": [m[2] for m in motors],
+        }
+
+    def close(self):
+        self.buf.close()
+
+
+def format_record(record):
+    motors = " ".join(f"{t:5.0f}/{c:6.1f}/{d:5.0f}" for t, c, d in
+                      zip(record["targets"], record["currents"], record["duties"]))
+    return (f"#{record['tick']:<7d} x={record['x']:4d} y={record['y']:4d} "
+            f"{record['mode']:5s} {'TIMEOUT ' if record['timed_out'] else ''}"
+            f"tick {record['tick_duration'] * 1000:5.2f}ms | {motors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="print live robot telemetry")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--follow", action="store_true", help="print every record as it arrives")
+    parser.add_argument("--interval", type=float, default=0.05, help="poll interval in seconds")
+    args = parser.parse_args()
+
+    reader = TelemetryReader(args.path)
+    print(f"motors: target/current/duty x {reader.motor_count}")
+    if not args.follow:
+        record = reader.latest()
+        print(format_record(record) if record else "no records yet")
+        return
+
+    n = reader.published()
+    try:
+        while True:
+            records, n = reader.records_since(n)
+            for record in records:
+                print(format_record(record))
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
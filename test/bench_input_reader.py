@@ -0,0 +1,171 @@
+"""
+benchmark for the controller input readers
+feeds the same synthetic (or recorded) event stream through read_events()
+with evdev-style per-event objects and with the raw input_event reader,
+and reports the cost per event at the Joy-Con stick and IMU node rates
+no controller or evdev needed (its ecodes are faked if it isn't installed)
+run from test directory: python bench_input_reader.py [--recording FILE]
+"""
+import argparse
+import errno
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_evdev import ensure_evdev
+
+EVDEV_SOURCE = ensure_evdev()
+
+from controller import BluetoothController
+from event_recording import ReplayEvent, load_events
+from raw_input import INPUT_EVENT
+
+try:
+    from evdev import InputEvent
+except ImportError:
+    InputEvent = ReplayEvent
+
+EV_SYN, EV_KEY, EV_ABS, EV_MSC = 0, 1, 3, 4
+SYN_REPORT = 0
+BTN_TR2 = 0x139
+ABS_X, ABS_Y, ABS_Z, ABS_RX, ABS_RY, ABS_RZ = 0, 1, 2, 3, 4, 5
+MSC_TIMESTAMP = 5
+
+
+def stick_stream(seconds, rate=66.7):
+    """Joy-Con (R) buttons/stick node: 2 axes + SYN per report"""
+    events = [(0, 0, EV_KEY, BTN_TR2, 1), (0, 0, EV_SYN, SYN_REPORT, 0)]
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        sec, usec = int(t), int((t % 1) * 1000000)
+        events.append((sec, usec, EV_ABS, ABS_RX, int(20000 * math.sin(i / 10))))
+        events.append((sec, usec, EV_ABS, ABS_RY, int(-30000 * math.cos(i / 20))))
+        events.append((sec, usec, EV_SYN, SYN_REPORT, 0))
+    return events, rate * 3
+
+
+def imu_stream(seconds, rate=200.0):
+    """Joy-Con (R) IMU node: 3 accel + 3 gyro axes + MSC_TIMESTAMP + SYN per sample"""
+    events = []
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        sec, usec = int(t), int((t % 1) * 1000000)
+        for code in (ABS_X, ABS_Y, ABS_Z, ABS_RX, ABS_RY, ABS_RZ):
+            events.append((sec, usec, EV_ABS, code, int(4000 * math.sin(i / 7 + code))))
+        events.append((sec, usec, EV_MSC, MSC_TIMESTAMP, i * 5000))
+        events.append((sec, usec, EV_SYN, SYN_REPORT, 0))
+    return events, rate * 8
+
+
+def recorded_stream(path, seconds):
+    """a --record file, repeated to cover the requested duration"""
+    events = load_events(path)
+    if len(events) < 2:
+        raise SystemExit(f"{path}: not enough events")
+    first = events[0][0] + events[0][1] / 1000000.0
+    last = events[-1][0] + events[-1][1] / 1000000.0
+    rate = len(events) / max(last - first, 0.001)
+    repeats = max(1, int(seconds * rate / len(events)))
+    return events * repeats, rate
+
+
+class FileDevice:
+    """
+    plays input_event records from a file the way evdev.InputDevice.read()
+    does: one read() of up to 64 events, then an InputEvent per event
+    """
+    name = "Joy-Con (R)"
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def fileno(self):
+        return self.fd
+
+    def read(self):
+        data = os.read(self.fd, 64 * INPUT_EVENT.size)
+        if not data:
+            raise OSError(errno.ENODEV, "end of stream")
+        for event in INPUT_EVENT.iter_unpack(data):
+            yield InputEvent(*event)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def run(path, raw):
+    device = FileDevice(path)
+    controller = BluetoothController(device=device, raw=raw)
+    reads = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            controller.read_events()
+            reads += 1
+    except OSError:
+        pass
+    elapsed = time.perf_counter() - start
+    device.close()
+    return elapsed, reads, controller
+
+
+def bench(name, events, event_rate, repeat):
+    fd, path = tempfile.mkstemp(suffix=".input")
+    with os.fdopen(fd, "wb") as f:
+        for event in events:
+            f.write(INPUT_EVENT.pack(*event))
+
+    results = {}
+    try:
+        for label, raw in (("evdev", False), ("raw", True)):
+            best = None
+            for _ in range(repeat):
+                elapsed, reads, controller = run(path, raw)
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = (best, controller)
+    finally:
+        os.unlink(path)
+
+    evdev_ctl = results["evdev"][1]
+    raw_ctl = results["raw"][1]
+    assert raw_ctl.frames == evdev_ctl.frames, (raw_ctl.frames, evdev_ctl.frames)
+    assert raw_ctl._input_state() == evdev_ctl._input_state()
+
+    print(f"\n{name}: {len(events)} events, {event_rate:.0f} events/s live")
+    for label, (elapsed, _) in results.items():
+        per_event = elapsed / len(events)
+        print(f"  {label:6s} {per_event * 1e9:7.0f} ns/event  "
+              f"{event_rate * per_event * 100:6.3f}% of one core at live rate")
+    speedup = results["evdev"][0] / results["raw"][0]
+    print(f"  raw reader is {speedup:.2f}x the evdev path")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark controller input readers")
+    parser.add_argument("--seconds", type=float, default=60.0, help="stream length to simulate")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per reader (best is kept)")
+    parser.add_argument("--recording", metavar="FILE", help="also benchmark a --record file")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("INPUT READER BENCHMARK")
+    print(f"InputEvent from: {InputEvent.__module__}, ecodes from {EVDEV_SOURCE}")
+    print("=" * 50)
+
+    bench("stick node", *stick_stream(args.seconds), args.repeat)
+    bench("IMU node", *imu_stream(args.seconds), args.repeat)
+    if args.recording:
+        bench(f"recording {args.recording}", *recorded_stream(args.recording, args.seconds),
+              args.repeat)
+
+    print("\n" + "=" * 50)
+    print("BENCHMARK COMPLETE")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
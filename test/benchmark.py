@@ -0,0 +1,353 @@
+"""
+benchmark suite for the control stack
+runs on any Linux box: GPIO goes to the simulated backend and controller
+events come from a file (evdev's ecodes are faked if evdev isn't installed)
+
+measures per-call cost of the steering mappers, read_events per event,
+MotorDriver.update and Robot.update per tick, and full control ticks; results
+can be saved as JSON and compared against a saved baseline. the comparison
+uses each case's cost relative to a fixed reference workload timed right
+after it, so a machine that is slower or faster today doesn't trip the gate
+
+run from test directory: python benchmark.py [--save FILE] [--compare FILE]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_evdev import ensure_evdev
+
+EVDEV_SOURCE = ensure_evdev()
+
+import gpio_backend
+gpio_backend.select_backend("sim")
+
+from bench_input_reader import FileDevice, stick_stream
+from controller import BluetoothController
+from control_runtime import ControlRuntime
+from differential_steering import DifferentialSteering
+from eight_direction_steering import EightDirectionJoystick
+from four_direction_steering import FourDirectionJoystick
+from motor_driver import MotorDriver
+from raw_input import INPUT_EVENT
+from robot import Robot
+from robot_log import RingLogger, get_logger
+
+# seconds per timed run (overridden by --min-time)
+MIN_RUN_TIME = 0.1
+
+# joystick positions cycled through by the steering and loop benchmarks
+GRID = [(x, y) for x in range(-100, 101, 7) for y in range(-100, 101, 7)]
+
+
+def reference_work():
+    """fixed interpreter-bound workload every case is timed against"""
+    total = 0
+    for x, y in GRID:
+        total += abs(x - y) * (x if x > y else y)
+    return total
+
+
+def calls_for(func):
+    """
+    call func with a doubling count until a run takes MIN_RUN_TIME
+    (which also warms it up)
+
+    Returns:
+        calls per timed run
+    """
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_RUN_TIME:
+            return calls
+        calls = max(calls * 2, math.ceil(calls * MIN_RUN_TIME / max(elapsed, 1e-6)) // 2)
+
+
+def timed(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+
+_reference_calls = None
+
+
+def measure(func, ops, repeat):
+    """
+    time func() (which performs `ops` operations), each run long enough to
+    fill MIN_RUN_TIME and followed by a run of reference_work(). the median
+    of case/reference per run follows the code, not how fast the machine
+    happens to be right now (CPU steal, frequency scaling, thermal)
+
+    Returns:
+        (median nanoseconds per operation, median cost per operation
+         relative to one reference_work() call)
+    """
+    global _reference_calls
+    if _reference_calls is None:
+        _reference_calls = calls_for(reference_work)
+    calls = calls_for(func)
+
+    samples = []
+    relative = []
+    for _ in range(repeat):
+        case = timed(func, calls) / ops
+        reference = timed(reference_work, _reference_calls)
+        samples.append(case)
+        relative.append(case / reference)
+    return statistics.median(samples) * 1e9, statistics.median(relative)
+
+
+def bench_steering(mapper_class, use_table, scale, repeat):
+    mapper = mapper_class(pivot_y_limit=25, use_table=use_table)
+    compute = mapper.compute_motors
+    passes = max(1, 20 * scale)
+
+    def run():
+        for _ in range(passes):
+            for x, y in GRID:
+                compute(x, y)
+    return measure(run, passes * len(GRID), repeat)
+
+
+def bench_read_events(raw, scale, repeat):
+    events, _ = stick_stream(10 * scale)
+    fd, path = tempfile.mkstemp(suffix=".input")
+    with os.fdopen(fd, "wb") as f:
+        for event in events:
+            f.write(INPUT_EVENT.pack(*event))
+
+    def run():
+        device = FileDevice(path)
+        controller = BluetoothController(device=device, raw=raw)
+        try:
+            while True:
+                controller.read_events()
+        except OSError:
+            pass
+        device.close()
+
+    try:
+        return measure(run, len(events), repeat)
+    finally:
+        os.unlink(path)
+
+
+def bench_motor_driver_update(scale, repeat):
+    gpio = gpio_backend.get_backend()
+    motor = MotorDriver(17, 4, "Bench", acceleration=300, gpio=gpio)
+    calls = 5000 * scale
+
+    def run():
+        for i in range(calls):
+            # reverse the target now and then so the driver keeps ramping
+            if i % 500 == 0:
+                motor.set_speed(100 if motor.target_speed <= 0 else -100)
+            motor.update()
+        gpio.reset_timeline()
+
+    return measure(run, calls, repeat)
+
+
+def make_robot():
+    robot = Robot()
+    robot.set_drive_acceleration(300)
+    return robot
+
+
+def bench_robot_update(robot, scale, repeat):
+    ticks = 2000 * scale
+    update = robot.update
+
+    def run():
+        for i in range(ticks):
+            if i % 200 == 0:
+                x, y = GRID[(i // 200) % len(GRID)]
+                robot.drive(x, y)
+            update()
+        robot.gpio.reset_timeline()
+
+    return measure(run, ticks, repeat)
+
+
+class BenchController(BluetoothController):
+    """controller state set directly, no device"""
+
+    def __init__(self):
+        self.reset_all_inputs()
+        self.input_kernel_time = None
+        self.input_read_time = None
+
+    def reset_all_inputs(self):
+        self.joystick_x = 0
+        self.joystick_y = 0
+        self.button_x = False
+        self.button_b = False
+        self.button_y = False
+        self.button_a = False
+        self.bottom_trigger = True
+
+
+def bench_loop_tick(robot, scale, repeat):
+    runtime = ControlRuntime(robot, connect_controller=None)
+    # the loop still formats and queues its log lines, they just aren't shown
+    runtime.log = RingLogger(stream=open(os.devnull, "w"))
+    runtime.log.set_rate_limit("drive", 0.1)
+    controller = BenchController()
+    runtime.controller = controller
+    ticks = 2000 * scale
+    tick = runtime._tick
+
+    def run():
+        for i in range(ticks):
+            x, y = GRID[i % len(GRID)]
+            controller.joystick_x = x
+            controller.joystick_y = y
+            tick()
+        robot.gpio.reset_timeline()
+
+    return measure(run, ticks, repeat)
+
+
+def run_suite(scale, repeat, name_filter=None):
+    """
+    Returns:
+        (dict of benchmark name -> ns per operation,
+         dict of benchmark name -> cost relative to reference_work)
+    """
+    cases = [
+        ("steering.eight", lambda: bench_steering(EightDirectionJoystick, True, scale, repeat)),
+        ("steering.four", lambda: bench_steering(FourDirectionJoystick, True, scale, repeat)),
+        ("steering.differential", lambda: bench_steering(DifferentialSteering, True, scale, repeat)),
+        ("steering.eight.direct", lambda: bench_steering(EightDirectionJoystick, False, scale, repeat)),
+        ("controller.read_events.evdev", lambda: bench_read_events(False, scale, repeat)),
+        ("controller.read_events.raw", lambda: bench_read_events(True, scale, repeat)),
+        ("motor_driver.update", lambda: bench_motor_driver_update(scale, repeat)),
+    ]
+    robot_cases = [
+        ("robot.update", bench_robot_update),
+        ("loop.tick", bench_loop_tick),
+    ]
+
+    results = {}
+    relative = {}
+
+    def record(name, measured):
+        results[name], relative[name] = measured
+        print(f"  {name:30s} {results[name]:10.0f} ns/op  {relative[name]:8.4f} x reference")
+
+    for name, func in cases:
+        if name_filter and name_filter not in name:
+            continue
+        record(name, func())
+
+    wanted = [(n, f) for n, f in robot_cases if not name_filter or name_filter in n]
+    if wanted:
+        robot = make_robot()
+        try:
+            for name, func in wanted:
+                record(name, func(robot, scale, repeat))
+        finally:
+            robot.cleanup()
+
+    if "loop.tick" in results:
+        print(f"  -> {1e9 / results['loop.tick']:.0f} full control ticks per second")
+    return results, relative
+
+
+def compare(results, relative, baseline, threshold):
+    """
+    print the change against a baseline; the gate uses the cost relative to
+    reference_work when the baseline has it, raw ns/op otherwise
+
+    Returns:
+        list of names that got slower than threshold allows
+    """
+    base_results = baseline["results"]
+    base_relative = baseline.get("relative", {})
+    regressions = []
+    print(f"\nCompared to baseline (fail above +{threshold * 100:.0f}%):")
+    for name, ns in results.items():
+        if name not in base_results:
+            print(f"  {name:30s} (not in baseline)")
+            continue
+        if name in base_relative:
+            change = relative[name] / base_relative[name] - 1.0
+        else:
+            change = ns / base_results[name] - 1.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:30s} {base_results[name]:10.0f} -> {ns:10.0f} ns/op  "
+              f"{change * 100:+6.1f}%{flag}")
+    return regressions
+
+
+def main():
+    global MIN_RUN_TIME
+    parser = argparse.ArgumentParser(description="hardware-free control stack benchmarks")
+    parser.add_argument("--save", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown before failing, as a fraction (default 0.2)")
+    parser.add_argument("--scale", type=int, default=1, help="multiply iteration counts")
+    parser.add_argument("--repeat", type=int, default=7,
+                        help="timed runs per benchmark, the median is kept (default 7)")
+    parser.add_argument("--min-time", type=float, default=MIN_RUN_TIME,
+                        help=f"seconds per timed run (default {MIN_RUN_TIME})")
+    parser.add_argument("--filter", metavar="TEXT", help="only run benchmarks containing TEXT")
+    args = parser.parse_args()
+    MIN_RUN_TIME = args.min_time
+
+    print("=" * 50)
+    print("CONTROL STACK BENCHMARKS")
+    print(f"python {platform.python_version()} on {platform.machine()}, "
+          f"GPIO sim, ecodes from {EVDEV_SOURCE}")
+    print("=" * 50)
+
+    results, relative = run_suite(args.scale, args.repeat, args.filter)
+    get_logger().close()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "node": platform.node(),
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "results": results,
+                "relative": relative,
+            }, f, indent=2)
+        print(f"\nSaved {args.save}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, relative, baseline, args.threshold)
+
+    print("\n" + "=" * 50)
+    if regressions:
+        print(f"REGRESSIONS: {', '.join(regressions)}")
+        print("=" * 50)
+        sys.exit(1)
+    print("BENCHMARKS COMPLETE")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+evdev stand-in for the benchmarks
+the controller only needs evdev.ecodes to build its dispatch table, so when
+evdev isn't installed a module with the kernel input-event-codes.h values is
+registered in its place. call ensure_evdev() before importing controller
+"""
+import sys
+import types
+
+# kernel input-event-codes.h values, only used when evdev isn't installed
+FAKE_ECODES = {
+    "EV_SYN": 0, "EV_KEY": 1, "EV_ABS": 3, "EV_MSC": 4,
+    "SYN_REPORT": 0, "SYN_DROPPED": 3,
+    "BTN_SOUTH": 0x130, "BTN_EAST": 0x131, "BTN_NORTH": 0x133, "BTN_WEST": 0x134,
+    "BTN_TR2": 0x139,
+    "ABS_X": 0, "ABS_Y": 1, "ABS_Z": 2, "ABS_RX": 3, "ABS_RY": 4, "ABS_RZ": 5,
+}
+
+
+def ensure_evdev():
+    """
+    Returns:
+        "evdev" or "fake" - which ecodes the controller will use
+    """
+    try:
+        import evdev
+        return "evdev"
+    except ImportError:
+        pass
+    module = types.ModuleType("evdev")
+    ecodes = types.ModuleType("evdev.ecodes")
+    ecodes.__dict__.update(FAKE_ECODES)
+    module.ecodes = ecodes
+    sys.modules["evdev"] = module
+    sys.modules["evdev.ecodes"] = ecodes
+    return "fake"
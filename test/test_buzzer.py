@@ -0,0 +1,86 @@
+"""
+test script for the non-blocking buzzer sequencer
+uses a fake PWM object, no buzzer needs to be connected
+run from test directory: python test_buzzer.py
+"""
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from buzzer import Buzzer, DISCONNECT_PATTERN
+
+
+class FakePWM:
+    """records every call with a timestamp instead of driving a pin"""
+    def __init__(self):
+        self.calls = []
+
+    def start(self, duty):
+        self.calls.append((time.monotonic(), "start", duty))
+
+    def ChangeFrequency(self, frequency):
+        self.calls.append((time.monotonic(), "frequency", frequency))
+
+    def ChangeDutyCycle(self, duty):
+        self.calls.append((time.monotonic(), "duty", duty))
+
+    def stop(self):
+        self.calls.append((time.monotonic(), "stop", None))
+
+
+def time_call(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1e6
+
+
+def main():
+    print("=" * 50)
+    print("BUZZER SEQUENCER TEST")
+    print("=" * 50)
+
+    pwm = FakePWM()
+    buzzer = Buzzer(pin=27, pwm=pwm)
+
+    print("\n[1/3] Calls return without blocking...")
+    for name in ["connect_sound", "disconnect_sound", "drive_mode_sound",
+                 "hitch_mode_sound", "error_sound"]:
+        elapsed_us = time_call(getattr(buzzer, name))
+        print(f"  {name:18s} {elapsed_us:8.1f} us")
+        assert elapsed_us < 1000, f"{name} blocked for {elapsed_us:.0f} us"
+    assert buzzer.wait_idle(timeout=2.0), "sequencer never went idle"
+
+    print("[2/3] Disconnect tone replaces a queued mode tone...")
+    pwm.calls.clear()
+    buzzer.connect_sound()          # playing
+    time.sleep(0.02)
+    buzzer.drive_mode_sound()       # queued behind it
+    buzzer.disconnect_sound()       # replaces the queued mode tone
+    assert buzzer.wait_idle(timeout=2.0), "sequencer never went idle"
+    frequencies = [value for _, kind, value in pwm.calls if kind == "frequency"]
+    played_disconnect = [f for f, _, _ in DISCONNECT_PATTERN]
+    assert frequencies == [3500, 4000, 4500] + played_disconnect, frequencies
+    print(f"  frequencies played: {frequencies}")
+
+    print("[3/3] Error tone preempts a playing mode tone...")
+    pwm.calls.clear()
+    buzzer.hitch_mode_sound()
+    time.sleep(0.02)
+    start = time.monotonic()
+    buzzer.error_sound()
+    assert buzzer.wait_idle(timeout=2.0), "sequencer never went idle"
+    frequencies = [value for _, kind, value in pwm.calls if kind == "frequency"]
+    assert frequencies == [3500, 4000, 4000, 4000], frequencies
+    first_error = next(t for t, kind, value in pwm.calls if kind == "frequency" and value == 4000)
+    print(f"  error tone started {(first_error - start) * 1000:.1f} ms after request")
+
+    buzzer.cleanup()
+    print("\n" + "=" * 50)
+    print("ALL BUZZER TESTS PASSED")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
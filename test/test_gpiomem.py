@@ -0,0 +1,147 @@
+"""
+test script for the /dev/gpiomem register backend
+a plain 4KB file stands in for the GPIO register block and PWM goes to the
+simulated backend, so it runs anywhere. checks single-pin and bulk
+set/clear writes, that stop_all() cuts all ten motor pins with one register
+write, and compares stop latency with per-pin writes
+run from test directory: python test_gpiomem.py
+"""
+import sys
+import os
+import struct
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gpio_backend import (GpiomemBackend, SimulatedGPIOBackend, GPIO_BLOCK_SIZE,
+                          GPSET0, GPCLR0)
+from motor_bank import MotorBank
+
+# same pins as Robot
+MOTORS = [(17, 4, "Front Left"), (15, 18, "Front Right"), (5, 11, "Rear Left"),
+          (23, 24, "Rear Right"), (19, 26, "Actuator")]
+MOTOR_MASK = sum(1 << pin for rpwm, lpwm, _ in MOTORS for pin in (rpwm, lpwm))
+
+
+def make_register_file():
+    fd, path = tempfile.mkstemp(suffix=".gpiomem")
+    os.write(fd, bytes(GPIO_BLOCK_SIZE))
+    os.close(fd)
+    return path
+
+
+def read_register(path, offset):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return struct.unpack("<I", f.read(4))[0]
+
+
+def write_register(path, offset, value):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(struct.pack("<I", value))
+
+
+def make_bank(gpio):
+    bank = MotorBank(gpio=gpio)
+    for rpwm, lpwm, name in MOTORS:
+        bank.add_motor(rpwm, lpwm, name, 200)
+    return bank
+
+
+def check_single_pin(path):
+    print("\nTest 1: single pin set/clear")
+    backend = GpiomemBackend(path, pwm=SimulatedGPIOBackend)
+    backend.output(17, 1)
+    assert read_register(path, GPSET0) == 1 << 17
+    backend.output(4, 0)
+    assert read_register(path, GPCLR0) == 1 << 4
+    backend.output(40, 1)
+    assert read_register(path, GPSET0 + 4) == 1 << 8, "pin 40 is bank 1 bit 8"
+    assert backend.pin_masks([4, 17, 40]) == ((1 << 4) | (1 << 17), 1 << 8)
+    backend.cleanup()
+    print("  PASS")
+
+
+def check_bulk_stop(path):
+    print("\nTest 2: stop_all cuts every motor pin in one write")
+    backend = GpiomemBackend(path, pwm=SimulatedGPIOBackend)
+    bank = make_bank(backend)
+    assert bank.bulk_stop
+    assert bank.stop_masks == (MOTOR_MASK, 0)
+
+    for i in range(len(MOTORS)):
+        bank.set_speed_instant(i, 60 if i % 2 else -60)
+    write_register(path, GPCLR0, 0)
+    bank.stop_all()
+
+    # per-pin writes would leave only the last pin's bit in the register
+    cleared = read_register(path, GPCLR0)
+    assert cleared == MOTOR_MASK, f"{cleared:#x} != {MOTOR_MASK:#x}"
+    sim = backend.pwm_backend
+    for rpwm, lpwm, name in MOTORS:
+        assert sim.duty(rpwm) == 0 and sim.duty(lpwm) == 0, name
+    assert all(driver.pins_forced_low for driver in bank.drivers)
+    print(f"  GPCLR0 = {cleared:#010x} (all 10 motor pins), PWM duties 0")
+
+    # nothing left to stop: still one clear write, but no latency sample
+    write_register(path, GPCLR0, 0)
+    bank.stop_all()
+    assert read_register(path, GPCLR0) == MOTOR_MASK
+    assert bank.stop_latency.count == 1
+
+    # speed after a stop goes back through PWM as usual
+    bank.set_speed_instant(0, 40)
+    assert sim.duty(17) == 40 and not bank.drivers[0].pins_forced_low
+    bank.cleanup()
+    backend.cleanup()
+    print("  PASS")
+
+
+def measure_stops(bank, stops):
+    for _ in range(stops):
+        for i in range(len(MOTORS)):
+            bank.set_speed_instant(i, 75)
+        bank.stop_all()
+    bank.report_stops()
+
+
+def check_latency(path):
+    print("\nTest 3: stop latency, bulk clear vs per-pin writes")
+    stops = 2000
+
+    backend = GpiomemBackend(path, pwm=SimulatedGPIOBackend)
+    bank = make_bank(backend)
+    measure_stops(bank, stops)
+    bulk = bank.stop_latency.percentile(50)
+    backend.cleanup()
+
+    bank = make_bank(SimulatedGPIOBackend())
+    assert not bank.bulk_stop
+    measure_stops(bank, stops)
+    per_pin = bank.stop_latency.percentile(50)
+
+    assert bulk <= per_pin, (bulk, per_pin)
+    print("  PASS")
+
+
+def main():
+    print("=" * 50)
+    print("GPIOMEM BACKEND TEST")
+    print("=" * 50)
+
+    path = make_register_file()
+    try:
+        check_single_pin(path)
+        check_bulk_stop(path)
+        check_latency(path)
+    finally:
+        os.unlink(path)
+
+    print("\n" + "=" * 50)
+    print("ALL TESTS PASSED")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+test script for the metrics endpoint
+runs the robot on the simulated GPIO backend, scrapes the UNIX socket and
+the localhost TCP port the way a collector would, checks the exposition
+format and values, and compares tick timing with and without a scraper
+hammering the endpoint. no hardware needed
+run from test directory: python test_metrics.py
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gpio_backend
+gpio_backend.select_backend("sim")
+
+from control_runtime import ControlRuntime
+from latency import LatencyHistogram
+from metrics import RobotMetrics, MetricsServer, scrape
+from robot import Robot
+
+REQUIRED = [
+    "robot_ticks_total", "robot_tick_overruns_total", "robot_command_timeout_stops_total",
+    "robot_controller_connected", "robot_controller_reconnects_total",
+    "robot_input_events_total", "robot_input_frames_total", "robot_mode",
+    "robot_motor_speed", "robot_pwm_writes_total",
+]
+
+
+class FakeController:
+    """the counters RobotMetrics reads from a BluetoothController"""
+    def __init__(self):
+        self.events = 0
+        self.frames = 0
+
+    def reset_all_inputs(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def parse(body):
+    """
+    minimal text-format parser
+
+    Returns:
+        (types dict name -> kind, samples dict 'name{labels}' -> float)
+    """
+    types = {}
+    samples = {}
+    for line in body.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            types[name] = kind
+        elif line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return types, samples
+
+
+def run_ticks(robot, count, histogram):
+    """drive/update at full speed, recording each tick's duration"""
+    for i in range(count):
+        start = time.perf_counter()
+        robot.drive(0, 100 if (i // 200) % 2 == 0 else -100)
+        robot.update()
+        elapsed = time.perf_counter() - start
+        robot.timers.record("tick", elapsed)
+        histogram.record(elapsed)
+
+
+def check_format(server, robot, runtime, controller):
+    print("\nTest 1: scrape over UNIX socket and TCP")
+    status, body = scrape(server.unix_path)
+    assert status.endswith("200 OK"), status
+    types, samples = parse(body)
+    for name in REQUIRED:
+        assert name in types, f"missing {name}"
+    assert types["robot_ticks_total"] == "counter"
+    assert types["robot_motor_speed"] == "gauge"
+    assert samples['robot_mode{mode="drive"}'] == 1
+    assert samples["robot_controller_connected"] == 0
+    print(f"  unix: {len(types)} families, {len(samples)} samples")
+
+    status, tcp_body = scrape(tcp_port=server.tcp_address[1])
+    assert status.endswith("200 OK"), status
+    assert set(parse(tcp_body)[0]) == set(types)
+    print(f"  tcp:  same families on port {server.tcp_address[1]}")
+    print("  PASS")
+
+
+def check_values(server, robot, runtime, controller):
+    print("\nTest 2: values follow the robot")
+    _, before = parse(scrape(server.unix_path)[1])
+    runtime.current_mode = "hitch"
+    runtime.timeout_stops += 1
+    runtime.connections = 3
+    controller.events += 30
+    controller.frames += 10
+    robot.drive(0, 100)
+    for _ in range(20):
+        robot.update()
+        time.sleep(0.01)
+    _, after = parse(scrape(server.unix_path)[1])
+
+    label = '{motor="Front Left"}'
+    assert after["robot_motor_speed" + label] == robot.motors.current[0]
+    assert after["robot_motor_target_speed" + label] == 100
+    assert after['robot_mode{mode="hitch"}'] == 1
+    assert after["robot_command_timeout_stops_total"] == before["robot_command_timeout_stops_total"] + 1
+    assert after["robot_controller_reconnects_total"] == 2
+    assert after["robot_input_events_total"] == before["robot_input_events_total"] + 30
+    issued = '{motor="Front Left",result="issued"}'
+    assert after["robot_pwm_writes_total" + issued] > before["robot_pwm_writes_total" + issued]
+    print(f"  front left at {after['robot_motor_speed' + label]:.1f}, "
+          f"{after['robot_pwm_writes_total' + issued]:.0f} writes issued")
+    print("  PASS")
+
+
+def check_reconnect(server, runtime):
+    print("\nTest 3: input counters keep counting across a reconnect")
+    _, before = parse(scrape(server.unix_path)[1])
+    runtime._retire_controller()
+    runtime.controller = FakeController()
+    _, after = parse(scrape(server.unix_path)[1])
+    for name in ("robot_input_events_total", "robot_input_frames_total"):
+        assert after[name] == before[name], (name, before[name], after[name])
+    runtime.controller.events += 5
+    _, after = parse(scrape(server.unix_path)[1])
+    assert after["robot_input_events_total"] == before["robot_input_events_total"] + 5
+    print(f"  {after['robot_input_events_total']:.0f} events after the new controller's first 5")
+    print("  PASS")
+
+
+def check_not_found(server):
+    print("\nTest 4: unknown path")
+    import socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(server.unix_path)
+    sock.sendall(b"GET /nothing HTTP/1.0\r\n\r\n")
+    response = sock.recv(1024)
+    sock.close()
+    assert b"404" in response.split(b"\r\n", 1)[0], response
+    print("  PASS")
+
+
+def check_perturbation(server, robot):
+    print("\nTest 5: tick timing while being scraped")
+    ticks = 20000
+
+    quiet = LatencyHistogram()
+    run_ticks(robot, ticks, quiet)
+
+    scraped = LatencyHistogram()
+    scrapes = [0]
+    stop = threading.Event()
+
+    def scraper():
+        while not stop.is_set():
+            scrape(server.unix_path)
+            scrapes[0] += 1
+
+    thread = threading.Thread(target=scraper, daemon=True)
+    thread.start()
+    start = time.perf_counter()
+    run_ticks(robot, ticks, scraped)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join()
+
+    for name, h in (("quiet", quiet), ("scraped", scraped)):
+        print(f"  {name:8s} p50 {h.percentile(50) * 1e6:6.1f}us  "
+              f"p99 {h.percentile(99) * 1e6:6.1f}us  max {h.max() * 1e6:8.1f}us")
+    print(f"  {scrapes[0]} scrapes in {elapsed:.2f}s ({scrapes[0] / elapsed:.0f}/s, "
+          f"a collector does ~1 every 15s)")
+    server.report()
+
+
+def main():
+    print("=" * 50)
+    print("METRICS ENDPOINT TEST")
+    print("=" * 50)
+
+    robot = Robot()
+    runtime = ControlRuntime(robot, connect_controller=None)
+    controller = FakeController()
+    runtime.controller = controller
+
+    path = os.path.join(tempfile.mkdtemp(), "metrics.sock")
+    server = MetricsServer(RobotMetrics(robot, runtime).render, unix_path=path, tcp_port=0)
+    assert server.start()
+
+    try:
+        check_format(server, robot, runtime, controller)
+        check_values(server, robot, runtime, controller)
+        check_reconnect(server, runtime)
+        check_not_found(server)
+        check_perturbation(server, robot)
+    finally:
+        server.stop()
+        robot.cleanup()
+    assert not os.path.exists(path), "socket file left behind"
+
+    print("\n" + "=" * 50)
+    print("ALL TESTS PASSED")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+test script for the controller reconnection manager
+uses a fake /dev/input directory and a fake bluetoothctl, no controller needed
+run from test directory: python test_reconnect.py
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reconnect import ReconnectManager
+
+
+class FakeBluetoothctl:
+    """records calls and answers `devices` with one paired Joy-Con"""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, *args, timeout=10):
+        self.calls.append(args)
+        if args[0] == "devices":
+            return "Device C8:48:05:85:32:93 Joy-Con (R)\n"
+        return ""
+
+
+def make_opener(dev_dir):
+    """open_controller stand-in: succeeds once event7 exists"""
+    def open_controller():
+        path = os.path.join(dev_dir, "event7")
+        if not os.path.exists(path):
+            raise Exception("No Bluetooth controller found!")
+        return path
+    return open_controller
+
+
+def create_later(path, delay, created_at):
+    def create():
+        time.sleep(delay)
+        created_at.append(time.monotonic())
+        open(path, "w").close()
+    threading.Thread(target=create, daemon=True).start()
+
+
+def main():
+    print("=" * 50)
+    print("RECONNECT MANAGER TEST")
+    print("=" * 50)
+
+    dev_dir = tempfile.mkdtemp(prefix="fake-dev-input-")
+    bluetoothctl = FakeBluetoothctl()
+    manager = ReconnectManager(make_opener(dev_dir), dev_input_dir=dev_dir,
+                               backoff_base=0.1, backoff_max=0.4,
+                               bluetoothctl=bluetoothctl)
+
+    print("\n[1/3] Resumes within milliseconds of the node appearing...")
+    created_at = []
+    create_later(os.path.join(dev_dir, "event7"), 1.0, created_at)
+    manager.wait_for_controller()
+    delay_ms = (time.monotonic() - created_at[0]) * 1000
+    print(f"  opened {delay_ms:.1f} ms after the node appeared")
+    assert delay_ms < 50, f"took {delay_ms:.1f} ms"
+
+    print("[2/3] bluetoothctl fallback backs off...")
+    attempts = manager.fallback_attempts
+    print(f"  {attempts} fallback attempts in ~1 s (backoff 0.1 s -> 0.4 s cap)")
+    assert 2 <= attempts <= 8, attempts
+
+    print("[3/3] MAC address is cached across reconnects...")
+    os.remove(os.path.join(dev_dir, "event7"))
+    create_later(os.path.join(dev_dir, "event7"), 0.3, [])
+    manager.wait_for_controller()
+    scans = sum(1 for call in bluetoothctl.calls if call[0] == "devices")
+    connects = [call for call in bluetoothctl.calls if call[0] == "connect"]
+    print(f"  {scans} device scan(s), {len(connects)} connect(s) to {connects[-1][1]}")
+    assert scans == 1, scans
+    assert manager.mac_address == "C8:48:05:85:32:93"
+
+    manager.close()
+    print("\n" + "=" * 50)
+    print("ALL RECONNECT TESTS PASSED")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+test script for the sysfs hardware PWM backend
+builds a fake /sys/class/pwm tree in a temp directory (a thread plays the
+kernel and creates channel directories on export), pins without a channel
+go to the simulated backend. no Pi needed
+run from test directory: python test_sysfs_pwm.py
+"""
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gpio_backend import SysfsPWMBackend, SimulatedGPIOBackend, parse_pwm_channels
+from motor_driver import MotorDriver
+
+
+class FakePWMChip:
+    """pwmchipN with export/unexport files, channels appear shortly after export"""
+
+    def __init__(self, root, chip, npwm=2):
+        self.path = os.path.join(root, f"pwmchip{chip}")
+        os.makedirs(self.path)
+        for name in ("export", "unexport"):
+            open(os.path.join(self.path, name), "w").close()
+        with open(os.path.join(self.path, "npwm"), "w") as f:
+            f.write(f"{npwm}\n")
+        self.npwm = npwm
+        self.exports = 0
+        self.unexports = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _take(self, name):
+        path = os.path.join(self.path, name)
+        with open(path) as f:
+            text = f.read().strip()
+        if text:
+            open(path, "w").close()
+        return text
+
+    def _run(self):
+        while self._running:
+            channel = self._take("export")
+            if channel and int(channel) < self.npwm:
+                time.sleep(0.02)   # udev isn't instant either
+                channel_path = os.path.join(self.path, f"pwm{channel}")
+                os.makedirs(channel_path, exist_ok=True)
+                for name in ("period", "duty_cycle", "enable"):
+                    with open(os.path.join(channel_path, name), "w") as f:
+                        f.write("0\n")
+                self.exports += 1
+            channel = self._take("unexport")
+            if channel:
+                shutil.rmtree(os.path.join(self.path, f"pwm{channel}"), ignore_errors=True)
+                self.unexports += 1
+            time.sleep(0.005)
+
+    def read(self, channel, name):
+        # plain files keep bytes past a shorter pwrite, sysfs only sees the value
+        with open(os.path.join(self.path, f"pwm{channel}", name)) as f:
+            return int(f.readline())
+
+    def stop(self):
+        self._running = False
+        self._thread.join()
+
+
+def make_backend(root, channels=None):
+    return SysfsPWMBackend(channels=channels, pwm_root=root, fallback=SimulatedGPIOBackend)
+
+
+def check_motor(root, chip):
+    print("\nTest 1: motor with one hardware and one software pin")
+    backend = make_backend(root)
+    # Front Right: RPWM GPIO15 (software), LPWM GPIO18 (pwmchip0/pwm0)
+    motor = MotorDriver(15, 18, "Front Right", gpio=backend)
+    assert chip.exports == 1, chip.exports
+    assert 18 in backend.exported and 15 not in backend.exported
+    assert chip.read(0, "period") == 100000, chip.read(0, "period")   # 10kHz
+    assert chip.read(0, "enable") == 1
+
+    motor.set_speed_instant(-42)
+    assert chip.read(0, "duty_cycle") == 42000, chip.read(0, "duty_cycle")
+    assert backend.fallback.duty(15) == 0
+
+    motor.set_speed_instant(60)
+    assert chip.read(0, "duty_cycle") == 0
+    assert backend.fallback.duty(15) == 60
+
+    motor.set_speed_instant(-100)
+    motor.emergency_stop()
+    assert chip.read(0, "duty_cycle") == 0
+    assert backend.fallback.duty(15) == 0
+    print("  duty follows speed on both pins, emergency stop drives both low")
+
+    motor.cleanup()
+    backend.cleanup()
+    time.sleep(0.1)
+    assert chip.unexports == 1
+    assert not os.path.exists(os.path.join(chip.path, "pwm0"))
+    print("  PASS")
+
+
+def check_frequency(root, chip):
+    print("\nTest 2: frequency change keeps duty <= period")
+    backend = make_backend(root, {19: (0, 1)})
+    backend.setup(19)
+    pwm = backend.PWM(19, 1000)
+    pwm.start(50)
+    assert chip.read(1, "period") == 1000000
+    assert chip.read(1, "duty_cycle") == 500000
+
+    # shorter period: the duty must be lowered before the period is written
+    pwm.ChangeFrequency(4000)
+    assert chip.read(1, "period") == 250000
+    assert chip.read(1, "duty_cycle") == 125000
+    pwm.stop()
+    assert chip.read(1, "enable") == 0
+    backend.cleanup()
+    print("  PASS")
+
+
+def check_missing_channel(root):
+    print("\nTest 3: missing pwmchip falls back to software PWM")
+    backend = make_backend(root, {18: (7, 0)})
+    backend.setup(18)
+    assert 18 not in backend.exported
+    pwm = backend.PWM(18, 10000)
+    pwm.start(30)
+    assert backend.fallback.duty(18) == 30
+    backend.cleanup()
+    print("  PASS")
+
+
+def check_parse():
+    print("\nTest 4: --pwm-channels parsing")
+    assert parse_pwm_channels("18=0:0,19=0:1") == {18: (0, 0), 19: (0, 1)}
+    assert parse_pwm_channels("12=1:0") == {12: (1, 0)}
+    print("  PASS")
+
+
+def check_write_cost(root, chip):
+    print("\nTest 5: cost per duty change")
+    backend = make_backend(root, {18: (0, 0)})
+    backend.setup(18)
+    pwm = backend.PWM(18, 10000)
+    pwm.start(0)
+    writes = 20000
+    start = time.perf_counter()
+    for i in range(writes):
+        pwm.ChangeDutyCycle(i % 100)
+    elapsed = time.perf_counter() - start
+    print(f"  {elapsed / writes * 1e6:.2f}us per ChangeDutyCycle (one pwrite, fd kept open)")
+    backend.cleanup()
+
+
+def main():
+    print("=" * 50)
+    print("SYSFS PWM BACKEND TEST")
+    print("=" * 50)
+
+    root = tempfile.mkdtemp()
+    chip = FakePWMChip(root, 0)
+    try:
+        check_motor(root, chip)
+        check_frequency(root, chip)
+        check_missing_channel(root)
+        check_parse()
+        check_write_cost(root, chip)
+    finally:
+        chip.stop()
+        shutil.rmtree(root)
+
+    print("\n" + "=" * 50)
+    print("ALL TESTS PASSED")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
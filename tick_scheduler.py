@@ -0,0 +1,161 @@
+"""
+fixed-rate tick scheduler
+hits absolute monotonic deadlines, records period jitter and overruns,
+and tells the loop when to shed non-critical work
+"""
+import time
+
+SUPPORTED_RATES = (20, 50, 100)
+
+
+class TickScheduler:
+    def __init__(self, rate_hz=20, budget=None):
+        """
+        initialize tick scheduler
+
+        Args:
+            rate_hz: control rate in Hz (20, 50 or 100)
+            budget: max seconds a tick may take before it counts as an overrun
+                    default = one full period
+        """
+        if rate_hz not in SUPPORTED_RATES:
+            raise ValueError(f"rate must be one of {SUPPORTED_RATES}, got {rate_hz}")
+
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.budget = budget if budget is not None else self.period
+
+        self.next_deadline = None
+        self.last_start = None
+        self.tick_start = None
+
+        # shed logging/feedback on the tick after an overrun
+        self.shedding = False
+
+        self.reset_stats()
+
+    def reset_stats(self):
+        """clear all jitter and overrun statistics"""
+        self.ticks = 0
+        self.overruns = 0
+        self.shed_ticks = 0
+        self.skipped_deadlines = 0
+
+        # period jitter = actual start-to-start interval - nominal period
+        self.jitter_count = 0
+        self.jitter_sum = 0.0
+        self.jitter_sq_sum = 0.0
+        self.jitter_min = 0.0
+        self.jitter_max = 0.0
+
+        # lateness = how far past its deadline a tick started
+        self.max_lateness = 0.0
+        self.max_duration = 0.0
+
+    def start(self):
+        """anchor the deadline grid at the current time"""
+        self.next_deadline = time.monotonic()
+        self.last_start = None
+
+    def time_until_deadline(self):
+        """seconds until the next tick is due (0 if already late)"""
+        if self.next_deadline is None:
+            self.start()
+        return max(0.0, self.next_deadline - time.monotonic())
+
+    def sleep_until_deadline(self):
+        """blocking wait for the next deadline (for plain loops without asyncio)"""
+        delay = self.time_until_deadline()
+        if delay > 0:
+            time.sleep(delay)
+
+    def begin_tick(self):
+        """mark the start of a scheduled tick"""
+        now = time.monotonic()
+        if self.next_deadline is None:
+            self.next_deadline = now
+
+        lateness = now - self.next_deadline
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+
+        if self.last_start is not None:
+            jitter = (now - self.last_start) - self.period
+            if self.jitter_count == 0:
+                self.jitter_min = self.jitter_max = jitter
+            elif jitter < self.jitter_min:
+                self.jitter_min = jitter
+            elif jitter > self.jitter_max:
+                self.jitter_max = jitter
+            self.jitter_count += 1
+            self.jitter_sum += jitter
+            self.jitter_sq_sum += jitter * jitter
+        self.last_start = now
+        self.tick_start = now
+        if self.shedding:
+            self.shed_ticks += 1
+
+        # advance on the absolute grid, skipping deadlines we already missed
+        # so one long stall doesn't cause a burst of back-to-back catch-up ticks
+        self.next_deadline += self.period
+        if self.next_deadline <= now:
+            missed = int((now - self.next_deadline) / self.period) + 1
+            self.skipped_deadlines += missed
+            self.next_deadline += missed * self.period
+
+    def end_tick(self):
+        """
+        mark the end of a scheduled tick
+
+        Returns:
+            True if the tick overran its budget
+        """
+        duration = time.monotonic() - self.tick_start
+        self.ticks += 1
+        if duration > self.max_duration:
+            self.max_duration = duration
+
+        overran = duration > self.budget
+        if overran:
+            self.overruns += 1
+        self.shedding = overran
+        return overran
+
+    def get_stats(self):
+        """
+        get scheduler statistics
+
+        Returns:
+            dict with tick/overrun counts and jitter in milliseconds
+        """
+        mean = stddev = 0.0
+        if self.jitter_count:
+            mean = self.jitter_sum / self.jitter_count
+            variance = self.jitter_sq_sum / self.jitter_count - mean * mean
+            stddev = max(0.0, variance) ** 0.5
+
+        return {
+            "rate_hz": self.rate_hz,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "shed_ticks": self.shed_ticks,
+            "skipped_deadlines": self.skipped_deadlines,
+            "jitter_mean_ms": mean * 1000,
+            "jitter_stddev_ms": stddev * 1000,
+            "jitter_min_ms": self.jitter_min * 1000,
+            "jitter_max_ms": self.jitter_max * 1000,
+            "max_lateness_ms": self.max_lateness * 1000,
+            "max_tick_ms": self.max_duration * 1000,
+        }
+
+    def report(self):
+        """print a one-block summary of scheduler statistics"""
+        stats = self.get_stats()
+        print(f"Tick scheduler ({stats['rate_hz']}Hz): {stats['ticks']} ticks, "
+              f"{stats['overruns']} overruns, {stats['shed_ticks']} shed, "
+              f"{stats['skipped_deadlines']} skipped deadlines")
+        print(f"  period jitter: mean {stats['jitter_mean_ms']:.2f}ms, "
+              f"stddev {stats['jitter_stddev_ms']:.2f}ms, "
+              f"min {stats['jitter_min_ms']:.2f}ms, max {stats['jitter_max_ms']:.2f}ms")
+        print(f"  max lateness {stats['max_lateness_ms']:.2f}ms, "
+              f"max tick {stats['max_tick_ms']:.2f}ms")
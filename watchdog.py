@@ -0,0 +1,122 @@
+"""
+control loop watchdog
+the control loop heartbeats every tick; if a heartbeat is late by more than
+the timeout, a separate thread stops all motors, so a stalled loop (blocking
+call, hung subprocess, long exception path) can't leave them running at the
+last duty. stop latency is measured from the missed deadline
+"""
+import threading
+import time
+from latency import LatencyHistogram
+
+
+class Watchdog:
+    def __init__(self, on_stall, timeout=0.25, clock=time.monotonic):
+        """
+        initialize and start the watchdog thread (disarmed)
+
+        Args:
+            on_stall: called from the watchdog thread when a heartbeat is late
+                      (e.g. Robot.stop_all) - must be safe against the loop's own writes
+            timeout: max seconds between heartbeats
+            clock: time source, same one heartbeat() uses
+        """
+        self.on_stall = on_stall
+        self.timeout = timeout
+        self.clock = clock
+
+        self.last_beat = clock()
+        self.armed = False
+        self.tripped = False
+
+        self.trips = 0
+        self.recoveries = 0
+        self.stop_errors = 0
+        self.detect_latency = LatencyHistogram()   # deadline -> watchdog noticed
+        self.stop_latency = LatencyHistogram()     # deadline -> on_stall() returned
+
+        self._wake = threading.Event()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+        self._thread.start()
+
+    def heartbeat(self):
+        """called by the control loop every tick (one float store, no locking)"""
+        self.last_beat = self.clock()
+
+    def arm(self):
+        """start supervising (e.g. once the controller is connected)"""
+        self.last_beat = self.clock()
+        self.tripped = False
+        self.armed = True
+        self._wake.set()
+
+    def disarm(self):
+        """stop supervising (e.g. while the loop waits for a reconnect)"""
+        self.armed = False
+
+    def _run(self):
+        while self._running:
+            if not self.armed:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            deadline = self.last_beat + self.timeout
+            now = self.clock()
+            if now < deadline:
+                if self.tripped:
+                    self.tripped = False
+                    self.recoveries += 1
+                    print("Watchdog: control loop recovered")
+                self._wake.wait(deadline - now)
+                self._wake.clear()
+                continue
+
+            if self.tripped:
+                # already stopped, check again for a heartbeat
+                self._wake.wait(self.timeout)
+                self._wake.clear()
+                continue
+
+            self.tripped = True
+            self.trips += 1
+            self.detect_latency.record(now - deadline)
+            try:
+                self.on_stall()
+            except Exception as e:
+                self.stop_errors += 1
+                print(f"Watchdog: stop failed: {e}")
+            self.stop_latency.record(self.clock() - deadline)
+            print(f"Watchdog: no heartbeat for {self.clock() - self.last_beat:.3f}s, "
+                  f"all motors stopped")
+
+    def get_stats(self):
+        """
+        Returns:
+            dict of trips/recoveries and stop latency in ms
+        """
+        return {
+            "trips": self.trips,
+            "recoveries": self.recoveries,
+            "stop_errors": self.stop_errors,
+            "detect_p99_ms": self.detect_latency.percentile(99) * 1000,
+            "stop_p50_ms": self.stop_latency.percentile(50) * 1000,
+            "stop_p99_ms": self.stop_latency.percentile(99) * 1000,
+            "stop_max_ms": self.stop_latency.max() * 1000,
+        }
+
+    def report(self):
+        s = self.get_stats()
+        print(f"Watchdog ({self.timeout * 1000:.0f}ms): {s['trips']} trips, "
+              f"{s['recoveries']} recoveries, {s['stop_errors']} stop errors")
+        if s["trips"]:
+            print(f"  stop latency after missed heartbeat: p50 {s['stop_p50_ms']:.2f}ms  "
+                  f"p99 {s['stop_p99_ms']:.2f}ms  max {s['stop_max_ms']:.2f}ms "
+                  f"(detection p99 {s['detect_p99_ms']:.2f}ms)")
+
+    def stop(self):
+        self._running = False
+        self.armed = False
+        self._wake.set()
+        self._thread.join(timeout=1.0)